@@ -0,0 +1,136 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import glob
+import logging
+import os
+import sys
+
+from generate_oai_report import generate_report, get_args, set_logger
+from iperf_json_reader import load_iperf_report
+from process_payload import find_key_path
+from results_scanner import scan_results_directory
+
+
+# abbreviations are not allowed, as unknown arguments are passed to generate_oai_report.py,
+# e.g., --results_dir would otherwise be taken as --results_dirs
+def get_batch_args(argv: list=None):
+    parser = argparse.ArgumentParser(description='Generate the reports of multiple results directories. '
+        'Other arguments are the same of generate_oai_report.py, and are applied to all the results directories',
+        allow_abbrev=False)
+    parser.add_argument('--results_dirs', type=str, nargs='+', required=True,
+        help='Results directories, or glob patterns of results directories')
+    return parser.parse_known_args(argv)
+
+
+def expand_results_dirs(results_dirs: list) -> list:
+
+    expanded_dirs = []
+    for el in results_dirs:
+        matched_dirs = sorted([x for x in glob.glob(el) if os.path.isdir(x)])
+        if not matched_dirs:
+            logging.warning('No results directory matches {}'.format(el))
+
+        for d_val in matched_dirs:
+            if d_val not in expanded_dirs:
+                expanded_dirs.append(d_val)
+
+    return expanded_dirs
+
+
+# get start time of the first test of a json report, None if the report has no timestamp
+def get_report_timestamp(json_report: str):
+
+    try:
+        json_data = load_iperf_report(json_report)
+    except (OSError, ValueError):
+        logging.warning('Could not load JSON report {}'.format(json_report))
+        return None
+
+    path = find_key_path(json_data, 'time')
+    if not path:
+        return None
+
+    timestamp = json_data
+    for key in path:
+        timestamp = timestamp[key]
+
+    try:
+        return datetime.strptime(timestamp, '%a, %d %b %Y %H:%M:%S %Z')
+    except (TypeError, ValueError):
+        return None
+
+
+# start time of a reservation, i.e., of its earliest test. Reports of each ue are sorted by name,
+# hence chronologically, so only the first report with a timestamp of each ue is loaded
+def get_reservation_timestamp(ue_json_reports: dict):
+
+    reservation_timestamp = None
+    for r_val in ue_json_reports.values():
+        for j_el in r_val:
+            timestamp = get_report_timestamp(j_el)
+            if timestamp is None:
+                continue
+
+            if reservation_timestamp is None or timestamp < reservation_timestamp:
+                reservation_timestamp = timestamp
+            break
+
+    return reservation_timestamp
+
+
+# sort reservations by start time, so that the test history is updated in the same order as
+# when generating their reports one after the other. Reservations without timestamp are processed last
+def sort_reservations(reservations: list) -> list:
+    return sorted(reservations, key=lambda x: (x[1] is None, x[1] or datetime.min))
+
+
+def main() -> None:
+
+    # set logger
+    log_filename = os.path.basename(__file__).replace('.py', '.log')
+    set_logger(log_filename)
+
+    batch_args, report_argv = get_batch_args()
+    results_dirs = expand_results_dirs(batch_args.results_dirs)
+
+    reservations = []
+    for d_val in results_dirs:
+        args = get_args(['--results_dir', d_val] + report_argv)
+        scan_results = scan_results_directory(args.results_dir, args.scan_manifest)
+        reservations.append((args, get_reservation_timestamp(scan_results[2]), scan_results))
+
+    reservations = sort_reservations(reservations)
+    logging.info('Generating reports of {} results directories'.format(len(reservations)))
+
+    # reservations are processed one after the other, as each of them is compared against the test history
+    # updated by the previous ones. Reports of each reservation are rendered in parallel by workers shared
+    # across reservations, which keep their imports and history caches
+    workers = max([x[0].workers for x in reservations] + [1])
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    failed_dirs = []
+    try:
+        for args, timestamp, scan_results in reservations:
+            logging.info('Generating report of {} (start time {})'.format(args.results_dir, timestamp))
+            try:
+                if not generate_report(args, executor, scan_results, workers):
+                    failed_dirs.append(args.results_dir)
+            except Exception:
+                logging.exception('Could not generate report of {}'.format(args.results_dir))
+                failed_dirs.append(args.results_dir)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    logging.info('Generated {} reports'.format(len(reservations) - len(failed_dirs)))
+    for el in failed_dirs:
+        logging.error('Report of {} was not generated'.format(el))
+
+    # fail the batch if any report was not generated, e.g., in ci jobs
+    if failed_dirs:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import sys
+import time
+from io import BytesIO
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from constants import FigureFormats, PlotBackends
+from figure_renderer import embed_figure, render_line_figure
+
+# figure options compared by the benchmark, as passed to generate_oai_report.py
+FIGURE_OPTIONS = [
+    {'figure_format': FigureFormats.PNG.value},
+    {'figure_format': FigureFormats.PNG.value, 'figure_dpi': 72},
+    {'figure_format': FigureFormats.PNG.value, 'figure_colors': 64},
+    {'figure_format': FigureFormats.PNG.value, 'figure_colors': 16},
+    {'figure_format': FigureFormats.PNG.value, 'figure_dpi': 72, 'figure_colors': 64},
+    {'figure_format': FigureFormats.SVG.value},
+    {'figure_format': FigureFormats.WEBP.value},
+]
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Compare encode time and embedded size of the figure formats')
+    parser.add_argument('--figures', type=int, default=20, help='Number of figures rendered with each option')
+    parser.add_argument('--intervals', type=int, default=60, help='Number of intervals of each series')
+    parser.add_argument('--plot_backend', type=str, default=PlotBackends.MATPLOTLIB.value,
+        choices=[x.value for x in PlotBackends], help='Backend used to draw the figures')
+    return parser.parse_args()
+
+
+# throughput-like series, reproducible across runs
+def get_series(n_intervals: int, seed: int) -> tuple:
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    x = np.arange(1, n_intervals + 1, dtype=np.float64)
+    y = 50 * rng.uniform(0.8, 1.1, n_intervals)
+    return x, y
+
+
+def measure_option(figure_option: dict, series: list, plot_backend: str) -> dict:
+
+    figure_format = figure_option['figure_format']
+    encode_times = []
+    embedded_bytes = 0
+    for x, y in series:
+        start_time = time.perf_counter()
+        save_path = BytesIO()
+        render_line_figure(save_path, figure_format, x, y, 'Throughput [Mbps]', float(y.mean()), 48.0,
+            float(y.max()) * 1.05, None, plot_backend, None, figure_option.get('figure_dpi'))
+        html_figure = embed_figure(save_path.getvalue(), figure_format, figure_option.get('figure_colors'))
+        encode_times.append((time.perf_counter() - start_time) * 1000)
+        embedded_bytes += len(html_figure)
+
+    return dict(figure_option,
+                mean_time_ms=round(sum(encode_times) / len(encode_times), 2),
+                mean_embedded_kb=round(embedded_bytes / len(series) / 1024, 2))
+
+
+def main() -> None:
+
+    args = get_args()
+    series = [get_series(args.intervals, x) for x in range(args.figures)]
+
+    # draw a first figure so that imports and figure setup are not measured
+    measure_option(FIGURE_OPTIONS[0], series[:1], args.plot_backend)
+
+    results = [measure_option(x, series, args.plot_backend) for x in FIGURE_OPTIONS]
+    print(json.dumps({'figures': args.figures, 'intervals': args.intervals, 'plot_backend': args.plot_backend,
+        'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import functools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import generate_oai_report
+from synthetic_reservation import add_reservation_args, generate_reservation
+
+# stages of the pipeline, as the module and name of the function timed for each of them.
+# Functions are replaced in the modules calling them, stages called within other stages are also
+# included in the time of the outer one, e.g., build_dataframe in generate_html_table
+PIPELINE_STAGES = {
+    'discovery': [('generate_oai_report', 'scan_results_directory')],
+    'get_oai_git_commit': [('generate_oai_report', 'get_oai_git_commit'), ('html_report_utils', 'get_oai_git_commit')],
+    'json_load': [('html_report_utils', 'load_iperf_report')],
+    'history_load': [('html_report_utils', 'load_test_history_summary')],
+    'grapher': [('html_report_utils', 'grapher')],
+    'build_dataframe': [('html_report_utils', 'build_dataframe')],
+    'generate_html_table': [('html_report_utils', 'generate_html_table')],
+    'populate_report_page': [('html_report_utils', 'populate_report_page')],
+    'history_update': [('html_report_utils', 'update_test_history_data')],
+    'write_html_report': [('html_report_utils', 'write_html_report')],
+}
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Time each stage of the report generation on a synthetic reservation. '
+        'Other arguments are passed to generate_oai_report.py, reports are processed in a single process')
+    add_reservation_args(parser)
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs, each on a newly generated reservation')
+    parser.add_argument('--output', type=str, help='JSON file in which results are written, printed if not passed')
+    return parser.parse_known_args()
+
+
+class StageTimer:
+
+    def __init__(self):
+        self.stage_times = dict()
+
+    def wrap(self, stage: str, function):
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stage_time = self.stage_times.setdefault(stage, {'calls': 0, 'time_ms': 0.0})
+                stage_time['calls'] += 1
+                stage_time['time_ms'] += (time.perf_counter() - start_time) * 1000
+
+        return timed_function
+
+    # replace the functions of the stages with their timed version, returns the original functions
+    def install(self) -> list:
+        import html_report_utils
+
+        modules = {'generate_oai_report': generate_oai_report, 'html_report_utils': html_report_utils}
+        original_functions = []
+        for s_key, s_val in PIPELINE_STAGES.items():
+            for module_name, function_name in s_val:
+                function = getattr(modules[module_name], function_name)
+                original_functions.append((modules[module_name], function_name, function))
+                setattr(modules[module_name], function_name, self.wrap(s_key, function))
+
+        return original_functions
+
+
+def run_pipeline(args, report_argv: list) -> dict:
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        results_dir, history_dir = generate_reservation(output_dir, args)
+        report_args = generate_oai_report.get_args(['--results_dir', results_dir, '--history_dir', history_dir] + report_argv)
+
+        # stages run in worker processes would not be timed
+        report_args.workers = 1
+
+        stage_timer = StageTimer()
+        original_functions = stage_timer.install()
+        try:
+            start_time = time.perf_counter()
+            generate_oai_report.generate_report(report_args)
+            total_time = (time.perf_counter() - start_time) * 1000
+        finally:
+            for module, function_name, function in original_functions:
+                setattr(module, function_name, function)
+
+        report_bytes = os.path.getsize(os.path.join(results_dir, 'test_summary.html'))
+
+    return {'total_ms': total_time, 'report_bytes': report_bytes, 'stages': stage_timer.stage_times}
+
+
+def main() -> None:
+
+    args, report_argv = get_args()
+
+    runs = [run_pipeline(args, report_argv) for _ in range(args.repeat)]
+
+    # median across runs of the time of each stage
+    stages = dict()
+    for el in PIPELINE_STAGES:
+        stage_runs = [x['stages'][el] for x in runs if el in x['stages']]
+        if stage_runs:
+            stages[el] = {'calls': stage_runs[0]['calls'],
+                          'time_ms': round(statistics.median([x['time_ms'] for x in stage_runs]), 2)}
+
+    reservation = {x: getattr(args, x) for x in ['ues', 'protocols', 'directions', 'bands', 'streams', 'intervals',
+                                                'interval_seconds', 'history_rows', 'log_kb', 'seed']}
+    results = {'reservation': reservation,
+               'report_args': report_argv,
+               'repeat': args.repeat,
+               'total_ms': round(statistics.median([x['total_ms'] for x in runs]), 2),
+               'report_bytes': runs[-1]['report_bytes'],
+               'stages': stages}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that must only be imported by the code paths that draw figures or build tables
+HEAVY_MODULES = ['matplotlib', 'numpy', 'pandas', 'seaborn']
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Check startup time of generate_oai_report.py against a budget')
+    parser.add_argument('--budget_ms', type=float, default=300, help='Maximum startup time in milliseconds')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs of each measurement, the fastest is kept')
+    return parser.parse_args()
+
+
+# cumulative import time of a module in milliseconds, as reported by python -X importtime
+def measure_import_time(module: str) -> float:
+
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True).stderr
+
+    for line in output.splitlines():
+        fields = [x.strip() for x in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+
+    raise RuntimeError('Import time of {} not found'.format(module))
+
+
+def measure_run_time(argv: list) -> float:
+    start_time = time.perf_counter()
+    subprocess.run([sys.executable] + argv, cwd=REPO_DIR, capture_output=True, check=False)
+    return (time.perf_counter() - start_time) * 1000
+
+
+def get_imported_heavy_modules(module: str) -> list:
+
+    output = subprocess.run([sys.executable, '-c', 'import json, sys, {}; print(json.dumps(list(sys.modules)))'.format(module)],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+
+    return sorted(set(x.split('.')[0] for x in json.loads(output)) & set(HEAVY_MODULES))
+
+
+def main() -> None:
+
+    args = get_args()
+
+    with tempfile.TemporaryDirectory() as empty_results_dir:
+        measurements = {
+            'import_generate_oai_report': min([measure_import_time('generate_oai_report') for _ in range(args.repeat)]),
+            'help': min([measure_run_time(['generate_oai_report.py', '--help']) for _ in range(args.repeat)]),
+            'no_gnb_log': min([measure_run_time(['generate_oai_report.py', '--results_dir', empty_results_dir])
+                               for _ in range(args.repeat)]),
+        }
+
+    heavy_modules = get_imported_heavy_modules('generate_oai_report')
+
+    print(json.dumps({'budget_ms': args.budget_ms, 'time_ms': measurements, 'heavy_modules': heavy_modules}, indent=2))
+
+    failed = [k for k, v in measurements.items() if v > args.budget_ms]
+    if failed or heavy_modules:
+        print('Startup budget exceeded: {}'.format(', '.join(failed + heavy_modules)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from constants import ProcessingConstants, TestResultKeys
+
+# start of the first test of the reservation, later tests follow each other
+RESERVATION_START = datetime(2024, 7, 30, 16, 0, 0)
+
+GNB_SRN = 1
+
+DIRECTIONS = {'DL': 'Downlink', 'UL': 'Uplink'}
+
+# throughput of tests with unlimited transmit rate
+UNLIMITED_RATE_MBPS = 50
+
+OAI_VERSION_LINE = '[HW]   I Version: Branch: develop Abrev. Hash: bd721c3bd Date: Tue Jul 30 16:24:27 2024 +0000\n'
+OAI_FILLER_LINE = '[NR_MAC]   I Frame.Slot 128.0\n'
+
+
+def get_args(argv: list=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic Colosseum reservation with OAI logs and iperf3 reports')
+    add_reservation_args(parser)
+    parser.add_argument('--output_dir', type=str, required=True, help='Directory in which the reservation is generated')
+    return parser.parse_args(argv)
+
+
+# options of the generated reservation, shared with the pipeline benchmark
+def add_reservation_args(parser) -> None:
+    parser.add_argument('--ues', type=int, default=3, help='Number of UEs')
+    parser.add_argument('--protocols', type=str, nargs='+', default=['tcp', 'udp'], choices=['tcp', 'udp'],
+        help='Protocols tested by each UE')
+    parser.add_argument('--directions', type=str, nargs='+', default=list(DIRECTIONS), choices=list(DIRECTIONS),
+        help='Directions tested by each UE')
+    parser.add_argument('--bands', type=int, nargs='+', default=[0, 20], help='Target transmit rates in Mbps, 0 is unlimited')
+    parser.add_argument('--streams', type=int, default=1, help='Number of parallel streams of each test')
+    parser.add_argument('--intervals', type=int, default=60, help='Number of intervals of each test')
+    parser.add_argument('--interval_seconds', type=float, default=1.0, help='Duration of each interval')
+    parser.add_argument('--history_rows', type=int, default=0, help='Number of past results of each test type in the history')
+    parser.add_argument('--log_kb', type=int, default=1, help='Size of the OAI logs in kB')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random values')
+
+
+def write_oai_log(log_file: str, log_kb: int) -> None:
+
+    filler_lines = max(log_kb * 1024 // len(OAI_FILLER_LINE), 1)
+    with open(log_file, 'w') as f:
+        f.write(OAI_VERSION_LINE)
+        f.write(OAI_FILLER_LINE * filler_lines)
+
+
+def get_stream_interval(rng: random.Random, protocol: str, socket: int, start: float, seconds: float, rate_mbps: float) -> dict:
+
+    bits_per_second = rate_mbps * 1e6 * rng.uniform(0.85, 1.05)
+    stream = {'socket': socket,
+              'start': start,
+              'end': start + seconds,
+              'seconds': seconds,
+              'bytes': int(bits_per_second * seconds / 8),
+              'bits_per_second': bits_per_second,
+              'omitted': False,
+              'sender': True}
+
+    if protocol == 'tcp':
+        stream.update({'retransmits': rng.randint(0, 2),
+                       'snd_cwnd': rng.randint(100000, 300000),
+                       'rtt': rng.randint(20000, 40000),
+                       'rttvar': rng.randint(500, 2000),
+                       'pmtu': 1500})
+    else:
+        packets = max(stream['bytes'] // 1400, 1)
+        lost_packets = rng.randint(0, 5)
+        stream.update({'packets': packets,
+                       'jitter_ms': rng.uniform(0.1, 1),
+                       'lost_packets': lost_packets,
+                       'lost_percent': 100 * lost_packets / packets})
+
+    return stream
+
+
+# sum of the streams of an interval, with the fields reported by iperf3
+def get_sum_interval(protocol: str, streams: list) -> dict:
+
+    summed_fields = ['bytes', 'bits_per_second'] + (['retransmits'] if protocol == 'tcp' else ['packets', 'lost_packets'])
+    interval_sum = {x: streams[0][x] for x in ['start', 'end', 'seconds', 'omitted', 'sender']}
+    interval_sum.update({x: sum([s[x] for s in streams]) for x in summed_fields})
+
+    if protocol == 'udp':
+        interval_sum['jitter_ms'] = sum([x['jitter_ms'] for x in streams]) / len(streams)
+        interval_sum['lost_percent'] = 100 * interval_sum['lost_packets'] / interval_sum['packets']
+
+    return interval_sum
+
+
+def get_iperf_output(rng: random.Random, protocol: str, band: int, start_time: datetime, args) -> dict:
+
+    rate_mbps = band / args.streams if band else UNLIMITED_RATE_MBPS
+    intervals = []
+    for i_idx in range(args.intervals):
+        start = i_idx * args.interval_seconds
+        streams = [get_stream_interval(rng, protocol, 5 + x, start, args.interval_seconds, rate_mbps) for x in range(args.streams)]
+        intervals.append({'streams': streams, 'sum': get_sum_interval(protocol, streams)})
+
+    return {'start': {'timestamp': {'time': start_time.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+                                    'timesecs': int((start_time - datetime(1970, 1, 1)).total_seconds())},
+                      'test_start': {'protocol': protocol.upper(), 'num_streams': args.streams}},
+            'intervals': intervals,
+            'end': {}}
+
+
+# past results of each test type, with random values of the history columns below the ones of the
+# generated tests, so that the tests pass and the history is updated
+def write_history(history_dir: str, args, rng: random.Random) -> None:
+    from history_store import connect_history_database, get_history_key, insert_history_rows
+    from html_report_utils import get_test_history_headers
+
+    os.makedirs(history_dir, exist_ok=True)
+    connection = connect_history_database(os.path.join(history_dir, ProcessingConstants.HISTORY_DATABASE_FILE.value))
+    try:
+        connection.execute('BEGIN IMMEDIATE')
+        for protocol in args.protocols:
+            for direction in args.directions:
+                test_history_file = os.path.join(history_dir, '{}_{}_{}.pkl'.format(TestResultKeys.TEST_HISTORY.value,
+                    protocol, DIRECTIONS[direction].lower()))
+
+                header = get_test_history_headers(protocol, DIRECTIONS[direction])
+                rows = []
+                for _ in range(args.history_rows):
+                    band = rng.choice(args.bands)
+                    rows.append([protocol.upper(), band] + [rng.uniform(0.7, 0.9) * (band or UNLIMITED_RATE_MBPS)
+                        for _ in header[2:]])
+
+                insert_history_rows(connection, get_history_key(test_history_file), header, rows)
+        connection.execute('COMMIT')
+    finally:
+        connection.close()
+
+
+# generate a reservation with a gnb directory and a directory per ue, each with a report per protocol and direction.
+# Returns the results directory and the history directory
+def generate_reservation(output_dir: str, args) -> tuple:
+
+    rng = random.Random(args.seed)
+    results_dir = os.path.join(output_dir, 'reservation')
+    history_dir = os.path.join(output_dir, 'history')
+
+    gnb_dir = os.path.join(results_dir, 'srn{:03d}-RES'.format(GNB_SRN))
+    os.makedirs(gnb_dir, exist_ok=True)
+    write_oai_log(os.path.join(gnb_dir, ProcessingConstants.OAI_GNB_LOG_FILE.value), args.log_kb)
+
+    test_duration = timedelta(seconds=args.intervals * args.interval_seconds * len(args.bands))
+    for u_idx in range(args.ues):
+        ue_dir = os.path.join(results_dir, 'srn{:03d}-RES'.format(GNB_SRN + u_idx + 1))
+        os.makedirs(ue_dir, exist_ok=True)
+        write_oai_log(os.path.join(ue_dir, ProcessingConstants.OAI_UE_LOG_FILE.value), args.log_kb)
+
+        start_time = RESERVATION_START
+        for direction in args.directions:
+            for protocol in args.protocols:
+                report = {protocol: {str(x): get_iperf_output(rng, protocol, x, start_time, args) for x in args.bands}}
+                report_file = 'iperf3_result_{}_{}.json'.format(start_time.strftime('%Y%m%d_%H%M%S'), direction)
+                with open(os.path.join(ue_dir, report_file), 'w') as f:
+                    json.dump(report, f)
+
+                start_time += test_duration
+
+    if args.history_rows > 0:
+        write_history(history_dir, args, rng)
+    else:
+        os.makedirs(history_dir, exist_ok=True)
+
+    return results_dir, history_dir
+
+
+def main() -> None:
+
+    args = get_args()
+    results_dir, history_dir = generate_reservation(args.output_dir, args)
+    print(json.dumps({'results_dir': results_dir, 'history_dir': history_dir}))
+
+
+if __name__ == '__main__':
+    main()
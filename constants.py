@@ -2,11 +2,18 @@ from enum import Enum
 
 
 class ProcessingConstants(Enum):
+    FIGURE_ASSETS_DIR = 'figures'
+    FIGURE_MAX_COLORS = 256
+    FIGURE_MIN_COLORS = 2
+    HISTORY_DATABASE_FILE = 'test_history.sqlite'
+    OAI_COMMIT_HEAD_BYTES = 1024 * 1024
     OAI_COMMIT_NOT_FOUND_DEFAULT = 'n/a'
     OAI_COMMIT_REGEX = r'Hash:\s+(\d|\w)+'
     OAI_GNB_LOG_FILE = 'nr-gnb.log'
     OAI_LOG_LAYER_INFO = r'^.*\[HW\]\s+(I\s)*'
     OAI_UE_LOG_FILE = 'nr-ue.log'
+    PLOT_MAX_POINTS = 1280
+    REPORT_CACHE_MAX_MB = 512
     SRN_NUMBER = r'srn\d+'
     SRN_NUMBER_NOT_FOUND_DEFAULT = 'n/a'
     TEST_DIRECTION_REGEX = r'(\w{2,})link'
@@ -19,6 +26,10 @@ class HtmlTemplateKeywords(Enum):
     FINAL_TEST_OUTCOME = 'PLACEHOLDER_FINAL_TEST_OUTCOME'
     GNB_COMMIT = 'PLACEHOLDER_GNB_TEST_COMMIT'
     GNB_SRN_NUMBER = 'PLACEHOLDER_GNB_SRN_NUMBER'
+    HISTORY_DIR = 'PLACEHOLDER_HISTORY_DIR'
+    HISTORY_REPORT_TIME = 'PLACEHOLDER_HISTORY_REPORT_TIME'
+    HISTORY_TRENDS = 'PLACEHOLDER_HISTORY_TRENDS'
+    HISTORY_WINDOW = 'PLACEHOLDER_HISTORY_WINDOW'
     JENKINS_BUILD_URL = 'PLACEHOLDER_JENKINS_BUILD_URL'
     JENKINS_JOB_ID = 'PLACEHOLDER_JENKINS_JOB_ID'
     OAI_REPO_URL = 'PLACEHOLDER_OAI_REPO_URL'
@@ -47,11 +58,17 @@ class TestKeys(Enum):
     METRIC = 'metric'
     METRIC_MAX = 'max'
     METRIC_MEAN = 'mean'
+    METRIC_P5 = 'p5'
+    METRIC_P50 = 'p50'
+    METRIC_P95 = 'p95'
+    METRIC_STD = 'std'
+    STALLED_INTERVALS = 'stalled_intervals'
     RESULTS = 'results'
     TEST = 'test'
 
 
 class TestResultKeys(Enum):
+    ALL_STREAMS = 'all'
     BAND = 'band_'
     PROTOCOL = 'protocol_'
     RESULT_ERROR = 'n/a'
@@ -64,7 +81,12 @@ class DataframeColumns(Enum):
     MAX = 'Max'
     MEAN = 'Mean'
     METRIC = 'Metric'
+    P5 = 'P5'
+    P50 = 'P50'
+    P95 = 'P95'
     PROTOCOL = 'Protocol'
+    STALLED_INTERVALS = 'Stalled Intervals'
+    STD = 'Std'
     STREAM = 'Stream'
     TX_RATE = 'Transmit Rate'
 
@@ -81,12 +103,98 @@ class DataframeMetrics(Enum):
 
 
 class TestPassFailThresholds(Enum):
+    STALL_THROUGHPUT = 0
     THROUGHPUT_THRESHOLD = 0.9
 
 
 class HistoryUpdateKeys(Enum):
-    TEST_DATAFRAME = 'test_df'
     TEST_DIRECTION = 'test_direction'
     TEST_HISTORY_FILE = 'test_history_file'
+    TEST_HISTORY_ROW = 'test_history_row'
     TEST_PASS_STATUS = 'test_passed'
     TEST_PROTOCOL = 'test_protocol'
+
+
+class HistorySummaryKeys(Enum):
+    COUNT = 'count'
+    MEAN = 'mean'
+
+
+class RenderedReportKeys(Enum):
+    FIGURE_DATA = 'figure_data'
+    TARGET_RATE = 'target_rate'
+    TEST_DIRECTION = 'test_direction'
+    TEST_HISTORY = 'test_history'
+    TEST_HISTORY_FILE = 'test_history_file'
+    TEST_PROTOCOL = 'test_protocol'
+
+
+class ReportOptions(Enum):
+    CACHE_DIR = 'cache_dir'
+    CACHE_MAX_MB = 'cache_max_mb'
+    CHART_MODE = 'chart_mode'
+    COMMIT_FULL_SCAN = 'commit_full_scan'
+    COMMIT_HEAD_BYTES = 'commit_head_bytes'
+    DECIMATION = 'decimation'
+    FIGURE_COLORS = 'figure_colors'
+    FIGURE_DPI = 'figure_dpi'
+    FIGURE_FORMAT = 'figure_format'
+    FIGURE_STORAGE = 'figure_storage'
+    HISTORY_BACKEND = 'history_backend'
+    MAX_PLOT_POINTS = 'max_plot_points'
+    MAX_STALLED_INTERVALS = 'max_stalled_intervals'
+    PAGE_ASSEMBLY = 'page_assembly'
+    PLOT_BACKEND = 'plot_backend'
+    RTT_P95_THRESHOLD = 'rtt_p95_threshold'
+    STREAM_MODE = 'stream_mode'
+    STREAM_WORKERS = 'stream_workers'
+    THROUGHPUT_P5_THRESHOLD = 'throughput_p5_threshold'
+    WORKERS = 'workers'
+
+
+class ChartModes(Enum):
+    IMAGE = 'image'
+    INTERACTIVE = 'interactive'
+
+
+class DecimationModes(Enum):
+    LTTB = 'lttb'
+    MINMAX = 'minmax'
+    NONE = 'none'
+
+
+class FigureFormats(Enum):
+    PNG = 'png'
+    SVG = 'svg'
+    WEBP = 'webp'
+
+
+class FigureStorageModes(Enum):
+    EMBEDDED = 'embedded'
+    EXTERNAL = 'external'
+
+
+class HistoryBackends(Enum):
+    PICKLE = 'pickle'
+    SQLITE = 'sqlite'
+
+
+class PageAssemblyModes(Enum):
+    MEMORY = 'memory'
+    STREAMING = 'streaming'
+
+
+class PlotBackends(Enum):
+    MATPLOTLIB = 'matplotlib'
+    SEABORN = 'seaborn'
+
+
+class ProfileHooks(Enum):
+    CPROFILE = 'cprofile'
+    TRACEMALLOC = 'tracemalloc'
+
+
+class StreamModes(Enum):
+    OVERLAY = 'overlay'
+    PER_STREAM = 'per_stream'
+    SUM = 'sum'
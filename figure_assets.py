@@ -0,0 +1,63 @@
+import hashlib
+import logging
+import os
+import re
+
+from constants import ProcessingConstants
+
+# figures referenced by the report page, relative to the directory of the page
+FIGURE_ASSET_REGEX = re.compile(r'src=\'{}/([0-9a-f]{{64}}\.\w+)\''.format(ProcessingConstants.FIGURE_ASSETS_DIR.value))
+
+
+def get_figure_assets_dir(results_dir: str) -> str:
+    return os.path.join(results_dir, ProcessingConstants.FIGURE_ASSETS_DIR.value)
+
+
+# write figure in the assets directory, named after the hash of its content, and reference it from the page.
+# Figures with the same content are written once, and shared by all the tables referencing them
+def write_figure_asset(figure_bytes: bytes, figure_extension: str, assets_dir: str) -> str:
+
+    asset_name = '{}.{}'.format(hashlib.sha256(figure_bytes).hexdigest(), figure_extension)
+    asset_file = os.path.join(assets_dir, asset_name)
+
+    if not os.path.exists(asset_file):
+        os.makedirs(assets_dir, exist_ok=True)
+
+        # other workers may be writing the same figure, the last rename wins with the same content
+        asset_file_tmp = '{}.{}.tmp'.format(asset_file, os.getpid())
+        with open(asset_file_tmp, 'wb') as f:
+            f.write(figure_bytes)
+        os.replace(asset_file_tmp, asset_file)
+
+    return '<img src=\'{}/{}\' loading=\'lazy\'>'.format(ProcessingConstants.FIGURE_ASSETS_DIR.value, asset_name)
+
+
+def get_figure_asset_names(html: str) -> set:
+    return set(FIGURE_ASSET_REGEX.findall(html))
+
+
+# whether all the figures referenced by html were written in the assets directory
+def are_figure_assets_present(html: str, assets_dir: str) -> bool:
+    return all([os.path.exists(os.path.join(assets_dir, x)) for x in get_figure_asset_names(html)])
+
+
+# remove figures of previous reports that are not referenced by the page anymore, i.e., not in used_assets
+def remove_unused_figure_assets(used_assets: set, assets_dir: str) -> int:
+
+    if not os.path.isdir(assets_dir):
+        return 0
+
+    removed_assets = 0
+    with os.scandir(assets_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name not in used_assets:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+                removed_assets += 1
+
+    if removed_assets:
+        logging.info('Removed {} unused figures from {}'.format(removed_assets, assets_dir))
+
+    return removed_assets
@@ -0,0 +1,366 @@
+import base64
+from io import BytesIO
+import json
+import math
+
+from constants import FigureFormats, PlotBackends
+from figure_assets import write_figure_asset
+
+# significant digits of the values embedded in interactive charts
+CHART_DATA_DIGITS = 6
+
+# style set by sns.set_theme() and sns.set_context('paper'), so that the matplotlib
+# backend draws figures that look like the seaborn ones without going through seaborn
+SEABORN_PAPER_RC = {
+    'axes.axisbelow': True,
+    'axes.edgecolor': 'white',
+    'axes.facecolor': '#EAEAF2',
+    'axes.grid': True,
+    'axes.labelcolor': '.15',
+    'axes.labelsize': 9.6,
+    'axes.linewidth': 1.0,
+    'axes.prop_cycle': "cycler('color', ['#4C72B0', '#DD8452', '#55A868', '#C44E52', '#8172B3', "
+                       "'#937860', '#DA8BC3', '#8C8C8C', '#CCB974', '#64B5CD'])",
+    'axes.titlesize': 9.6,
+    'font.sans-serif': ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Bitstream Vera Sans', 'sans-serif'],
+    'font.size': 9.6,
+    'grid.color': 'white',
+    'legend.fontsize': 8.8,
+    'legend.title_fontsize': 9.6,
+    'lines.linewidth': 1.2,
+    'lines.markersize': 4.8,
+    'lines.solid_capstyle': 'round',
+    'patch.edgecolor': 'w',
+    'patch.force_edgecolor': True,
+    'patch.linewidth': 0.8,
+    'text.color': '.15',
+    'xtick.bottom': False,
+    'xtick.color': '.15',
+    'xtick.labelsize': 8.8,
+    'xtick.major.size': 4.8,
+    'xtick.major.width': 1.0,
+    'xtick.minor.size': 3.2,
+    'xtick.minor.width': 0.8,
+    'ytick.color': '.15',
+    'ytick.labelsize': 8.8,
+    'ytick.left': False,
+    'ytick.major.size': 4.8,
+    'ytick.major.width': 1.0,
+    'ytick.minor.size': 3.2,
+    'ytick.minor.width': 0.8
+}
+
+# colors of 'b' and 'r' once seaborn color codes are set
+TEST_AVERAGE_COLOR = '#4C72B0'
+TEST_HISTORY_AVERAGE_COLOR = '#C44E52'
+
+# lines of the individual streams drawn below their aggregate
+STREAM_COLOR = '#8C8C8C'
+STREAM_LINE_WIDTH = 0.8
+STREAM_ZORDER = 1.9
+
+X_LABEL = 'Time [s]'
+
+# history trend charts, wider than the test charts to fit long histories
+TREND_BAND_ALPHA = 0.25
+TREND_FIGURE_SIZE = (9.6, 4.0)
+TREND_X_LABEL = 'Run'
+
+FIGURE_MIME_TYPES = {FigureFormats.PNG.value: 'image/png',
+                     FigureFormats.SVG.value: 'image/svg+xml',
+                     FigureFormats.WEBP.value: 'image/webp'}
+
+# svg figures keep text as text, merge line segments closer than half a pixel,
+# and use fixed ids, so that the same figure is always saved with the same bytes
+SVG_RC = {'path.simplify': True,
+          'path.simplify_threshold': 0.5,
+          'svg.fonttype': 'none',
+          'svg.hashsalt': 'oai-report'}
+
+# lossy webp at high quality, lossless webp is several times slower to encode and larger
+WEBP_PIL_KWARGS = {'quality': 90, 'method': 2}
+
+
+# matplotlib and seaborn are only imported when the first figure is drawn, so that
+# code paths that do not draw figures, e.g., interactive charts, do not pay for their import
+def import_matplotlib():
+    import matplotlib
+
+    # to use matplotlib outside of the main thread. Must be set before importing pyplot
+    matplotlib.use('agg')
+
+    return matplotlib
+
+
+# persistent figure whose artists are updated in place at every plot,
+# instead of rebuilding the whole figure through seaborn
+class LineFigure:
+
+    def __init__(self):
+        matplotlib = import_matplotlib()
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        with matplotlib.rc_context(SEABORN_PAPER_RC):
+            self.figure = Figure()
+            FigureCanvasAgg(self.figure)
+
+            self.axes = self.figure.add_subplot(1, 1, 1)
+            self.test_line, = self.axes.plot([], [])
+            self.test_avg_line = self.axes.axhline(y=0, color=TEST_AVERAGE_COLOR, linestyle='--')
+            self.history_avg_line = self.axes.axhline(y=0, color=TEST_HISTORY_AVERAGE_COLOR, linestyle='--')
+            self.stream_lines = []
+
+            for spine in self.axes.spines.values():
+                spine.set_visible(False)
+
+            self.axes.set_xlabel(X_LABEL)
+
+    # lines of the individual streams are added when first needed, and hidden when not used
+    def set_stream_lines(self, stream_series) -> None:
+
+        stream_x, stream_y = stream_series if stream_series is not None else ([], [])
+
+        while len(self.stream_lines) < len(stream_y):
+            stream_line, = self.axes.plot([], [], color=STREAM_COLOR, linewidth=STREAM_LINE_WIDTH, zorder=STREAM_ZORDER)
+            self.stream_lines.append(stream_line)
+
+        for l_idx, l_val in enumerate(self.stream_lines):
+            if l_idx < len(stream_y):
+                l_val.set_data(stream_x[l_idx], stream_y[l_idx])
+                l_val.set_visible(True)
+            else:
+                l_val.set_visible(False)
+
+    def render(self, save_path, figure_extension: str, x, y, y_label: str, test_avg: float,
+               history_avg: float, top_margin: float, title: str, stream_series=None, dpi: float=None) -> None:
+
+        with import_matplotlib().rc_context(SEABORN_PAPER_RC):
+            self.test_line.set_data(x, y)
+            self.test_avg_line.set_ydata([test_avg, test_avg])
+            self.set_stream_lines(stream_series)
+
+            legend_handles = [self.test_line]
+            legend_entries = ['Test']
+
+            if stream_series is not None and len(stream_series[1]):
+                legend_handles.append(self.stream_lines[0])
+                legend_entries.append('Streams')
+
+            legend_handles.append(self.test_avg_line)
+            legend_entries.append('Test Average')
+
+            if history_avg is not None and not math.isnan(history_avg):
+                self.history_avg_line.set_ydata([history_avg, history_avg])
+                self.history_avg_line.set_visible(True)
+                legend_handles.append(self.history_avg_line)
+                legend_entries.append('Test History Average')
+            else:
+                self.history_avg_line.set_visible(False)
+
+            self.axes.relim(visible_only=True)
+            self.axes.autoscale_view(scaley=False)
+
+            self.axes.set_ylabel(y_label)
+            self.axes.set_title(title if title else '')
+            self.axes.legend(legend_handles, legend_entries)
+            self.axes.set_ylim(top=top_margin, bottom=-0.01)
+
+            save_figure(self.figure, save_path, figure_extension, dpi)
+
+
+# persistent figure of the trend of a metric across the runs in the test history, with the value of each run,
+# its rolling mean, and the band between two rolling percentiles
+class TrendFigure:
+
+    def __init__(self):
+        matplotlib = import_matplotlib()
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        with matplotlib.rc_context(SEABORN_PAPER_RC):
+            self.figure = Figure(figsize=TREND_FIGURE_SIZE)
+            FigureCanvasAgg(self.figure)
+
+            self.axes = self.figure.add_subplot(1, 1, 1)
+            self.run_line, = self.axes.plot([], [], color=STREAM_COLOR, linewidth=STREAM_LINE_WIDTH, zorder=STREAM_ZORDER)
+            self.mean_line, = self.axes.plot([], [], color=TEST_AVERAGE_COLOR)
+            self.band = None
+
+            for spine in self.axes.spines.values():
+                spine.set_visible(False)
+
+            self.axes.set_xlabel(TREND_X_LABEL)
+
+    def render(self, save_path, figure_extension: str, x, y, y_mean, y_low, y_high, y_label: str, title: str,
+               legend_entries: list, dpi: float=None) -> None:
+
+        with import_matplotlib().rc_context(SEABORN_PAPER_RC):
+            self.run_line.set_data(x, y)
+            self.mean_line.set_data(x, y_mean)
+
+            # the band is redrawn at every plot, since its polygon cannot be updated in place
+            if self.band is not None:
+                self.band.remove()
+            self.band = self.axes.fill_between(x, y_low, y_high, color=TEST_AVERAGE_COLOR, alpha=TREND_BAND_ALPHA,
+                linewidth=0)
+
+            self.axes.relim()
+            self.axes.autoscale_view()
+
+            self.axes.set_ylabel(y_label)
+            self.axes.set_title(title if title else '')
+            self.axes.legend([self.run_line, self.mean_line, self.band], legend_entries)
+
+            save_figure(self.figure, save_path, figure_extension, dpi)
+
+
+# save figure in the given format. Dpi defaults to the one of the figure
+def save_figure(figure, save_path, figure_extension: str, dpi: float=None) -> None:
+
+    save_kwargs = dict()
+    if dpi:
+        save_kwargs['dpi'] = dpi
+
+    if figure_extension == FigureFormats.SVG.value:
+        # drop the creation date, which changes at every run
+        with import_matplotlib().rc_context(SVG_RC):
+            figure.savefig(save_path, format=figure_extension, metadata={'Date': None}, **save_kwargs)
+    elif figure_extension == FigureFormats.WEBP.value:
+        figure.savefig(save_path, format=figure_extension, pil_kwargs=WEBP_PIL_KWARGS, **save_kwargs)
+    else:
+        figure.savefig(save_path, format=figure_extension, **save_kwargs)
+
+
+line_figure = None
+
+
+def get_line_figure() -> LineFigure:
+    global line_figure
+
+    if line_figure is None:
+        line_figure = LineFigure()
+
+    return line_figure
+
+
+def render_seaborn(save_path, figure_extension: str, x, y, y_label: str, test_avg: float,
+                   history_avg: float, top_margin: float, title: str, stream_series=None, dpi: float=None) -> None:
+
+    import_matplotlib()
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set_theme()
+    sns.set_context("paper")
+
+    plt.subplot(1, 1, 1)
+    sns.lineplot(x=x, y=y)
+    plt.axhline(y=test_avg, color='b', linestyle='--')
+    sns.despine(top=True, right=True, left=True, bottom=True)
+    legend_entries = ['Test', '_Hidden', 'Test Average']
+
+    # plot test history average, if passed
+    if history_avg is not None and not math.isnan(history_avg):
+        plt.axhline(y=history_avg, color='r', linestyle='--')
+        legend_entries.append('Test History Average')
+
+    plt.xlabel(X_LABEL)
+    plt.ylabel(y_label)
+
+    if stream_series is not None and len(stream_series[1]):
+        # individual streams are drawn below the test line, and added to the legend after it
+        legend_handles = plt.gca().get_lines()
+        for s_x, s_y in zip(*stream_series):
+            stream_line, = plt.plot(s_x, s_y, color=STREAM_COLOR, linewidth=STREAM_LINE_WIDTH, zorder=STREAM_ZORDER)
+        plt.legend([legend_handles[0], stream_line] + legend_handles[1:], ['Test', 'Streams'] + legend_entries[2:])
+    else:
+        plt.legend(legend_entries)
+    plt.ylim(top=top_margin, bottom=-0.01)
+
+    if title:
+        plt.title(title)
+
+    save_figure(plt.gcf(), save_path, figure_extension, dpi)
+    plt.clf()
+
+
+trend_figure = None
+
+
+def get_trend_figure() -> TrendFigure:
+    global trend_figure
+
+    if trend_figure is None:
+        trend_figure = TrendFigure()
+
+    return trend_figure
+
+
+# draw line plot of a metric together with its average and history average, and save it to save_path
+# stream_series optionally holds the (streams, intervals) arrays of the individual streams, drawn on the same chart
+def render_line_figure(save_path, figure_extension: str, x, y, y_label: str, test_avg: float,
+                       history_avg: float, top_margin: float, title: str=None,
+                       backend: str=PlotBackends.SEABORN.value, stream_series=None, dpi: float=None) -> None:
+
+    if backend == PlotBackends.MATPLOTLIB.value:
+        get_line_figure().render(save_path, figure_extension, x, y, y_label, test_avg, history_avg, top_margin, title,
+            stream_series, dpi)
+    else:
+        render_seaborn(save_path, figure_extension, x, y, y_label, test_avg, history_avg, top_margin, title,
+            stream_series, dpi)
+
+
+# reduce png figures to a palette of at most colors colors. Charts only use a few colors besides the
+# antialiasing shades, so this is barely visible. Fast octree quantization is several times faster than the
+# other methods, and the optimize pass of Pillow is skipped since it costs more than the quantization for a few bytes
+def quantize_png(figure_bytes: bytes, colors: int) -> bytes:
+    from PIL import Image
+
+    with Image.open(BytesIO(figure_bytes)) as image:
+        quantized_image = image.quantize(colors=colors, method=Image.Quantize.FASTOCTREE)
+
+    output = BytesIO()
+    quantized_image.save(output, format='png')
+    return output.getvalue()
+
+
+# encode figure as an image embedded in the html page, or write it in assets_dir and reference it, if passed.
+# Png figures are quantized if colors is passed
+def embed_figure(figure_bytes: bytes, figure_extension: str, colors: int=None, assets_dir: str=None) -> str:
+
+    if colors and figure_extension == FigureFormats.PNG.value:
+        figure_bytes = quantize_png(figure_bytes, colors)
+
+    if assets_dir:
+        return write_figure_asset(figure_bytes, figure_extension, assets_dir)
+
+    encoded_figure = base64.b64encode(figure_bytes).decode('utf-8')
+    return '<img src=\'data:{};base64,{}\'>'.format(FIGURE_MIME_TYPES[figure_extension], encoded_figure)
+
+
+def round_chart_value(value: float):
+    if value is None or math.isnan(value):
+        return None
+    return float('{:.{}g}'.format(value, CHART_DATA_DIGITS))
+
+
+# embed data series of a line chart as json, to be drawn client side by the script in the html template
+def embed_line_chart(x, y, y_label: str, test_avg: float, history_avg: float, top_margin: float,
+                     stream_series=None) -> str:
+
+    chart_data = {'x': [round_chart_value(el) for el in x.tolist()],
+                  'y': [round_chart_value(el) for el in y.tolist()],
+                  'label': y_label,
+                  'mean': round_chart_value(test_avg),
+                  'history': round_chart_value(history_avg),
+                  'top': round_chart_value(top_margin)}
+
+    # individual streams are drawn against the x values of the aggregate
+    if stream_series is not None and len(stream_series[1]):
+        chart_data['streams'] = [[round_chart_value(el) for el in s_y] for s_y in stream_series[1].tolist()]
+
+    # escape closing tags so that the json cannot end the script element
+    chart_json = json.dumps(chart_data, separators=(',', ':')).replace('</', '<\\/')
+
+    return '<div class="oai-chart"><script type="application/json">{}</script></div>'.format(chart_json)
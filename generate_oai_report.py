@@ -1,15 +1,31 @@
 import argparse
-import fnmatch
 import logging
 import os
 import re
 
-from constants import ProcessingConstants
-from html_report_utils import process_test_results
+from constants import ChartModes, DecimationModes, FigureFormats, FigureStorageModes, HistoryBackends, PageAssemblyModes, PlotBackends, ProcessingConstants, ProfileHooks, ReportOptions, StreamModes
+from pipeline_profile import get_file_size, profile_stage, start_profile_hook, start_stage_profile, stop_profile_hook, \
+    stop_stage_profile, write_stage_profile
 from process_payload import get_oai_git_commit, get_srn_number
+from results_scanner import scan_results_directory
 
 
-def get_args():
+# number of colors of the palette of quantized figures, a png palette has at most 256 colors
+def get_figure_colors(value: str) -> int:
+
+    try:
+        figure_colors = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid int value: {}'.format(value))
+
+    if not ProcessingConstants.FIGURE_MIN_COLORS.value <= figure_colors <= ProcessingConstants.FIGURE_MAX_COLORS.value:
+        raise argparse.ArgumentTypeError('must be between {} and {}'.format(ProcessingConstants.FIGURE_MIN_COLORS.value,
+            ProcessingConstants.FIGURE_MAX_COLORS.value))
+
+    return figure_colors
+
+
+def get_args(argv: list=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--jenkins_job_url', type=str, default='', help='URL of Jenkins pipeline')
     parser.add_argument('--job_id_awx', type=str, default='n/a', help='Job ID of AWX process')
@@ -19,7 +35,53 @@ def get_args():
         default='https://gitlab.eurecom.fr/oai/openairinterface5g.git', help='URL of the tested OAI repository')
     parser.add_argument('--results_dir', type=str, required=True, help='Main batch job directory')
     parser.add_argument('--history_dir', type=str, help='Directory with test history data')
-    return parser.parse_args()
+    parser.add_argument('--cache_dir', type=str, help='Directory in which rendered reports are cached across runs')
+    parser.add_argument('--cache_max_mb', type=int, default=ProcessingConstants.REPORT_CACHE_MAX_MB.value,
+        help='Maximum size of the cache of rendered reports in MB')
+    parser.add_argument('--chart_mode', type=str, default=ChartModes.IMAGE.value,
+        choices=[x.value for x in ChartModes], help='Embed figures as images or draw them in the browser')
+    parser.add_argument('--commit_head_bytes', type=int, default=ProcessingConstants.OAI_COMMIT_HEAD_BYTES.value,
+        help='Number of bytes at the beginning of OAI logs in which the git commit is searched')
+    parser.add_argument('--commit_full_scan', action='store_true',
+        help='Search the git commit in the whole OAI logs if it is not found at their beginning')
+    parser.add_argument('--max_plot_points', type=int, default=ProcessingConstants.PLOT_MAX_POINTS.value,
+        help='Maximum number of points drawn per time series, longer series are decimated')
+    parser.add_argument('--max_stalled_intervals', type=int,
+        help='Fail tests with more intervals without throughput than this')
+    parser.add_argument('--decimation', type=str, default=DecimationModes.LTTB.value,
+        choices=[x.value for x in DecimationModes], help='Downsampling of long time series before drawing them')
+    parser.add_argument('--figure_colors', type=get_figure_colors,
+        help='Reduce png figures to a palette of this many colors, from 2 to 256, e.g., 64')
+    parser.add_argument('--figure_dpi', type=float, help='Resolution of the figures, 100 dpi if not passed')
+    parser.add_argument('--figure_format', type=str, default=FigureFormats.PNG.value,
+        choices=[x.value for x in FigureFormats], help='Format of the figures embedded in the report')
+    parser.add_argument('--figure_storage', type=str, default=FigureStorageModes.EMBEDDED.value,
+        choices=[x.value for x in FigureStorageModes],
+        help='Embed figures in the report, or write them in a figures directory next to it')
+    parser.add_argument('--history_backend', type=str, default=HistoryBackends.SQLITE.value,
+        choices=[x.value for x in HistoryBackends], help='Storage of the test history data')
+    parser.add_argument('--page_assembly', type=str, default=PageAssemblyModes.MEMORY.value,
+        choices=[x.value for x in PageAssemblyModes],
+        help='Assemble the report page in memory, or stream result tables to it as they are built to bound memory usage')
+    parser.add_argument('--plot_backend', type=str, default=PlotBackends.SEABORN.value,
+        choices=[x.value for x in PlotBackends], help='Backend used to draw the report figures')
+    parser.add_argument('--profile', action='store_true',
+        help='Write time, CPU time, memory and bytes of each stage of the report generation next to the report')
+    parser.add_argument('--profile_hook', type=str, choices=[x.value for x in ProfileHooks],
+        help='Also profile the report generation with cProfile, or trace its memory allocations with tracemalloc')
+    parser.add_argument('--rtt_p95_threshold', type=float,
+        help='Fail tests whose round-trip time P95 is above this fraction of its history average, e.g., 1.5')
+    parser.add_argument('--scan_manifest', type=str,
+        help='File in which the content of the results directory is cached to speed up following scans')
+    parser.add_argument('--stream_mode', type=str, default=StreamModes.PER_STREAM.value,
+        choices=[x.value for x in StreamModes],
+        help='Report each stream of multi-stream tests, their aggregate, or their aggregate drawn over the single streams')
+    parser.add_argument('--stream_workers', type=int, default=1,
+        help='Number of worker processes rendering the charts of the streams of a test, in per_stream mode')
+    parser.add_argument('--throughput_p5_threshold', type=float,
+        help='Fail tests whose throughput P5 is below this fraction of the target transmit rate, e.g., 0.5')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes used to process the test reports')
+    return parser.parse_args(argv)
 
 
 def set_logger(filename: str) -> None:
@@ -33,37 +95,6 @@ def set_logger(filename: str) -> None:
     logging.getLogger('').addHandler(console)
 
 
-def find_all(name, path):
-    result = []
-    for root, _, files in os.walk(path):
-        if name in files:
-            result.append(os.path.join(root, name))
-    return result
-
-
-def find_pattern(pattern, path):
-    result = []
-    for root, _, files in os.walk(path):
-        for name in files:
-            if fnmatch.fnmatch(name, pattern):
-                result.append(os.path.join(root, name))
-    return result
-
-
-# look for ue log file to determine directories that should have user reports
-def find_ue_directories(results_dir: str) -> list:
-    ue_dir = find_all(ProcessingConstants.OAI_UE_LOG_FILE.value, results_dir)
-    ue_dir = set(os.path.dirname(x) for x in ue_dir)
-    return list(ue_dir)
-
-
-# look for gnb log file to determine gnb directory
-def find_gnb_directory(results_dir: str) -> list:
-    gnb_dir = find_all(ProcessingConstants.OAI_GNB_LOG_FILE.value, results_dir)
-    gnb_dir = set(os.path.dirname(x) for x in gnb_dir)
-    return list(gnb_dir)
-
-
 # convert git url from ssh to https
 def convert_url(git_ssh_url: str) -> str:
 
@@ -93,42 +124,109 @@ def convert_url(git_ssh_url: str) -> str:
     return git_https_url_cleaned
 
 
-def main() -> None:
+def get_report_options(args) -> dict:
+    return {ReportOptions.CACHE_DIR.value: args.cache_dir,
+            ReportOptions.CACHE_MAX_MB.value: args.cache_max_mb,
+            ReportOptions.CHART_MODE.value: args.chart_mode,
+            ReportOptions.COMMIT_FULL_SCAN.value: args.commit_full_scan,
+            ReportOptions.COMMIT_HEAD_BYTES.value: args.commit_head_bytes,
+            ReportOptions.DECIMATION.value: args.decimation,
+            ReportOptions.FIGURE_COLORS.value: args.figure_colors,
+            ReportOptions.FIGURE_DPI.value: args.figure_dpi,
+            ReportOptions.FIGURE_FORMAT.value: args.figure_format,
+            ReportOptions.FIGURE_STORAGE.value: args.figure_storage,
+            ReportOptions.HISTORY_BACKEND.value: args.history_backend,
+            ReportOptions.MAX_PLOT_POINTS.value: args.max_plot_points,
+            ReportOptions.MAX_STALLED_INTERVALS.value: args.max_stalled_intervals,
+            ReportOptions.PAGE_ASSEMBLY.value: args.page_assembly,
+            ReportOptions.PLOT_BACKEND.value: args.plot_backend,
+            ReportOptions.RTT_P95_THRESHOLD.value: args.rtt_p95_threshold,
+            ReportOptions.STREAM_MODE.value: args.stream_mode,
+            ReportOptions.STREAM_WORKERS.value: args.stream_workers,
+            ReportOptions.THROUGHPUT_P5_THRESHOLD.value: args.throughput_p5_threshold,
+            ReportOptions.WORKERS.value: args.workers}
+
+
+# generate the report of a results directory. Results of a previous scan of the directory can be passed
+# to avoid scanning it again, and reports are rendered through the executor if one is passed, together with
+# its number of workers. If requested, the stages of the report generation are profiled, and the profile is written next to the report.
+# Returns False if the report could not be generated
+def generate_report(args, executor=None, scan_results: tuple=None, executor_workers: int=1) -> bool:
+
+    if args.profile:
+        start_stage_profile()
+    profiler = start_profile_hook(args.profile_hook)
 
-    # set logger
-    log_filename = os.path.basename(__file__).replace('.py', '.log')
-    set_logger(log_filename)
+    try:
+        with profile_stage('report'):
+            report_generated = generate_report_page(args, executor, scan_results, executor_workers)
+    finally:
+        stop_profile_hook(args.profile_hook, profiler, args.results_dir)
+        stage_records = stop_stage_profile()
 
-    args = get_args()
+    if args.profile and os.path.isdir(args.results_dir):
+        write_stage_profile(stage_records, args.results_dir)
+
+    return report_generated
+
+
+def generate_report_page(args, executor=None, scan_results: tuple=None, executor_workers: int=1) -> bool:
+
+    # find gnb and ue directories, and the reports of each ue, in a single pass over the results directory
+    if scan_results is None:
+        with profile_stage('discovery'):
+            scan_results = scan_results_directory(args.results_dir, args.scan_manifest)
+    gnb_dir, ue_dir, ue_json_reports = scan_results
 
-    # there should only be a single element returned in this set
+    # there should only be a single gnb directory
     try:
-        gnb_dir = find_gnb_directory(args.results_dir)[0]
+        gnb_dir = gnb_dir[0]
     except IndexError:
-        logging.error('No valid gNB log file found. Exiting')
-        return
+        logging.error('No valid gNB log file found in {}. Exiting'.format(args.results_dir))
+        return False
 
     if gnb_dir:
-        gnb_commit_info, git_commit_hash = get_oai_git_commit(gnb_dir, ProcessingConstants.OAI_GNB_LOG_FILE.value)
+        with profile_stage('log_scan', bytes_in=get_file_size(gnb_dir, ProcessingConstants.OAI_GNB_LOG_FILE.value)):
+            gnb_commit_info, git_commit_hash = get_oai_git_commit(gnb_dir, ProcessingConstants.OAI_GNB_LOG_FILE.value,
+                args.commit_head_bytes, args.commit_full_scan)
         gnb_srn_number = get_srn_number(gnb_dir)
     else:
         gnb_commit_info = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
         git_commit_hash = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
         gnb_srn_number = ProcessingConstants.SRN_NUMBER_NOT_FOUND_DEFAULT.value
 
-    ue_dir = find_ue_directories(args.results_dir)
-
     ue_reports = dict()
     ue_directories = dict()
     for d_idx, d_val in enumerate(ue_dir):
-        ue_reports[d_idx] = find_pattern(ProcessingConstants.UE_JSON_PATTERN.value, d_val)
+        ue_reports[d_idx] = ue_json_reports[d_val]
         ue_directories[d_idx] = d_val
 
     # convert url
     git_repo_url = convert_url(args.oai_repo_url)
 
+    # imported here, so that argument parsing and early exits do not pay for loading the processing modules
+    from html_report_utils import process_test_results
+
+    # reports rendered by a shared executor are dispatched according to its workers, not to those of the job
+    report_options = get_report_options(args)
+    if executor is not None:
+        report_options[ReportOptions.WORKERS.value] = executor_workers
+
     process_test_results(ue_reports, ue_directories, args.results_dir, args.history_dir, gnb_commit_info, git_commit_hash,
-        gnb_srn_number, args.job_id_awx, args.job_id_jenkins, args.job_start_time, git_repo_url, args.jenkins_job_url)
+        gnb_srn_number, args.job_id_awx, args.job_id_jenkins, args.job_start_time, git_repo_url, args.jenkins_job_url,
+        report_options, executor)
+
+    return True
+
+
+def main() -> None:
+
+    # set logger
+    log_filename = os.path.basename(__file__).replace('.py', '.log')
+    set_logger(log_filename)
+
+    args = get_args()
+    generate_report(args)
 
 
 if __name__ == '__main__':
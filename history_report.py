@@ -0,0 +1,225 @@
+import argparse
+from datetime import datetime, timezone
+import glob
+from io import BytesIO
+import logging
+import os
+
+from constants import DataframeColumns, DecimationModes, FigureFormats, HistoryBackends, HtmlColors, HtmlTemplateKeywords, \
+    ProcessingConstants, TestResultKeys
+from generate_oai_report import get_figure_colors
+from history_store import get_history_keys
+from page_template import HISTORY_TEMPLATE_FILE, HISTORY_TEMPLATE_SLOTS, get_page_template, render_template
+
+HISTORY_REPORT_FILE = 'history_report.html'
+
+# number of runs of the rolling statistics, and percentiles of the band drawn around the rolling mean
+TREND_WINDOW = 20
+TREND_BAND_PERCENTILES = (5, 95)
+
+
+def get_args(argv: list=None):
+    parser = argparse.ArgumentParser(description='Generate a page with the trends of the test results stored in the test history')
+    parser.add_argument('--history_dir', type=str, required=True, help='Directory with test history data')
+    parser.add_argument('--output', type=str, help='HTML page to write, {} in the history directory if not passed'.format(
+        HISTORY_REPORT_FILE))
+    parser.add_argument('--decimation', type=str, default=DecimationModes.LTTB.value,
+        choices=[x.value for x in DecimationModes], help='Downsampling of long histories before drawing them')
+    parser.add_argument('--figure_colors', type=get_figure_colors,
+        help='Reduce png figures to a palette of this many colors, from 2 to 256, e.g., 64')
+    parser.add_argument('--figure_dpi', type=float, help='Resolution of the figures, 100 dpi if not passed')
+    parser.add_argument('--figure_format', type=str, default=FigureFormats.PNG.value,
+        choices=[x.value for x in FigureFormats], help='Format of the figures embedded in the page')
+    parser.add_argument('--history_backend', type=str, default=HistoryBackends.SQLITE.value,
+        choices=[x.value for x in HistoryBackends], help='Storage of the test history data')
+    parser.add_argument('--max_plot_points', type=int, default=ProcessingConstants.PLOT_MAX_POINTS.value,
+        help='Maximum number of runs drawn per chart, longer histories are decimated')
+    parser.add_argument('--window', type=int, default=TREND_WINDOW,
+        help='Number of runs of the rolling mean and percentiles')
+    return parser.parse_args(argv)
+
+
+# test types stored in the history directory, as (protocol, direction, history file). Legacy pickle files are
+# also listed with the sqlite backend, since they are read until they are migrated to the database
+def get_history_test_types(history_dir: str, history_backend: str) -> list:
+
+    history_keys = set([os.path.splitext(os.path.basename(x))[0] for x in
+        glob.glob(os.path.join(history_dir, '{}_*.pkl'.format(TestResultKeys.TEST_HISTORY.value)))])
+
+    if history_backend == HistoryBackends.SQLITE.value:
+        history_keys.update(get_history_keys(os.path.join(history_dir, ProcessingConstants.HISTORY_DATABASE_FILE.value)))
+
+    # keys are in the form test_mean_history_tcp_downlink
+    test_types = []
+    for el in sorted(history_keys):
+        test_type = el.replace('{}_'.format(TestResultKeys.TEST_HISTORY.value), '', 1).split('_')
+        if len(test_type) != 2:
+            logging.warning('Unknown test type of history {}. Skipping it'.format(el))
+            continue
+
+        test_protocol, test_direction = test_type
+        test_types.append((test_protocol, test_direction.capitalize(), os.path.join(history_dir, '{}.pkl'.format(el))))
+
+    return test_types
+
+
+# rolling mean and percentiles of the metrics of each run, separately for each target rate.
+# Statistics of all the metrics of a target rate are computed together, on the columns of its dataframe.
+# Runs are numbered by their position in the whole history, so that runs of different target rates are comparable
+def compute_history_trends(df_history, metrics: list, window: int) -> dict:
+    import pandas as pd
+
+    df_metrics = df_history[metrics].apply(pd.to_numeric, errors='coerce')
+    df_metrics.index = df_metrics.index + 1
+    target_rates = pd.to_numeric(df_history[DataframeColumns.TX_RATE.value], errors='coerce').to_numpy()
+
+    history_trends = dict()
+    for target_rate, df_rate in df_metrics.groupby(target_rates, sort=True):
+        df_rolling = df_rate.rolling(window, min_periods=1)
+        history_trends[target_rate] = {'runs': df_rate,
+                                       'mean': df_rolling.mean(),
+                                       'low': df_rolling.quantile(TREND_BAND_PERCENTILES[0] / 100),
+                                       'high': df_rolling.quantile(TREND_BAND_PERCENTILES[1] / 100)}
+
+    return history_trends
+
+
+# change of the rolling mean from the first full window of runs to the last one, in percent
+def get_trend_change(rolling_mean, window: int) -> float:
+    import numpy as np
+
+    valid_mean = rolling_mean[~np.isnan(rolling_mean)]
+    if len(valid_mean) < 2:
+        return float('nan')
+
+    first_mean = valid_mean[min(window, len(valid_mean)) - 1]
+    if first_mean == 0:
+        return float('nan')
+
+    return (valid_mean[-1] / first_mean - 1) * 100
+
+
+def get_target_rate_label(target_rate: float) -> str:
+
+    if target_rate == 0:
+        return '{} unlimited'.format(DataframeColumns.TX_RATE.value.capitalize())
+
+    return '{} {:g}'.format(DataframeColumns.TX_RATE.value.capitalize(), target_rate)
+
+
+# draw the trend of a metric, decimating long histories, and embed it in the page
+def render_trend_figure(x, y, y_mean, y_low, y_high, metric: str, window: int, args) -> str:
+    from figure_renderer import embed_figure, get_trend_figure
+    from series_decimation import get_decimation_index
+
+    decimation_idx = get_decimation_index(x, y, args.decimation, args.max_plot_points)
+    if decimation_idx is not None:
+        x, y, y_mean, y_low, y_high = [el[decimation_idx] for el in [x, y, y_mean, y_low, y_high]]
+
+    legend_entries = ['Run', 'Rolling Mean ({} runs)'.format(window),
+                      'Rolling P{}-P{}'.format(*TREND_BAND_PERCENTILES)]
+
+    save_path = BytesIO()
+    get_trend_figure().render(save_path, args.figure_format, x, y, y_mean, y_low, y_high, metric, None, legend_entries,
+        args.figure_dpi)
+
+    return embed_figure(save_path.getvalue(), args.figure_format, args.figure_colors)
+
+
+# table with a row per target rate and metric of a test type, with the latest statistics and the trend figure
+def generate_trend_table(test_protocol: str, test_direction: str, history_trends: dict, metrics: list, args) -> str:
+    import numpy as np
+
+    from html_report_utils import format_html_table_value, html_table_cell
+
+    columns = [DataframeColumns.TX_RATE.value, DataframeColumns.METRIC.value, 'Runs', 'Last',
+               'Rolling Mean', 'Change [%]', DataframeColumns.FIGURE.value]
+
+    html_lines = ['<h3>{} {}</h3>'.format(test_protocol.upper(), test_direction)]
+    html_lines.append('<table border="1" class="table">')
+    html_lines.append('  <thead>')
+    html_lines.append('    <tr style="text-align: right;">')
+    html_lines += ['      <th style="text-align: center;">{}</th>'.format(x) for x in columns]
+    html_lines.append('    </tr>')
+    html_lines.append('  </thead>')
+    html_lines.append('  <tbody>')
+
+    for t_key, t_val in history_trends.items():
+        x = t_val['runs'].index.to_numpy(dtype=float)
+        for el in metrics:
+            y = t_val['runs'][el].to_numpy(dtype=float)
+            y_mean = t_val['mean'][el].to_numpy(dtype=float)
+            valid_runs = y[~np.isnan(y)]
+            if len(valid_runs) <= 0:
+                continue
+
+            html_figure = render_trend_figure(x, y, y_mean, t_val['low'][el].to_numpy(dtype=float),
+                t_val['high'][el].to_numpy(dtype=float), el, args.window, args)
+
+            html_lines.append('    <tr>')
+            html_lines.append(html_table_cell(get_target_rate_label(t_key),
+                ' bgcolor = "{}"'.format(HtmlColors.UE_SINGLE_TEST_PASSED.value)))
+            html_lines.append(html_table_cell(el))
+            html_lines.append(html_table_cell(len(valid_runs)))
+            html_lines += [html_table_cell(format_html_table_value(x)) for x in
+                           [valid_runs[-1], y_mean[-1], get_trend_change(y_mean, args.window)]]
+            html_lines.append(html_table_cell(html_figure))
+            html_lines.append('    </tr>')
+
+    html_lines.append('  </tbody>')
+    html_lines.append('</table>')
+
+    return '\n'.join(html_lines)
+
+
+# generate the trend page of all the test types in the history directory, and write it to output_file
+def generate_history_report(args) -> str:
+    from html_report_utils import HTML_TABLE_SEPARATOR, load_test_history_data, split_history_column
+
+    output_file = args.output if args.output else os.path.join(args.history_dir, HISTORY_REPORT_FILE)
+
+    html_tables = []
+    for test_protocol, test_direction, test_history_file in get_history_test_types(args.history_dir, args.history_backend):
+        df_history = load_test_history_data(test_history_file, test_protocol, test_direction, args.history_backend)
+        if len(df_history.index) <= 0 or DataframeColumns.TX_RATE.value not in df_history.columns:
+            continue
+
+        logging.info('Computing trends of {} test history entries of {} {}'.format(len(df_history.index),
+            test_protocol, test_direction))
+
+        # trends of the mean of each metric, the band of the rolling percentiles shows their spread across runs
+        metrics = [x for x in df_history.columns if x not in [DataframeColumns.PROTOCOL.value, DataframeColumns.TX_RATE.value]
+                   and split_history_column(x)[1] == DataframeColumns.MEAN.value]
+        history_trends = compute_history_trends(df_history, metrics, args.window)
+
+        html_tables.append(generate_trend_table(test_protocol, test_direction, history_trends, metrics, args))
+
+    if not html_tables:
+        logging.warning('No test history found in {}'.format(args.history_dir))
+
+    slot_values = {HtmlTemplateKeywords.HISTORY_DIR.value: os.path.abspath(args.history_dir),
+                   HtmlTemplateKeywords.HISTORY_REPORT_TIME.value: datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+                   HtmlTemplateKeywords.HISTORY_TRENDS.value: HTML_TABLE_SEPARATOR.join(html_tables),
+                   HtmlTemplateKeywords.HISTORY_WINDOW.value: '{} runs'.format(args.window)}
+
+    html_page = render_template(get_page_template(HISTORY_TEMPLATE_FILE, HISTORY_TEMPLATE_SLOTS), slot_values)
+
+    # write to temporary file first, so that the page is replaced atomically
+    output_file_tmp = '{}.{}.tmp'.format(output_file, os.getpid())
+    with open(output_file_tmp, 'w') as f:
+        f.write(html_page)
+    os.replace(output_file_tmp, output_file)
+
+    logging.info('Test history report written to {}'.format(output_file))
+    return output_file
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)-15s %(levelname)-8s %(message)s')
+
+    args = get_args()
+    generate_history_report(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+import argparse
+from datetime import datetime, timezone
+import glob
+import logging
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+from constants import DataframeColumns, HistorySummaryKeys, ProcessingConstants, TestResultKeys
+
+# seconds to wait for concurrent jobs writing to the same history database
+HISTORY_DATABASE_TIMEOUT = 60
+
+HISTORY_TABLE = 'test_history'
+HISTORY_KEY_COLUMN = 'history_key'
+MIGRATION_TABLE = 'migrated_history_files'
+
+SQLITE_HEADER_BYTES = 100
+SQLITE_CHANGE_COUNTER_OFFSET = 24
+
+
+def quote_column(column: str) -> str:
+    return '"{}"'.format(column.replace('"', '""'))
+
+
+# history of all protocols and directions is stored in a single database in the history directory,
+# and the name of the legacy pickle file is used as key of the history of each test type
+def get_history_database(test_history_file: str) -> str:
+    return os.path.join(os.path.dirname(test_history_file), ProcessingConstants.HISTORY_DATABASE_FILE.value)
+
+
+def get_history_key(test_history_file: str) -> str:
+    return os.path.splitext(os.path.basename(test_history_file))[0]
+
+
+def connect_history_database(database_file: str):
+
+    # autocommit mode, transactions are explicitly opened before writing
+    connection = sqlite3.connect(database_file, timeout=HISTORY_DATABASE_TIMEOUT, isolation_level=None)
+    connection.execute('CREATE TABLE IF NOT EXISTS {} (id INTEGER PRIMARY KEY AUTOINCREMENT, {} TEXT NOT NULL)'.format(
+        HISTORY_TABLE, HISTORY_KEY_COLUMN))
+    connection.execute('CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1}, id)'.format(HISTORY_TABLE, HISTORY_KEY_COLUMN))
+    connection.execute('CREATE TABLE IF NOT EXISTS {} (history_key TEXT PRIMARY KEY, source TEXT, rows INTEGER, migrated_at TEXT)'.format(
+        MIGRATION_TABLE))
+
+    return connection
+
+
+# read-only connection, which neither creates the database nor its tables, so that the history can be read
+# from directories that are read-only or shared with jobs writing to it
+def connect_history_database_readonly(database_file: str):
+    return sqlite3.connect('file:{}?mode=ro'.format(pathname2url(os.path.abspath(database_file))), uri=True,
+        timeout=HISTORY_DATABASE_TIMEOUT, isolation_level=None)
+
+
+def has_history_table(connection, table: str) -> bool:
+    return connection.execute('SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?', ('table', table)).fetchone() is not None
+
+
+# change counter in the header of the database file, incremented by every committed write transaction.
+# Unlike the modification time of the file, it changes even for writes close in time
+def get_database_change_counter(database_file: str) -> int:
+    with open(database_file, 'rb') as f:
+        header = f.read(SQLITE_HEADER_BYTES)
+
+    if len(header) < SQLITE_HEADER_BYTES:
+        return 0
+    return int.from_bytes(header[SQLITE_CHANGE_COUNTER_OFFSET:SQLITE_CHANGE_COUNTER_OFFSET + 4], 'big')
+
+
+def get_history_columns(connection) -> list:
+    return [x[1] for x in connection.execute('PRAGMA table_info({})'.format(HISTORY_TABLE))]
+
+
+# add columns of the history header that are not in the database yet. Must be called within a write transaction
+def add_history_columns(connection, header: list) -> None:
+
+    history_columns = get_history_columns(connection)
+    for el in header:
+        if el in history_columns:
+            continue
+
+        column_type = 'TEXT' if el == DataframeColumns.PROTOCOL.value else 'REAL'
+        connection.execute('ALTER TABLE {} ADD COLUMN {} {}'.format(HISTORY_TABLE, quote_column(el), column_type))
+        history_columns.append(el)
+
+
+def insert_history_rows(connection, history_key: str, header: list, rows: list) -> None:
+
+    add_history_columns(connection, header)
+
+    columns = ', '.join([HISTORY_KEY_COLUMN] + [quote_column(x) for x in header])
+    values = ', '.join(['?'] * (len(header) + 1))
+    query = 'INSERT INTO {} ({}) VALUES ({})'.format(HISTORY_TABLE, columns, values)
+
+    connection.executemany(query, [[history_key] + [x if isinstance(x, str) else float(x) for x in row] for row in rows])
+
+
+# import the legacy pickle file of a test type, if it was not imported yet
+def migrate_pickle_history(connection, test_history_file: str) -> int:
+    import pandas as pd
+
+    history_key = get_history_key(test_history_file)
+
+    if not os.path.exists(test_history_file):
+        return 0
+
+    is_migrated = connection.execute('SELECT 1 FROM {} WHERE history_key = ?'.format(MIGRATION_TABLE), (history_key,)).fetchone()
+    if is_migrated:
+        return 0
+
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        # check again now that we hold the write lock, another job might have migrated the file meanwhile
+        is_migrated = connection.execute('SELECT 1 FROM {} WHERE history_key = ?'.format(MIGRATION_TABLE), (history_key,)).fetchone()
+        if is_migrated:
+            connection.execute('COMMIT')
+            return 0
+
+        logging.info('Migrating test history file {} to {}'.format(test_history_file, get_history_database(test_history_file)))
+        df_history = pd.read_pickle(test_history_file)
+        header = [str(x) for x in df_history.columns]
+        insert_history_rows(connection, history_key, header, df_history.itertuples(index=False, name=None))
+
+        connection.execute('INSERT INTO {} (history_key, source, rows, migrated_at) VALUES (?, ?, ?, ?)'.format(MIGRATION_TABLE),
+            (history_key, os.path.abspath(test_history_file), len(df_history.index), datetime.now(timezone.utc).isoformat()))
+        connection.execute('COMMIT')
+    except Exception:
+        connection.execute('ROLLBACK')
+        raise
+
+    logging.info('Migrated {} test history entries'.format(len(df_history.index)))
+    return len(df_history.index)
+
+
+# keys of the test types with entries in the history database, e.g., test_mean_history_tcp_downlink
+def get_history_keys(database_file: str) -> list:
+
+    if not os.path.exists(database_file):
+        return []
+
+    connection = connect_history_database_readonly(database_file)
+    try:
+        if not has_history_table(connection, HISTORY_TABLE):
+            return []
+
+        history_keys = connection.execute('SELECT DISTINCT {0} FROM {1} ORDER BY {0}'.format(
+            HISTORY_KEY_COLUMN, HISTORY_TABLE)).fetchall()
+    finally:
+        connection.close()
+
+    return [x[0] for x in history_keys]
+
+
+# legacy pickle file of a test type, with the columns of header. Columns it does not have are returned empty
+def load_pickle_history(test_history_file: str, header: list):
+    import pandas as pd
+
+    df_history = pd.read_pickle(test_history_file)
+    return convert_history_columns(df_history.reindex(columns=header).reset_index(drop=True))
+
+
+# metric columns are numeric, whether they are read from the database or from a pickle file
+def convert_history_columns(df_history):
+    import pandas as pd
+
+    for el in df_history.columns:
+        if el != DataframeColumns.PROTOCOL.value:
+            df_history[el] = pd.to_numeric(df_history[el])
+
+    return df_history
+
+
+# read the history of a test type without writing to the database. Legacy pickle files that were not migrated
+# yet are read directly, they are migrated the first time a result of their test type is appended
+def load_history(test_history_file: str, header: list):
+    import pandas as pd
+
+    database_file = get_history_database(test_history_file)
+    history_key = get_history_key(test_history_file)
+
+    if not os.path.exists(database_file):
+        if os.path.exists(test_history_file):
+            return load_pickle_history(test_history_file, header)
+        return pd.DataFrame(columns=header)
+
+    connection = connect_history_database_readonly(database_file)
+    try:
+        is_migrated = has_history_table(connection, MIGRATION_TABLE) and connection.execute(
+            'SELECT 1 FROM {} WHERE history_key = ?'.format(MIGRATION_TABLE), (history_key,)).fetchone() is not None
+        if not is_migrated and os.path.exists(test_history_file):
+            return load_pickle_history(test_history_file, header)
+
+        if not has_history_table(connection, HISTORY_TABLE):
+            return pd.DataFrame(columns=header)
+
+        # columns not stored yet are returned empty
+        history_columns = get_history_columns(connection)
+        selected_columns = ', '.join([quote_column(x) if x in history_columns else 'NULL' for x in header])
+        rows = connection.execute('SELECT {} FROM {} WHERE {} = ? ORDER BY id'.format(
+            selected_columns, HISTORY_TABLE, HISTORY_KEY_COLUMN), (history_key,)).fetchall()
+    finally:
+        connection.close()
+
+    return convert_history_columns(pd.DataFrame(rows, columns=header))
+
+
+# append a single test result to the history. The whole update is a single transaction,
+# so concurrent jobs sharing the same history database cannot corrupt each other's writes
+def append_history(test_history_file: str, header: list, row: list) -> None:
+
+    database_file = get_history_database(test_history_file)
+    history_key = get_history_key(test_history_file)
+
+    connection = connect_history_database(database_file)
+    try:
+        migrate_pickle_history(connection, test_history_file)
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            insert_history_rows(connection, history_key, header, [row])
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+    finally:
+        connection.close()
+
+
+# precompute mean and number of entries of each metric for each target rate,
+# so that history averages are looked up instead of filtering the history for every metric
+def summarize_history(df_history) -> dict:
+    import pandas as pd
+
+    history_summary = {HistorySummaryKeys.MEAN.value: dict(),
+                       HistorySummaryKeys.COUNT.value: dict()}
+
+    if len(df_history.index) <= 0 or DataframeColumns.TX_RATE.value not in df_history.columns:
+        return history_summary
+
+    metric_columns = [x for x in df_history.columns if x not in [DataframeColumns.PROTOCOL.value, DataframeColumns.TX_RATE.value]]
+    df_metrics = df_history[metric_columns].apply(pd.to_numeric, errors='coerce')
+    df_metrics_grouped = df_metrics.groupby(pd.to_numeric(df_history[DataframeColumns.TX_RATE.value]))
+
+    for target_rate, df_mean in df_metrics_grouped.mean().iterrows():
+        history_summary[HistorySummaryKeys.MEAN.value][target_rate] = df_mean.to_dict()
+
+    for target_rate, df_count in df_metrics_grouped.count().iterrows():
+        history_summary[HistorySummaryKeys.COUNT.value][target_rate] = df_count.to_dict()
+
+    return history_summary
+
+
+# one-shot migration of all legacy pickle files in the history directory
+def migrate_history_dir(history_dir: str) -> int:
+
+    pickle_pattern = os.path.join(history_dir, '{}_*.pkl'.format(TestResultKeys.TEST_HISTORY.value))
+    migrated_rows = 0
+
+    for el in sorted(glob.glob(pickle_pattern)):
+        connection = connect_history_database(get_history_database(el))
+        try:
+            migrated_rows += migrate_pickle_history(connection, el)
+        finally:
+            connection.close()
+
+    return migrated_rows
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)-15s %(levelname)-8s %(message)s')
+
+    parser = argparse.ArgumentParser(description='Migrate test history pickle files to the history database')
+    parser.add_argument('--history_dir', type=str, required=True, help='Directory with test history data')
+    args = parser.parse_args()
+
+    migrated_rows = migrate_history_dir(args.history_dir)
+    logging.info('Migration completed, {} test history entries imported'.format(migrated_rows))
+
+
+if __name__ == '__main__':
+    main()
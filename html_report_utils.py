@@ -1,41 +1,86 @@
 from datetime import datetime
-import json
+from functools import partial
+from itertools import islice
 import logging
 import math
 import os
-import pandas as pd
 import pathlib
 import re
-
-from constants import DataframeColumns, DataframeMetrics, HistoryUpdateKeys, HtmlTemplateKeywords, HtmlColors, \
-    ProcessingConstants, TestKeys, TestPassFailThresholds, TestResultKeys
+import shutil
+import tempfile
+
+from constants import ChartModes, DataframeColumns, DataframeMetrics, DecimationModes, FigureFormats, FigureStorageModes, \
+    HistoryBackends, HistoryUpdateKeys, HtmlTemplateKeywords, HtmlColors, PageAssemblyModes, PlotBackends, ProcessingConstants, RenderedReportKeys, \
+    ReportOptions, StreamModes, TestKeys, TestPassFailThresholds, TestResultKeys
+from figure_assets import are_figure_assets_present, get_figure_asset_names, get_figure_assets_dir, \
+    remove_unused_figure_assets
+from history_store import append_history, convert_history_columns, get_database_change_counter, get_history_database, \
+    load_history, summarize_history
+from iperf_json_reader import load_iperf_report
 from iperf_log_grapher import compute_history_average, grapher
+from page_template import get_page_template, render_template
+from pipeline_profile import add_stage_records, get_file_size, is_stage_profile_active, profile_stage, run_profiled_task
 from process_payload import get_date, get_oai_git_commit, get_srn_number
+from report_cache import evict_report_cache, get_history_summary_digest, get_report_cache_key, load_cached_report, \
+    store_cached_report
+
+# options that change the rendering of a report, and are part of the key of cached reports
+RENDER_REPORT_OPTIONS = [ReportOptions.CHART_MODE, ReportOptions.DECIMATION, ReportOptions.FIGURE_COLORS,
+                         ReportOptions.FIGURE_DPI, ReportOptions.FIGURE_FORMAT, ReportOptions.FIGURE_STORAGE,
+                         ReportOptions.MAX_PLOT_POINTS,
+                         ReportOptions.PLOT_BACKEND, ReportOptions.STREAM_MODE]
+
+# separator of the result tables of the ues in the report page
+HTML_TABLE_SEPARATOR = '\n&nbsp;\n'
 
+# size of the chunks in which streamed result tables are copied to the report page
+STREAMED_PAGE_CHUNK_SIZE = 1024 * 1024
 
-def generate_figures_for_html_report(data: dict, test_type: str, target_rate: int=None, df_test_history=None) -> list:
+
+def generate_figures_for_html_report(data: dict, test_type: str, target_rate: int=None, test_history=None,
+                                     report_options: dict=None, figure_assets_dir: str=None) -> list:
 
     date_now, _, time_now = get_date(data)
     date_time = '{}_{}'.format(date_now, time_now)
-    figure_data = grapher(data, date_time, '', 'png', test_type, target_rate, df_test_history)
+    plot_backend = get_report_option(report_options, ReportOptions.PLOT_BACKEND, PlotBackends.SEABORN.value)
+    chart_mode = get_report_option(report_options, ReportOptions.CHART_MODE, ChartModes.IMAGE.value)
+    stream_mode = get_report_option(report_options, ReportOptions.STREAM_MODE, StreamModes.PER_STREAM.value)
+    stream_workers = get_report_option(report_options, ReportOptions.STREAM_WORKERS, 1)
+    decimation = get_report_option(report_options, ReportOptions.DECIMATION, DecimationModes.LTTB.value)
+    max_plot_points = get_report_option(report_options, ReportOptions.MAX_PLOT_POINTS, ProcessingConstants.PLOT_MAX_POINTS.value)
+    figure_format = get_report_option(report_options, ReportOptions.FIGURE_FORMAT, FigureFormats.PNG.value)
+    figure_dpi = get_report_option(report_options, ReportOptions.FIGURE_DPI)
+    figure_colors = get_report_option(report_options, ReportOptions.FIGURE_COLORS)
+    figure_data = grapher(data, date_time, '', figure_format, test_type, target_rate, test_history, plot_backend, chart_mode,
+        stream_mode, stream_workers, decimation, max_plot_points, figure_dpi, figure_colors, figure_assets_dir)
 
     return figure_data
 
 
 def build_dataframe(figure_data: dict, add_ue_summary: bool) -> tuple:
+    import pandas as pd
 
-    final_list = []
     header = [DataframeColumns.PROTOCOL.value,
               DataframeColumns.TX_RATE.value,
               DataframeColumns.STREAM.value,
               DataframeColumns.METRIC.value,
               DataframeColumns.MEAN.value,
               DataframeColumns.MAX.value,
+              DataframeColumns.P5.value,
+              DataframeColumns.P50.value,
+              DataframeColumns.P95.value,
+              DataframeColumns.STD.value,
+              DataframeColumns.STALLED_INTERVALS.value,
               DataframeColumns.FIGURE.value]
 
+    # add test summary before showing actual test content
+    test_summary_entry = [HtmlTemplateKeywords.TEST_SUMMARY_TITLE.value]
+    test_summary_entry += [HtmlTemplateKeywords.TO_DELETE.value] * (len(header) - len(test_summary_entry))
+    final_list = [test_summary_entry]
+
     try:
         # unfurl dictionary
-        test_type = figure_data[TestKeys.TEST.value]        
+        test_type = figure_data[TestKeys.TEST.value]
         test_date = str(datetime.strptime(figure_data[TestKeys.DATE.value], '%Y%m%d_%H%M%S_%f'))
         test_summary = '{} {}'.format(test_type, test_date)
 
@@ -54,45 +99,28 @@ def build_dataframe(figure_data: dict, add_ue_summary: bool) -> tuple:
                     stream = stream_k.replace(TestResultKeys.STREAM.value, '')
 
                     if stream == TestResultKeys.RESULT_ERROR.value:
-                        outer_list = [protocol, band, stream]
-                        inner_list = [stream_v for x in range(len(header) - len(outer_list))]
-                        outer_list = outer_list + inner_list
-                        final_list.append(outer_list)
+                        final_list.append([protocol, band, stream] + [stream_v] * (len(header) - 3))
                     else:
                         for el in stream_v:
-                            inner_list = []
-                            for _, el_v in el.items():
-                                inner_list.append(el_v)
-
-                                outer_list = [protocol, band, stream] + inner_list
-                            final_list.append(outer_list)
+                            final_list.append([protocol, band, stream] + list(el.values()))
     except KeyError:
         # no test data was found, pass and only add test info
         test_type = ''
         test_summary = ''
         pass
 
-    df = pd.DataFrame(columns=header)
-    for el in final_list:
-        df.loc[len(df)] = el
-
-    # add test summary before showing actual test content
-    test_summary_entry = [HtmlTemplateKeywords.TEST_SUMMARY_TITLE.value]
-    [test_summary_entry.append(HtmlTemplateKeywords.TO_DELETE.value) for x in range(len(header) - len(test_summary_entry))]
-
-    df.loc[-1] = test_summary_entry
-    df.index = df.index + 1
-    df.sort_index(inplace=True)
-
     # add placeholder for ue commit info and test outcome
     if add_ue_summary:
         ue_commit_entry = [HtmlTemplateKeywords.UE_COMMIT_TITLE.value, HtmlTemplateKeywords.UE_COMMIT.value]
-        [ue_commit_entry.append(HtmlTemplateKeywords.TO_DELETE.value) for x in range(len(header) - len(ue_commit_entry))]
-        df.loc[len(df)] = ue_commit_entry
+        ue_commit_entry += [HtmlTemplateKeywords.TO_DELETE.value] * (len(header) - len(ue_commit_entry))
+        final_list.append(ue_commit_entry)
 
         ue_outcome_entry = [HtmlTemplateKeywords.UE_OUTCOME_TITLE.value, HtmlTemplateKeywords.UE_OUTCOME.value]
-        [ue_outcome_entry.append(HtmlTemplateKeywords.TO_DELETE.value) for x in range(len(header) - len(ue_outcome_entry))]
-        df.loc[len(df)] = ue_outcome_entry
+        ue_outcome_entry += [HtmlTemplateKeywords.TO_DELETE.value] * (len(header) - len(ue_outcome_entry))
+        final_list.append(ue_outcome_entry)
+
+    # build the whole table at once, rows were already added in their final order
+    df = pd.DataFrame(final_list, columns=header, dtype=object)
 
     return df, test_summary
 
@@ -102,19 +130,46 @@ def get_metric_row(df, metric: str):
     return df_metric_row
 
 
+# history columns of statistics other than the mean are named after their metric and table column,
+# e.g., 'Throughput [Mbps] P5'
+history_stat_columns = [DataframeColumns.P5.value,
+                        DataframeColumns.P50.value,
+                        DataframeColumns.P95.value,
+                        DataframeColumns.STD.value,
+                        DataframeColumns.STALLED_INTERVALS.value]
+
+
+def get_history_stat_column(metric: str, column: str) -> str:
+    return '{} {}'.format(metric, column)
+
+
+# get metric and table column of a history column
+def split_history_column(history_column: str) -> tuple:
+
+    for el in history_stat_columns:
+        suffix = ' {}'.format(el)
+        if history_column.endswith(suffix):
+            return history_column[:-len(suffix)], el
+
+    return history_column, DataframeColumns.MEAN.value
+
+
 def get_test_history_headers(test_protocol: str, test_direction: str) -> list:
 
+    throughput_stats = [get_history_stat_column(DataframeMetrics.THROUGHPUT.value, x) for x in history_stat_columns]
+
     header_tcp_dl = [DataframeColumns.PROTOCOL.value,
                      DataframeColumns.TX_RATE.value,
                      DataframeMetrics.DATA_TRANSFERRED.value,
-                     DataframeMetrics.THROUGHPUT.value]
+                     DataframeMetrics.THROUGHPUT.value] + throughput_stats
 
     header_tcp_ul = [DataframeColumns.PROTOCOL.value,
                      DataframeColumns.TX_RATE.value,
                      DataframeMetrics.DATA_TRANSFERRED.value,
                      DataframeMetrics.THROUGHPUT.value,
                      DataframeMetrics.TCP_CWND.value,
-                     DataframeMetrics.RTT.value]
+                     DataframeMetrics.RTT.value] + throughput_stats + \
+                    [get_history_stat_column(DataframeMetrics.RTT.value, DataframeColumns.P95.value)]
 
     header_udp_dl = [DataframeColumns.PROTOCOL.value,
                      DataframeColumns.TX_RATE.value,
@@ -123,13 +178,13 @@ def get_test_history_headers(test_protocol: str, test_direction: str) -> list:
                      DataframeMetrics.JITTER.value,
                      DataframeMetrics.LOST_PKTS_PERC.value,
                      DataframeMetrics.LOST_PKTS.value,
-                     DataframeMetrics.TOTAL_PKTS.value]
+                     DataframeMetrics.TOTAL_PKTS.value] + throughput_stats
 
     header_udp_ul = [DataframeColumns.PROTOCOL.value,
                      DataframeColumns.TX_RATE.value,
                      DataframeMetrics.DATA_TRANSFERRED.value,
                      DataframeMetrics.THROUGHPUT.value,
-                     DataframeMetrics.TOTAL_PKTS.value]
+                     DataframeMetrics.TOTAL_PKTS.value] + throughput_stats
 
     if test_protocol.lower() == 'tcp':
         if test_direction.lower() == 'downlink':
@@ -151,55 +206,134 @@ def get_test_history_headers(test_protocol: str, test_direction: str) -> list:
     return []
 
 
-def load_test_history_data(test_history_file: str, test_protocol: str, test_direction: str):
+def load_test_history_data(test_history_file: str, test_protocol: str, test_direction: str,
+                           history_backend: str=HistoryBackends.SQLITE.value):
+    import pandas as pd
+
+    header = get_test_history_headers(test_protocol, test_direction)
 
-    if os.path.exists(test_history_file):
+    if history_backend == HistoryBackends.SQLITE.value:
+        logging.info('Loading test history data of {}'.format(test_history_file))
+        df_history = load_history(test_history_file, header)
+        logging.info('Test history data loaded')
+    elif os.path.exists(test_history_file):
         logging.info('Loading test history data from file {}'.format(test_history_file))
-        df_history = pd.read_pickle(test_history_file)
+        df_history = convert_history_columns(pd.read_pickle(test_history_file))
         logging.info('Test history data loaded')
     else:
         logging.info('Test history data not found. Initializing empty dataframe')
-        header = get_test_history_headers(test_protocol, test_direction)
         df_history = pd.DataFrame(columns=header)
 
     return df_history
 
 
-# reload df_history in this function, in case we manipulated the previously loaded one
-def update_test_history_data(df, test_history_file: str, test_protocol: str, test_direction: str) -> None:
+# cache of test history summaries, so that each history file is loaded once per run.
+# Entries are keyed by history file and backend, and reloaded when the history storage is modified
+test_history_cache = dict()
 
-    logging.info('Updating test history file {}'.format(test_history_file))
+
+# version of the history storage, which changes whenever the history is updated
+def get_history_storage_version(history_storage_file: str, history_backend: str):
+
+    try:
+        history_stat = os.stat(history_storage_file)
+    except FileNotFoundError:
+        return None
+
+    history_version = (history_stat.st_mtime_ns, history_stat.st_size)
+    if history_backend == HistoryBackends.SQLITE.value:
+        history_version += (get_database_change_counter(history_storage_file),)
+
+    return history_version
+
+
+def load_test_history_summary(test_history_file: str, test_protocol: str, test_direction: str,
+                              history_backend: str=HistoryBackends.SQLITE.value) -> dict:
+
+    if history_backend == HistoryBackends.SQLITE.value:
+        history_storage_file = get_history_database(test_history_file)
+    else:
+        history_storage_file = test_history_file
+
+    history_version = get_history_storage_version(history_storage_file, history_backend)
+
+    cache_key = (test_history_file, history_backend)
+    cache_entry = test_history_cache.get(cache_key)
+    if cache_entry is not None and cache_entry[0] == history_version:
+        return cache_entry[1]
+
+    df_history = load_test_history_data(test_history_file, test_protocol, test_direction, history_backend)
+    test_history = summarize_history(df_history)
+    test_history_cache[cache_key] = (history_version, test_history)
+
+    return test_history
+
+
+# values of the test stored in its history, in the order of the history header. These are only a few numbers,
+# so that the tables of the test do not need to be kept until the history is updated.
+# Returns None if the test has no results, or if some of its values are missing
+def get_test_history_row(df, test_protocol: str, test_direction: str):
 
     # exit if empty
     if len(df.index) < 3:
         logging.warning('Current test result is empty. Skipping update')
+        return None
+
+    if not test_protocol or not test_direction:
+        return None
+
+    header = get_test_history_headers(test_protocol, test_direction)
+
+    new_test_data = []
+    new_test_data.append(df[DataframeColumns.PROTOCOL.value].iloc[1])
+    new_test_data.append(get_test_target_rate(df))
+
+    for el in header:
+        if el in [DataframeColumns.PROTOCOL.value, DataframeColumns.TX_RATE.value]:
+            continue
+
+        metric, column = split_history_column(el)
+        df_new_value_row = df.loc[df[DataframeColumns.METRIC.value] == metric]
+        if len(df_new_value_row.index) > 0:
+            new_test_data.append(df_new_value_row[column].iloc[0])
+
+    # this happens when the test fails
+    # we don't want to update the history file in this case
+    if len(new_test_data) != len(header):
+        logging.warning('History update failed')
+        return None
+
+    return new_test_data
+
+
+# reload df_history in this function, in case we manipulated the previously loaded one
+def update_test_history_data(new_test_data: list, test_history_file: str, test_protocol: str, test_direction: str,
+                             history_backend: str=HistoryBackends.SQLITE.value) -> None:
+    import pandas as pd
+
+    logging.info('Updating test history file {}'.format(test_history_file))
+
+    if new_test_data is None:
+        logging.warning('Current test result is incomplete. Skipping update')
         return
 
-    if test_history_file and test_protocol and test_direction:
-        df_history = load_test_history_data(test_history_file, test_protocol, test_direction)
+    if test_history_file:
         header = get_test_history_headers(test_protocol, test_direction)
 
-        new_test_data = []
-        new_test_data.append(df[DataframeColumns.PROTOCOL.value].iloc[1])
-        new_test_data.append(get_test_target_rate(df))
-
-        for el in header:
-            if el in [DataframeColumns.PROTOCOL.value, DataframeColumns.TX_RATE.value]:
-                continue
+        if history_backend == HistoryBackends.SQLITE.value:
+            append_history(test_history_file, header, new_test_data)
+        else:
+            # history files written before columns were added to the header get empty values for them
+            df_history = load_test_history_data(test_history_file, test_protocol, test_direction, history_backend)
+            df_history = df_history.reindex(columns=list(df_history.columns) + [x for x in header if x not in df_history.columns])
+            df_history.loc[len(df_history.index)] = pd.Series(new_test_data, index=header)
 
-            df_new_value_row = df.loc[df[DataframeColumns.METRIC.value] == el]
-            if len(df_new_value_row.index) > 0:
-                new_test_data.append(df_new_value_row[DataframeColumns.MEAN.value].iloc[0])
+            # write to temporary file first, so that the history file is replaced atomically
+            test_history_file_tmp = '{}.{}.tmp'.format(test_history_file, os.getpid())
+            df_history.to_pickle(test_history_file_tmp)
+            os.replace(test_history_file_tmp, test_history_file)
 
-        try:
-            df_history.loc[len(df_history.index)] = new_test_data
-            df_history.to_pickle(test_history_file)
-            logging.info('Test history file updated')
-        except ValueError as e:
-            # this happens when the test fails
-            # we don't want to update the history file in this case, so it's ok to pass
-            logging.warning('History update failed')
-            pass
+        logging.info('Test history file updated')
 
 
 def get_test_target_rate(df) -> int:
@@ -217,7 +351,7 @@ def get_test_target_rate(df) -> int:
     return target_rate
 
 
-def check_iperf_test_pass(df, df_test_history) -> bool:
+def check_iperf_test_pass(df, test_history, report_options: dict=None) -> bool:
 
     pass_threshold = TestPassFailThresholds.THROUGHPUT_THRESHOLD.value
 
@@ -235,22 +369,83 @@ def check_iperf_test_pass(df, df_test_history) -> bool:
     else:
         # case in which target rate was unlimited
         # use historic data in this case
-        history_throughput_avg = compute_history_average(df_test_history, target_rate, DataframeMetrics.THROUGHPUT.value)
+        history_throughput_avg = compute_history_average(test_history, target_rate, DataframeMetrics.THROUGHPUT.value)
 
         if throughput_mean < pass_threshold * history_throughput_avg:
             return False
 
+    return check_iperf_test_optional_pass(df, df_throughput, target_rate, test_history, report_options)
+
+
+# optional pass criteria on the throughput tail, stalls and round-trip time tail, only checked if their threshold is passed.
+# As for the mean throughput, the history is used when the target rate is unlimited, and a missing history passes the test
+def check_iperf_test_optional_pass(df, df_throughput, target_rate: float, test_history, report_options: dict=None) -> bool:
+
+    throughput_p5_threshold = get_report_option(report_options, ReportOptions.THROUGHPUT_P5_THRESHOLD)
+    if throughput_p5_threshold is not None:
+        throughput_p5 = float(df_throughput[DataframeColumns.P5.value].iloc[0])
+
+        if target_rate > 0:
+            throughput_p5_reference = target_rate
+        else:
+            throughput_p5_reference = compute_history_average(test_history, target_rate,
+                get_history_stat_column(DataframeMetrics.THROUGHPUT.value, DataframeColumns.P5.value))
+
+        if throughput_p5 < throughput_p5_threshold * throughput_p5_reference:
+            logging.info('Throughput P5 {} below threshold'.format(throughput_p5))
+            return False
+
+    max_stalled_intervals = get_report_option(report_options, ReportOptions.MAX_STALLED_INTERVALS)
+    if max_stalled_intervals is not None:
+        stalled_intervals = df_throughput[DataframeColumns.STALLED_INTERVALS.value].iloc[0]
+
+        if stalled_intervals > max_stalled_intervals:
+            logging.info('{} stalled intervals above threshold'.format(stalled_intervals))
+            return False
+
+    rtt_p95_threshold = get_report_option(report_options, ReportOptions.RTT_P95_THRESHOLD)
+    df_rtt = get_metric_row(df, DataframeMetrics.RTT.value)
+    if rtt_p95_threshold is not None and len(df_rtt.index) > 0:
+        rtt_p95 = float(df_rtt[DataframeColumns.P95.value].iloc[0])
+        history_rtt_p95 = compute_history_average(test_history, target_rate,
+            get_history_stat_column(DataframeMetrics.RTT.value, DataframeColumns.P95.value))
+
+        if rtt_p95 > rtt_p95_threshold * history_rtt_p95:
+            logging.info('Round-trip time P95 {} above threshold'.format(rtt_p95))
+            return False
+
     return True
 
 
-def determine_ue_test_pass_fail(df, df_test_history) -> bool:
+def get_test_pass_criterion(report_options: dict=None) -> str:
+
+    test_pass_criterion = ['Throughput &ge; {}% target transmit rate (or history, if transmit rate unlimited)'.format(
+        TestPassFailThresholds.THROUGHPUT_THRESHOLD.value * 100)]
+
+    throughput_p5_threshold = get_report_option(report_options, ReportOptions.THROUGHPUT_P5_THRESHOLD)
+    if throughput_p5_threshold is not None:
+        test_pass_criterion.append('Throughput P5 &ge; {}% target transmit rate (or history P5, if transmit rate unlimited)'.format(
+            throughput_p5_threshold * 100))
+
+    max_stalled_intervals = get_report_option(report_options, ReportOptions.MAX_STALLED_INTERVALS)
+    if max_stalled_intervals is not None:
+        test_pass_criterion.append('At most {} intervals without throughput'.format(max_stalled_intervals))
+
+    rtt_p95_threshold = get_report_option(report_options, ReportOptions.RTT_P95_THRESHOLD)
+    if rtt_p95_threshold is not None:
+        test_pass_criterion.append('Round-trip time P95 &le; {}% history'.format(rtt_p95_threshold * 100))
+
+    return '<br>'.join(test_pass_criterion)
+
+
+def determine_ue_test_pass_fail(df, test_history, report_options: dict=None) -> bool:
     
     test_pass = True
     if len(df.index) < 3:
         # handle case of no json reports found in UE directory
         return False
     else:
-        test_pass = check_iperf_test_pass(df, df_test_history)
+        test_pass = check_iperf_test_pass(df, test_history, report_options)
 
     return test_pass
 
@@ -291,17 +486,35 @@ def get_test_history_filename_3(json_data: dict, test_type: str, history_dir: st
     return test_protocol, test_direction, test_history_file, target_rate
 
 
+# format table values as pandas does when rendering object columns
+def format_html_table_value(value) -> str:
+
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+
+        value_str = '{:.6f}'.format(value).rstrip('0')
+        if value_str.endswith('.'):
+            value_str += '0'
+        return value_str
+
+    return str(value)
+
+
+def html_table_cell(value: str, attributes: str='') -> str:
+    return '      <td style="text-align: center;"{}>{}</td>'.format(attributes, value)
+
+
 def generate_html_table(ue_num: int, figure_data: dict, git_commit_info: str,
-                        df_test_history, srn_number: str, all_test_pass_outcome: list,
-                        results_dir: str, first_table: bool, last_table: bool) -> tuple:
+                        test_history, srn_number: str, all_test_pass_outcome: list,
+                        results_dir: str, first_table: bool, last_table: bool, report_options: dict=None) -> tuple:
 
     df, test_summary = build_dataframe(figure_data, last_table)
-    html_table = df.to_html(index=False, header=first_table, escape=False)
 
     test_outcome_title_columns = math.ceil(len(df.columns) / 2)
     test_outcome_columns = len(df.columns) - test_outcome_title_columns
 
-    ue_test_passed = determine_ue_test_pass_fail(df, df_test_history)
+    ue_test_passed = determine_ue_test_pass_fail(df, test_history, report_options)
 
     # select html color background
     if ue_test_passed:
@@ -311,78 +524,90 @@ def generate_html_table(ue_num: int, figure_data: dict, git_commit_info: str,
 
     all_test_pass_outcome.append(ue_test_passed)
     if all(all_test_pass_outcome):
-        ue_test_outcome = ' bgcolor = "green" colspan="{}"><font color="white">PASS <span class="glyphicon glyphicon-ok"></span></font>'.format(
-            test_outcome_columns)
+        ue_test_outcome = html_table_cell('<font color="white">PASS <span class="glyphicon glyphicon-ok"></span></font>',
+            ' bgcolor = "{}" colspan="{}"'.format(HtmlColors.FINAL_TEST_PASSED.value, test_outcome_columns))
     else:
-        ue_test_outcome = ' bgcolor = "red" colspan="{}"><font color="white">FAIL <span class="glyphicon glyphicon-remove"></span></font>'.format(
-            test_outcome_columns)
-
-    # replace placeholder for ue commit info
-    table_replacements = {'dataframe': 'table',
-                          '<th>': '<th style="text-align: center;">',
-                          '<td>': '<td style="text-align: center;">',
-                          # ue commit entries
-                          '>{}</td>'.format(HtmlTemplateKeywords.UE_COMMIT_TITLE.value):
-                              ' bgcolor = "{}" colspan="{}">Git Commit Info</td>'.format(HtmlColors.UE_COMMIT.value, test_outcome_title_columns),
-                          '>{}</td>'.format(HtmlTemplateKeywords.UE_COMMIT.value): 
-                              ' bgcolor = "{}" colspan="{}">{}</td>'.format(HtmlColors.UE_COMMIT.value, test_outcome_columns, git_commit_info),
-                          # ue commit entries
-                          '>{}</td>'.format(HtmlTemplateKeywords.UE_OUTCOME_TITLE.value):
-                              ' bgcolor = "{}" colspan="{}">Test Outcome UE {} (Colosseum SRN-{})</td>'.format(HtmlColors.UE_TEST_OUTCOME.value, test_outcome_title_columns, ue_num, srn_number),
-                          '>{}</td>'.format(HtmlTemplateKeywords.UE_OUTCOME.value): ue_test_outcome,
-                          # test summary entry
-                          '>{}</td>'.format(HtmlTemplateKeywords.TEST_SUMMARY_TITLE.value): 
-                              ' bgcolor = "{}" colspan="{}">{}</td>'.format(ue_single_test_color, len(df.columns), test_summary)}
-
-    # replace placeholders
-    for key, val in table_replacements.items():
-        html_table = html_table.replace(key, val)
-
-    # delete lines with placeholders
-    html_table = '\n'.join([x for x in html_table.splitlines() if HtmlTemplateKeywords.TO_DELETE.value not in x])
-
-    # remove closing tags of first table, and opening tags of other tables
-    # skip if this is the only table
-    if first_table and last_table:
-        pass
+        ue_test_outcome = html_table_cell('<font color="white">FAIL <span class="glyphicon glyphicon-remove"></span></font>',
+            ' bgcolor = "{}" colspan="{}"'.format(HtmlColors.FINAL_TEST_FAILED.value, test_outcome_columns))
+
+    # cells replacing the placeholders of the table entries
+    table_placeholders = {
+        # test summary entry
+        HtmlTemplateKeywords.TEST_SUMMARY_TITLE.value:
+            html_table_cell(test_summary, ' bgcolor = "{}" colspan="{}"'.format(ue_single_test_color, len(df.columns))),
+        # ue commit entries
+        HtmlTemplateKeywords.UE_COMMIT_TITLE.value:
+            html_table_cell('Git Commit Info', ' bgcolor = "{}" colspan="{}"'.format(HtmlColors.UE_COMMIT.value, test_outcome_title_columns)),
+        HtmlTemplateKeywords.UE_COMMIT.value:
+            html_table_cell(git_commit_info, ' bgcolor = "{}" colspan="{}"'.format(HtmlColors.UE_COMMIT.value, test_outcome_columns)),
+        # ue outcome entries
+        HtmlTemplateKeywords.UE_OUTCOME_TITLE.value:
+            html_table_cell('Test Outcome UE {} (Colosseum SRN-{})'.format(ue_num, srn_number),
+                ' bgcolor = "{}" colspan="{}"'.format(HtmlColors.UE_TEST_OUTCOME.value, test_outcome_title_columns)),
+        HtmlTemplateKeywords.UE_OUTCOME.value: ue_test_outcome}
+
+    # only the first table of a user has the header and only its last table is closed,
+    # so that all the tables of a user are stitched together
+    html_lines = []
+    if first_table:
+        html_lines.append('<table border="1" class="table">')
+        html_lines.append('  <thead>')
+        html_lines.append('    <tr style="text-align: right;">')
+        html_lines += ['      <th style="text-align: center;">{}</th>'.format(x) for x in df.columns]
+        html_lines.append('    </tr>')
+        html_lines.append('  </thead>')
+        html_lines.append('  <tbody>')
     else:
-        to_replace = r'^\s*<table.*>.*\s*<tbody>'
-        html_table = re.sub(to_replace, '', html_table)
+        html_lines.append('')
+
+    for row in df.itertuples(index=False, name=None):
+        html_lines.append('    <tr>')
+        for el in row:
+            if isinstance(el, str) and el in table_placeholders:
+                html_lines.append(table_placeholders[el])
+            elif el != HtmlTemplateKeywords.TO_DELETE.value:
+                html_lines.append(html_table_cell(format_html_table_value(el)))
+        html_lines.append('    </tr>')
 
-        if not last_table:
-            to_replace = r'\s*<\/tbody>.*\s*<\/table>\s*$'
-            html_table = re.sub(to_replace, '', html_table)
+    if last_table:
+        html_lines.append('  </tbody>')
+        html_lines.append('</table>')
+
+    html_table = '\n'.join(html_lines)
 
     return html_table, df, ue_test_passed
 
 
+# directory in which figures are written when they are not embedded in the page, None otherwise
+def get_report_figure_assets_dir(results_dir: str, report_options: dict=None):
+
+    figure_storage = get_report_option(report_options, ReportOptions.FIGURE_STORAGE, FigureStorageModes.EMBEDDED.value)
+    if figure_storage == FigureStorageModes.EXTERNAL.value:
+        return get_figure_assets_dir(results_dir)
+
+    return None
+
+
 def write_html_report(html_page: str, results_dir: str) -> None:
     with open('{}/test_summary.html'.format(results_dir), 'w') as f:
         f.write(html_page)
 
 
-def get_html_page_template() -> str:
-    with open('templates/template_test_page.html', 'r') as f:
-        page_template = f.read()
-    return page_template
-
-
-def determine_final_test_outcome(html_page: str, result_tables_number: int) -> str:
+def determine_final_test_outcome(ue_test_outcome_list: list) -> str:
 
     # check if any of the tests failed
-    if 'FAIL' in html_page or result_tables_number <= 0:
-        to_replace = ' bgcolor="{}"><font color="white">FAIL <span class="glyphicon glyphicon-remove"></span></font>'.format(HtmlColors.FINAL_TEST_FAILED.value)
+    if not all(ue_test_outcome_list) or len(ue_test_outcome_list) <= 0:
+        final_test_outcome = ' bgcolor="{}"><font color="white">FAIL <span class="glyphicon glyphicon-remove"></span></font>'.format(HtmlColors.FINAL_TEST_FAILED.value)
     else:
-        to_replace = ' bgcolor="{}"><font color="white">PASS <span class="glyphicon glyphicon-ok"></span></font>'.format(HtmlColors.FINAL_TEST_PASSED.value)
+        final_test_outcome = ' bgcolor="{}"><font color="white">PASS <span class="glyphicon glyphicon-ok"></span></font>'.format(HtmlColors.FINAL_TEST_PASSED.value)
 
-    html_page = html_page.replace('>{}'.format(HtmlTemplateKeywords.FINAL_TEST_OUTCOME.value), to_replace)
-    return html_page
+    return final_test_outcome
 
 
 def populate_report_page(html_table_list: list, gnb_commit_info: str, gnb_commit_hash: str,
                          gnb_srn_number: str, job_id_awx: str, job_id_jenkins: str,
-                         job_start_time: str, oai_repo_url: str, jenkins_job_url: str) -> str:
-    html_page = get_html_page_template()
+                         job_start_time: str, oai_repo_url: str, jenkins_job_url: str,
+                         ue_test_outcome_list: list, report_options: dict=None) -> str:
 
     # set variable with url of jenkins build page. Leave it empty if not passed
     if jenkins_job_url:
@@ -396,32 +621,26 @@ def populate_report_page(html_table_list: list, gnb_commit_info: str, gnb_commit
     # form html string with linked commit hash
     gnb_linked_commit_info = link_git_hash(gnb_commit_info, gnb_commit_hash, oai_repo_url, True)
 
-    # add general info
-    html_page = html_page.replace(HtmlTemplateKeywords.GNB_COMMIT.value, gnb_linked_commit_info)
-    html_page = html_page.replace(HtmlTemplateKeywords.GNB_SRN_NUMBER.value, gnb_srn_number)
-    html_page = html_page.replace(HtmlTemplateKeywords.JENKINS_JOB_ID.value, job_id_jenkins)
-    html_page = html_page.replace(HtmlTemplateKeywords.JENKINS_BUILD_URL.value, jenkins_build_url)
-    html_page = html_page.replace(HtmlTemplateKeywords.ANSIBLE_JOB_ID.value, job_id_awx)
-    html_page = html_page.replace(HtmlTemplateKeywords.ANSIBLE_BUILD_START_TIME.value, job_start_time)
-    html_page = html_page.replace(HtmlTemplateKeywords.OAI_REPO_URL.value, oai_repo_url)
-    html_page = html_page.replace(HtmlTemplateKeywords.TEST_PASS_CRITERION.value,
-        'Throughput &ge; {}% target transmit rate (or history, if transmit rate unlimited)'.format(TestPassFailThresholds.THROUGHPUT_THRESHOLD.value * 100))
-
-    # add ue result tables
-    for el_idx, el_val in enumerate(html_table_list):
-        to_replace = el_val
-
-        # re-add placeholder if not last table
-        if el_idx < len(html_table_list) - 1:
-            to_replace += '\n&nbsp;\n{}'.format(HtmlTemplateKeywords.RESULTS_TABLE.value)
-
-        html_page = html_page.replace(HtmlTemplateKeywords.RESULTS_TABLE.value, to_replace)
-
-    # write final test outcome
-    html_page = determine_final_test_outcome(html_page, len(html_table_list))
-
-    # replace ue table placeholder in case no user results were found
-    html_page = html_page.replace(HtmlTemplateKeywords.RESULTS_TABLE.value, '')
+    # ue result tables, separated from each other. The placeholder is removed in case no user results were found
+    html_tables = []
+    for el in html_table_list:
+        if html_tables:
+            html_tables.append(HTML_TABLE_SEPARATOR)
+        html_tables.append(el)
+
+    slot_values = {HtmlTemplateKeywords.ANSIBLE_BUILD_START_TIME.value: job_start_time,
+                   HtmlTemplateKeywords.ANSIBLE_JOB_ID.value: job_id_awx,
+                   HtmlTemplateKeywords.FINAL_TEST_OUTCOME.value: determine_final_test_outcome(ue_test_outcome_list),
+                   HtmlTemplateKeywords.GNB_COMMIT.value: gnb_linked_commit_info,
+                   HtmlTemplateKeywords.GNB_SRN_NUMBER.value: gnb_srn_number,
+                   HtmlTemplateKeywords.JENKINS_BUILD_URL.value: jenkins_build_url,
+                   HtmlTemplateKeywords.JENKINS_JOB_ID.value: job_id_jenkins,
+                   HtmlTemplateKeywords.OAI_REPO_URL.value: oai_repo_url,
+                   HtmlTemplateKeywords.RESULTS_TABLE.value: html_tables,
+                   HtmlTemplateKeywords.TEST_PASS_CRITERION.value: get_test_pass_criterion(report_options)}
+
+    # fill the placeholders of the compiled template in a single pass over it
+    html_page = render_template(get_page_template(), slot_values)
 
     return html_page
 
@@ -445,37 +664,210 @@ def link_git_hash(git_commit_info: str, git_commit_hash: str, git_repo_url: str,
     return git_linked_commit_info
 
 
+def get_report_option(report_options: dict, option, default=None):
+    if not report_options:
+        return default
+    return report_options.get(option.value, default)
+
+
+# run function over all the elements of the iterable, in a process pool if more than one worker is requested,
+# or in the executor if one is passed. Results are yielded in the same order of the iterable, as soon as they
+# are available. At most twice as many tasks as workers are pending at any time, so that results are not
+# accumulated faster than they are consumed. If an executor is passed, e.g., the pool shared by the jobs of the
+# report service, workers is its number of workers, otherwise it is the size of the pool created here
+def iterate_report_tasks(function, iterable, workers: int=1, executor=None):
+
+    if executor is None and (workers is None or workers <= 1):
+        yield from map(function, iterable)
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    own_executor = executor is None
+    if own_executor:
+        logging.info('Processing reports with {} workers'.format(workers))
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    max_pending_tasks = 2 * max(workers or 1, 1)
+    pending_tasks = deque()
+    try:
+        for el in iterable:
+            pending_tasks.append(executor.submit(function, el))
+            if len(pending_tasks) >= max_pending_tasks:
+                yield pending_tasks.popleft().result()
+
+        while pending_tasks:
+            yield pending_tasks.popleft().result()
+    finally:
+        for el in pending_tasks:
+            el.cancel()
+        if own_executor:
+            executor.shutdown()
+
+
+# as iterate_report_tasks, also collecting the stage records of each task when profiling is enabled,
+# including those of tasks run in worker processes. Records are assigned to the ue of their task
+def iterate_profiled_report_tasks(function, iterable, task_ues: list, workers: int=1, executor=None):
+
+    if not is_stage_profile_active():
+        yield from iterate_report_tasks(function, iterable, workers, executor)
+        return
+
+    for (result, task_records), ue_num in zip(iterate_report_tasks(partial(run_profiled_task, function), iterable,
+                                                                   workers, executor), task_ues):
+        for el in task_records:
+            el['ue'] = ue_num
+        add_stage_records(task_records)
+        yield result
+
+
+# result tables of the report, written in order to a temporary file in the results directory as soon as they
+# are built when streaming the page, so that only the table being built is held in memory.
+# Names of the figures written in the assets directory are kept to clean it up afterwards
+class StreamedHtmlTables:
+
+    def __init__(self, results_dir: str, figure_assets_dir: str=None):
+        self.tables_file = tempfile.TemporaryFile(mode='w+', dir=results_dir)
+        self.figure_assets_dir = figure_assets_dir
+        self.figure_assets = set()
+        self.table_count = 0
+
+    def append(self, html_table: str) -> None:
+        if self.table_count > 0:
+            self.tables_file.write(HTML_TABLE_SEPARATOR)
+        self.tables_file.write(html_table)
+        self.table_count += 1
+
+        if self.figure_assets_dir:
+            self.figure_assets.update(get_figure_asset_names(html_table))
+
+    # copy the tables to the report page
+    def copy_to(self, f) -> None:
+        self.tables_file.seek(0)
+        shutil.copyfileobj(self.tables_file, f, STREAMED_PAGE_CHUNK_SIZE)
+
+    def close(self) -> None:
+        self.tables_file.close()
+
+
+# write the page with the tables in between head and tail of the page, which is written to a temporary file
+# first and then renamed, so that the previous report is replaced atomically
+def write_streamed_html_report(page_head: str, html_tables: StreamedHtmlTables, page_tail: str, results_dir: str) -> None:
+
+    report_file = '{}/test_summary.html'.format(results_dir)
+    report_file_tmp = '{}.{}.tmp'.format(report_file, os.getpid())
+    with open(report_file_tmp, 'w') as f:
+        f.write(page_head)
+        html_tables.copy_to(f)
+        f.write(page_tail)
+    os.replace(report_file_tmp, report_file)
+
+
 def process_test_results(ue_reports: dict, ue_directories: dict, results_dir: str, history_dir: str,
     gnb_commit_info: str, gnb_commit_hash: str, gnb_srn_number: str, job_id_awx: str,
-    job_id_jenkins: str, job_start_time: str, oai_repo_url: str, jenkins_job_url: str) -> None:
-    
-    html_table_list = []
-    history_update_list = []
-    for r_key, r_val in ue_reports.items():
-        ue_commit_info, ue_commit_hash = get_oai_git_commit(ue_directories[r_key], ProcessingConstants.OAI_UE_LOG_FILE.value)
-        ue_linked_commit_info = link_git_hash(ue_commit_info, ue_commit_hash, oai_repo_url, False)
-
-        ue_srn_number = get_srn_number(ue_directories[r_key])
-
-        html_table = process_ue_json_report(r_key + 1, r_val, ue_linked_commit_info,
-            ue_srn_number, results_dir, history_dir, history_update_list)
-
-        if html_table:
-            html_table_list.append(html_table)
-
-    # update results history
-    for el in history_update_list:
-        if el[HistoryUpdateKeys.TEST_PASS_STATUS.value]:
-            update_test_history_data(el[HistoryUpdateKeys.TEST_DATAFRAME.value],
-                el[HistoryUpdateKeys.TEST_HISTORY_FILE.value],
-                el[HistoryUpdateKeys.TEST_PROTOCOL.value],
-                el[HistoryUpdateKeys.TEST_DIRECTION.value])
+    job_id_jenkins: str, job_start_time: str, oai_repo_url: str, jenkins_job_url: str,
+    report_options: dict=None, executor=None) -> None:
+
+    # render figures of all the json reports, possibly in parallel, while tables are built sequentially,
+    # so that their order is the same as ue_reports. Rendered reports are dropped once the table of their ue is built
+    workers = get_report_option(report_options, ReportOptions.WORKERS, 1)
+    json_report_list = [j_el for r_val in ue_reports.values() for j_el in r_val]
+    json_report_ues = [r_key + 1 for r_key, r_val in ue_reports.items() for _ in r_val]
+    rendered_reports = iterate_profiled_report_tasks(partial(render_json_report, results_dir=results_dir,
+        history_dir=history_dir, report_options=report_options), json_report_list, json_report_ues, workers, executor)
+
+    commit_head_bytes = get_report_option(report_options, ReportOptions.COMMIT_HEAD_BYTES,
+        ProcessingConstants.OAI_COMMIT_HEAD_BYTES.value)
+    commit_full_scan = get_report_option(report_options, ReportOptions.COMMIT_FULL_SCAN, False)
+
+    figure_assets_dir = get_report_figure_assets_dir(results_dir, report_options)
+    page_assembly = get_report_option(report_options, ReportOptions.PAGE_ASSEMBLY, PageAssemblyModes.MEMORY.value)
+    if page_assembly == PageAssemblyModes.STREAMING.value:
+        html_table_list = StreamedHtmlTables(results_dir, figure_assets_dir)
+    else:
+        html_table_list = []
+
+    try:
+        ue_test_outcome_list = []
+        history_update_list = []
+        for r_key, r_val in ue_reports.items():
+            with profile_stage('log_scan', ue=r_key + 1,
+                               bytes_in=get_file_size(ue_directories[r_key], ProcessingConstants.OAI_UE_LOG_FILE.value)):
+                ue_commit_info, ue_commit_hash = get_oai_git_commit(ue_directories[r_key],
+                    ProcessingConstants.OAI_UE_LOG_FILE.value, commit_head_bytes, commit_full_scan)
+            ue_linked_commit_info = link_git_hash(ue_commit_info, ue_commit_hash, oai_repo_url, False)
+
+            ue_srn_number = get_srn_number(ue_directories[r_key])
+
+            ue_rendered_reports = list(islice(rendered_reports, len(r_val)))
+
+            html_table, ue_test_passed = process_ue_json_report(r_key + 1, r_val, ue_linked_commit_info,
+                ue_srn_number, results_dir, history_dir, history_update_list, ue_rendered_reports, report_options)
+            del ue_rendered_reports
+
+            if html_table:
+                html_table_list.append(html_table)
+                ue_test_outcome_list.append(ue_test_passed)
+
+        # update results history. The history holds the results of the first stream of each test,
+        # so the aggregates of the streams reported in the other stream modes are not added to it
+        history_backend = get_report_option(report_options, ReportOptions.HISTORY_BACKEND, HistoryBackends.SQLITE.value)
+        stream_mode = get_report_option(report_options, ReportOptions.STREAM_MODE, StreamModes.PER_STREAM.value)
+        if stream_mode != StreamModes.PER_STREAM.value:
+            logging.info('Skipping test history file update in {} stream mode'.format(stream_mode))
+            history_update_list = []
+
+        with profile_stage('history_write'):
+            for el in history_update_list:
+                if el[HistoryUpdateKeys.TEST_PASS_STATUS.value]:
+                    update_test_history_data(el[HistoryUpdateKeys.TEST_HISTORY_ROW.value],
+                        el[HistoryUpdateKeys.TEST_HISTORY_FILE.value],
+                        el[HistoryUpdateKeys.TEST_PROTOCOL.value],
+                        el[HistoryUpdateKeys.TEST_DIRECTION.value],
+                        history_backend)
+                else:
+                    logging.warning('Skipping test history file update because of test regression')
+
+        cache_dir = get_report_option(report_options, ReportOptions.CACHE_DIR)
+        if cache_dir:
+            evict_report_cache(cache_dir, get_report_option(report_options, ReportOptions.CACHE_MAX_MB,
+                ProcessingConstants.REPORT_CACHE_MAX_MB.value) * 1024 * 1024)
+
+        if isinstance(html_table_list, StreamedHtmlTables):
+            # the page is assembled around the placeholder of the tables, which are then copied in its place
+            with profile_stage('page_assembly'):
+                html_page = populate_report_page([HtmlTemplateKeywords.RESULTS_TABLE.value], gnb_commit_info,
+                    gnb_commit_hash, gnb_srn_number, job_id_awx, job_id_jenkins, job_start_time, oai_repo_url,
+                    jenkins_job_url, ue_test_outcome_list, report_options)
+                page_head, page_tail = html_page.split(HtmlTemplateKeywords.RESULTS_TABLE.value, 1)
+
+            with profile_stage('page_write') as stage_record:
+                write_streamed_html_report(page_head, html_table_list, page_tail, results_dir)
+                if stage_record is not None:
+                    stage_record['bytes_out'] = get_file_size(results_dir, 'test_summary.html')
+
+            used_figure_assets = html_table_list.figure_assets
         else:
-            logging.warning('Skipping test history file update because of test regression')
+            with profile_stage('page_assembly') as stage_record:
+                html_page = populate_report_page(html_table_list, gnb_commit_info, gnb_commit_hash,
+                    gnb_srn_number, job_id_awx, job_id_jenkins, job_start_time, oai_repo_url, jenkins_job_url,
+                    ue_test_outcome_list, report_options)
+                if stage_record is not None:
+                    stage_record['bytes_out'] = len(html_page)
+
+            with profile_stage('page_write') as stage_record:
+                write_html_report(html_page, results_dir)
+                if stage_record is not None:
+                    stage_record['bytes_out'] = get_file_size(results_dir, 'test_summary.html')
 
-    html_page = populate_report_page(html_table_list, gnb_commit_info, gnb_commit_hash,
-        gnb_srn_number, job_id_awx, job_id_jenkins, job_start_time, oai_repo_url, jenkins_job_url)
-    write_html_report(html_page, results_dir)
+            used_figure_assets = get_figure_asset_names(html_page) if figure_assets_dir else set()
+    finally:
+        if isinstance(html_table_list, StreamedHtmlTables):
+            html_table_list.close()
+
+    if figure_assets_dir:
+        remove_unused_figure_assets(used_figure_assets, figure_assets_dir)
 
 
 # split results in the form of {'udp': {'5': {...}, '10': {...}}} in the form
@@ -494,45 +886,140 @@ def split_multiple_reports(json_data: dict) -> list:
     return output_list
 
 
-def process_ue_json_report(ue_num: int, json_reports: list, git_commit_info: str,
-    srn_number: str, results_dir: str, history_dir: str, history_update_list: dict) -> str:
+# cached reports are only used if they were rendered against the current test history
+# html of all the figures of a rendered report
+def get_rendered_report_figures(rendered_report: list) -> str:
+
+    html_figures = []
+    for el in rendered_report:
+        test_results = el[RenderedReportKeys.FIGURE_DATA.value].get(TestKeys.RESULTS.value, dict())
+        for proto_v in test_results.values():
+            for band_v in proto_v.values():
+                for stream_v in band_v.values():
+                    if isinstance(stream_v, list):
+                        html_figures += [x.get(TestKeys.FIGURE.value, '') for x in stream_v]
+
+    return ''.join(html_figures)
+
+
+# figures written in external files must also be still there
+def is_cached_report_current(rendered_report: list, history_backend: str, figure_assets_dir: str=None) -> bool:
+
+    if figure_assets_dir and not are_figure_assets_present(get_rendered_report_figures(rendered_report), figure_assets_dir):
+        return False
+
+    for el in rendered_report:
+        test_history = load_test_history_summary(el[RenderedReportKeys.TEST_HISTORY_FILE.value],
+            el[RenderedReportKeys.TEST_PROTOCOL.value], el[RenderedReportKeys.TEST_DIRECTION.value], history_backend)
+
+        target_rate = el[RenderedReportKeys.TARGET_RATE.value]
+        if get_history_summary_digest(test_history, target_rate) != \
+            get_history_summary_digest(el[RenderedReportKeys.TEST_HISTORY.value], target_rate):
+            return False
+
+    return True
+
+
+# load json report and generate figures for each of the tests it contains.
+# This only depends on its arguments, so that it can be run in worker processes.
+# If a cache directory is passed, reports that were already rendered with the same content, options,
+# and test history are loaded from it
+def render_json_report(json_report: str, results_dir: str, history_dir: str, report_options: dict=None) -> list:
+
+    history_backend = get_report_option(report_options, ReportOptions.HISTORY_BACKEND, HistoryBackends.SQLITE.value)
+    cache_dir = get_report_option(report_options, ReportOptions.CACHE_DIR)
+    figure_assets_dir = get_report_figure_assets_dir(results_dir, report_options)
+
+    report_name = os.path.basename(json_report)
+
+    if cache_dir:
+        render_options = {x.value: get_report_option(report_options, x) for x in RENDER_REPORT_OPTIONS}
+        with profile_stage('cache_load', report=report_name):
+            cache_key = get_report_cache_key(json_report, history_dir, results_dir, render_options)
+
+            rendered_report = load_cached_report(cache_dir, cache_key)
+            cached_report_current = rendered_report is not None and \
+                is_cached_report_current(rendered_report, history_backend, figure_assets_dir)
+
+        if cached_report_current:
+            logging.info('Using cached rendering of JSON report {}'.format(json_report))
+            return rendered_report
 
     regex_expressions_dict = {'iPerf3 Downlink': r'^iperf3_result_\d{8}_\d{6}_DL.*$',
                               'iPerf3 Uplink': r'^iperf3_result_\d{8}_\d{6}_UL.*$'}
 
-    html_table = ''
-    ue_test_pass_outcome = []
-    for j_idx, j_el in enumerate(json_reports):
-        logging.info('Processing JSON report {}'.format(j_el))
+    logging.info('Processing JSON report {}'.format(json_report))
+
+    with profile_stage('json_load', report=report_name, bytes_in=get_file_size(json_report)):
+        json_data_file_content = load_iperf_report(json_report)
+
+    # beautify column name
+    test_type = os.path.basename(json_report)
+    for r_key, r_val in regex_expressions_dict.items():
+        test_type = re.sub(r_val, r_key, test_type)
+
+    # split multiple sequential tests into separate entries
+    json_data_list = split_multiple_reports(json_data_file_content)
 
-        with open(j_el, 'r') as f:
-            json_data_file_content = json.load(f)
+    rendered_report = []
+    for json_data in json_data_list:
+        test_protocol, test_direction, test_history_file, target_rate = get_test_history_filename_3(json_data, test_type, history_dir, results_dir)
+        with profile_stage('history_load', report=report_name):
+            test_history = load_test_history_summary(test_history_file, test_protocol, test_direction, history_backend)
 
-        # split multiple sequential tests into separate entries
-        json_data_list = split_multiple_reports(json_data_file_content)
-        
-        for json_data_idx, json_data in enumerate(json_data_list):
-            # beautify column name
-            test_type = filename = os.path.basename(j_el)
-            for r_key, r_val in regex_expressions_dict.items():
-                test_type = re.sub(r_val, r_key, test_type)
+        with profile_stage('plot_render', report=report_name) as stage_record:
+            json_figure = generate_figures_for_html_report(json_data, test_type, target_rate, test_history, report_options,
+                figure_assets_dir)
+            if stage_record is not None:
+                figure_html = get_rendered_report_figures([{RenderedReportKeys.FIGURE_DATA.value: json_figure}])
+                stage_record['bytes_out'] = len(figure_html)
 
+        rendered_report.append({RenderedReportKeys.FIGURE_DATA.value: json_figure,
+            RenderedReportKeys.TARGET_RATE.value: target_rate,
+            RenderedReportKeys.TEST_DIRECTION.value: test_direction,
+            RenderedReportKeys.TEST_HISTORY.value: test_history,
+            RenderedReportKeys.TEST_HISTORY_FILE.value: test_history_file,
+            RenderedReportKeys.TEST_PROTOCOL.value: test_protocol})
+
+    if cache_dir:
+        store_cached_report(cache_dir, cache_key, rendered_report)
+
+    return rendered_report
+
+
+def process_ue_json_report(ue_num: int, json_reports: list, git_commit_info: str,
+    srn_number: str, results_dir: str, history_dir: str, history_update_list: dict,
+    rendered_reports: list=None, report_options: dict=None) -> tuple:
+
+    # render reports here if this was not done beforehand
+    if rendered_reports is None:
+        rendered_reports = [render_json_report(j_el, results_dir, history_dir, report_options) for j_el in json_reports]
+
+    html_table = ''
+    ue_test_pass_outcome = []
+    for j_idx, j_el in enumerate(rendered_reports):
+        for json_data_idx, json_data in enumerate(j_el):
             # determine whether this is the first or last table to be printed for the current user
             is_user_first_table = (j_idx == 0) and (json_data_idx == 0)
-            is_user_last_table = (j_idx == len(json_reports) - 1) and (json_data_idx == len(json_data_list) - 1)
-
-            test_protocol, test_direction, test_history_file, target_rate = get_test_history_filename_3(json_data, test_type, history_dir, results_dir)
-            df_test_history = load_test_history_data(test_history_file, test_protocol, test_direction)
+            is_user_last_table = (j_idx == len(rendered_reports) - 1) and (json_data_idx == len(j_el) - 1)
 
-            json_figure = generate_figures_for_html_report(json_data, test_type, target_rate, df_test_history)
-            new_html_table, df, ue_test_passed = generate_html_table(ue_num, json_figure, git_commit_info,
-                df_test_history, srn_number, ue_test_pass_outcome, results_dir, is_user_first_table, is_user_last_table)
+            test_history = json_data[RenderedReportKeys.TEST_HISTORY.value]
+            with profile_stage('table_build', ue=ue_num) as stage_record:
+                new_html_table, df, ue_test_passed = generate_html_table(ue_num, json_data[RenderedReportKeys.FIGURE_DATA.value],
+                    git_commit_info, test_history, srn_number, ue_test_pass_outcome, results_dir, is_user_first_table,
+                    is_user_last_table, report_options)
+                if stage_record is not None:
+                    stage_record['bytes_out'] = len(new_html_table)
 
             # bring this out of this function so we update the history results at the end
             # and the threshold is the same for all the UEs in this test
-            history_update_list.append({HistoryUpdateKeys.TEST_DATAFRAME.value: df.copy(deep=True),
-                HistoryUpdateKeys.TEST_DIRECTION.value: test_direction,
-                HistoryUpdateKeys.TEST_HISTORY_FILE.value: test_history_file,
+            # only the values stored in the history are kept, instead of the whole table with its figures
+            test_protocol = json_data[RenderedReportKeys.TEST_PROTOCOL.value]
+            test_direction = json_data[RenderedReportKeys.TEST_DIRECTION.value]
+            history_update_list.append({HistoryUpdateKeys.TEST_DIRECTION.value: test_direction,
+                HistoryUpdateKeys.TEST_HISTORY_FILE.value: json_data[RenderedReportKeys.TEST_HISTORY_FILE.value],
+                HistoryUpdateKeys.TEST_HISTORY_ROW.value: get_test_history_row(df, test_protocol, test_direction)
+                    if ue_test_passed else None,
                 HistoryUpdateKeys.TEST_PROTOCOL.value: test_protocol,
                 HistoryUpdateKeys.TEST_PASS_STATUS.value: ue_test_passed})
 
@@ -540,7 +1027,8 @@ def process_ue_json_report(ue_num: int, json_reports: list, git_commit_info: str
 
     # only add test info if it was not added while processing the reports, e.g., if no reports were found
     if not html_table:
-        new_html_table, _, _ = generate_html_table(ue_num, dict(), git_commit_info, None, srn_number, ue_test_pass_outcome, results_dir, True, True)
+        new_html_table, _, _ = generate_html_table(ue_num, dict(), git_commit_info, None, srn_number, ue_test_pass_outcome, results_dir, True, True,
+            report_options)
         html_table += new_html_table
 
-    return html_table
+    return html_table, all(ue_test_pass_outcome)
@@ -0,0 +1,223 @@
+import warnings
+
+from iperf_json_reader import IntervalColumns
+
+# percentiles computed for every metric
+STATS_PERCENTILES = [5, 50, 95]
+
+X_FIELD = 'end'
+
+
+# values of all the metrics of all the streams of a test, stored as a single array of
+# shape (streams, metrics, intervals), together with their statistics of shape (streams, metrics),
+# and the number of stalled intervals of each stream.
+# When streams are aggregated, the aggregate is the only stream, and the values of the
+# individual streams are kept in stream_x and stream_values
+class IntervalStats:
+
+    def __init__(self, metrics: list):
+        self.metrics = metrics
+        self.metric_idx = {x: x_idx for x_idx, x in enumerate(metrics)}
+        self.x = None
+        self.values = None
+        self.present = None
+        self.stream_x = None
+        self.stream_values = None
+        self.mean = None
+        self.max = None
+        self.percentiles = None
+        self.std = None
+        self.stalled_intervals = None
+
+    def get_stream_count(self) -> int:
+        return self.values.shape[0]
+
+    def has_metric(self, stream_id: int, metric: str) -> bool:
+        return metric in self.metric_idx and bool(self.present[stream_id, self.metric_idx[metric]])
+
+    def get_series(self, stream_id: int, metric: str) -> tuple:
+        return self.x[stream_id], self.values[stream_id, self.metric_idx[metric]]
+
+    def get_mean(self, stream_id: int, metric: str) -> float:
+        return float(self.mean[stream_id, self.metric_idx[metric]])
+
+    def get_max(self, stream_id: int, metric: str) -> float:
+        return float(self.max[stream_id, self.metric_idx[metric]])
+
+    def get_percentile(self, stream_id: int, metric: str, percentile: int) -> float:
+        return float(self.percentiles[STATS_PERCENTILES.index(percentile), stream_id, self.metric_idx[metric]])
+
+    def get_std(self, stream_id: int, metric: str) -> float:
+        return float(self.std[stream_id, self.metric_idx[metric]])
+
+    def get_stalled_intervals(self, stream_id: int) -> int:
+        return int(self.stalled_intervals[stream_id])
+
+    # statistics of a single stream, as the only stream of the returned object, so that it can be
+    # sent to a worker process without the values of the other streams
+    def get_stream_stats(self, stream_id: int):
+        stream_stats = IntervalStats(self.metrics)
+        for el in ['x', 'values', 'present', 'mean', 'max', 'std', 'stalled_intervals']:
+            setattr(stream_stats, el, getattr(self, el)[stream_id:stream_id + 1])
+        stream_stats.percentiles = self.percentiles[:, stream_id:stream_id + 1]
+        return stream_stats
+
+    # series of the individual streams that make up the aggregate, as (streams, intervals) arrays
+    def get_stream_series(self, metric: str) -> tuple:
+        return self.stream_x, self.stream_values[:, self.metric_idx[metric]]
+
+
+# numeric columns of a stream, either already parsed or from the per-interval dictionaries of the iperf3 output
+def get_stream_columns(intervals, stream_id: int, fields: list) -> dict:
+    import numpy as np
+
+    if isinstance(intervals, IntervalColumns):
+        return intervals.streams[stream_id]
+
+    stream_columns = dict()
+    for el in fields:
+        if any([el in x['streams'][stream_id] for x in intervals]):
+            stream_columns[el] = np.array([x['streams'][stream_id].get(el, float('nan')) for x in intervals], dtype=np.float64)
+
+    return stream_columns
+
+
+# numeric columns of the interval sums reported by iperf3
+def get_sum_columns(intervals, fields: list) -> dict:
+    import numpy as np
+
+    if isinstance(intervals, IntervalColumns):
+        return intervals.sum
+
+    sum_columns = dict()
+    for el in fields:
+        if any([el in x.get('sum', dict()) for x in intervals]):
+            sum_columns[el] = np.array([x.get('sum', dict()).get(el, float('nan')) for x in intervals], dtype=np.float64)
+
+    return sum_columns
+
+
+# combine the values of all the streams into a single stream in one pass: summed_metrics are added up
+# and the other metrics, e.g., round-trip times, are averaged across streams.
+# Sums reported by iperf3 are used instead for the metrics they include
+def aggregate_streams(intervals, x, values, present, metrics: list, corrections: dict, summed_metrics: list) -> tuple:
+    import numpy as np
+
+    nan_mask = np.isnan(values)
+    all_nan = nan_mask.all(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        summed_values = np.where(all_nan, np.nan, np.where(nan_mask, 0, values).sum(axis=0))
+        averaged_values = np.nanmean(values, axis=0)
+
+    is_summed = np.array([el in summed_metrics for el in metrics], dtype=bool)
+    aggregate_values = np.where(is_summed[:, np.newaxis], summed_values, averaged_values)
+
+    sum_columns = get_sum_columns(intervals, metrics + [X_FIELD])
+    for m_idx, m_val in enumerate(metrics):
+        if m_val in sum_columns:
+            aggregate_values[m_idx] = sum_columns[m_val] * corrections.get(m_val, 1)
+
+    if X_FIELD in sum_columns:
+        aggregate_x = sum_columns[X_FIELD]
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            aggregate_x = np.nanmax(x, axis=0) if len(x) else np.full(x.shape[1:], np.nan)
+
+    aggregate_present = present.any(axis=0)
+    aggregate_values[~aggregate_present] = np.nan
+
+    return aggregate_x[np.newaxis], aggregate_values[np.newaxis], aggregate_present[np.newaxis]
+
+
+# gather metrics of all the streams in a single array, scale them by their unit corrections in a single
+# broadcast, and compute their statistics along the intervals at once.
+# Intervals in which stall_metric is not above stall_threshold are counted as stalled.
+# If summed_metrics is passed, statistics are computed on the aggregate of all the streams
+def compute_interval_stats(intervals, n_streams: int, metrics: list, corrections: dict, stall_metric: str=None,
+                           stall_threshold: float=0, summed_metrics: list=None) -> IntervalStats:
+    import numpy as np
+
+    interval_stats = IntervalStats(metrics)
+    n_intervals = len(intervals)
+
+    # intervals are the last axis, so that reductions run over contiguous memory
+    values = np.full((n_streams, len(metrics), n_intervals), np.nan)
+    x = np.full((n_streams, n_intervals), np.nan)
+    present = np.zeros((n_streams, len(metrics)), dtype=bool)
+
+    for stream_id in range(n_streams):
+        stream_columns = get_stream_columns(intervals, stream_id, metrics + [X_FIELD])
+        if X_FIELD in stream_columns:
+            x[stream_id] = stream_columns[X_FIELD]
+
+        for m_idx, m_val in enumerate(metrics):
+            if m_val in stream_columns:
+                values[stream_id, m_idx] = stream_columns[m_val]
+                present[stream_id, m_idx] = True
+
+    values *= np.array([corrections.get(x, 1) for x in metrics], dtype=np.float64)[np.newaxis, :, np.newaxis]
+
+    if summed_metrics is not None:
+        interval_stats.stream_x = x
+        interval_stats.stream_values = values
+        x, values, present = aggregate_streams(intervals, x, values, present, metrics, corrections, summed_metrics)
+        n_streams = 1
+
+    interval_stats.x = x
+    interval_stats.values = values
+    interval_stats.present = present
+
+    # metrics without values have nan statistics
+    nan_mask = np.isnan(values)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        if nan_mask.any():
+            interval_stats.mean = np.nanmean(values, axis=2)
+            interval_stats.std = np.nanstd(values, axis=2, ddof=1)
+        else:
+            interval_stats.mean = values.mean(axis=2)
+            interval_stats.std = values.std(axis=2, ddof=1)
+
+    interval_stats.max, interval_stats.percentiles = compute_sorted_stats(values, np.sum(~nan_mask, axis=2), STATS_PERCENTILES)
+
+    if stall_metric in interval_stats.metric_idx:
+        interval_stats.stalled_intervals = np.sum(values[:, interval_stats.metric_idx[stall_metric]] <= stall_threshold, axis=1)
+    else:
+        interval_stats.stalled_intervals = np.zeros(n_streams, dtype=np.int64)
+
+    return interval_stats
+
+
+# max and percentiles (with linear interpolation, as numpy.nanpercentile) of the values along the intervals.
+# Values are sorted once, with nans at the end, instead of partitioning them again for every percentile
+def compute_sorted_stats(values, counts, percentiles: list) -> tuple:
+    import numpy as np
+
+    if values.shape[2] == 0:
+        return np.full(counts.shape, np.nan), np.full((len(percentiles),) + counts.shape, np.nan)
+
+    sorted_values = np.sort(values, axis=2)
+    last_idx = np.maximum(counts - 1, 0)
+
+    stats_max = np.take_along_axis(sorted_values, last_idx[..., np.newaxis], axis=2)[..., 0]
+
+    position = np.array(percentiles, dtype=np.float64)[:, np.newaxis, np.newaxis] / 100 * last_idx[np.newaxis]
+    lower_idx = np.floor(position).astype(np.int64)
+    upper_idx = np.minimum(lower_idx + 1, last_idx[np.newaxis])
+
+    sorted_values = np.broadcast_to(sorted_values, (len(percentiles),) + sorted_values.shape)
+    lower_values = np.take_along_axis(sorted_values, lower_idx[..., np.newaxis], axis=3)[..., 0]
+    upper_values = np.take_along_axis(sorted_values, upper_idx[..., np.newaxis], axis=3)[..., 0]
+
+    # interpolate from the closest of the two values, as numpy does
+    weight = position - lower_idx
+    values_diff = upper_values - lower_values
+    stats_percentiles = np.where(weight >= 0.5, upper_values - values_diff * (1 - weight), lower_values + values_diff * weight)
+
+    # metrics without values
+    stats_max = np.where(counts > 0, stats_max, np.nan)
+    stats_percentiles = np.where(counts[np.newaxis] > 0, stats_percentiles, np.nan)
+
+    return stats_max, stats_percentiles
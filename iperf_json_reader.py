@@ -0,0 +1,210 @@
+from array import array
+import importlib.util
+import json
+import logging
+import os
+
+INTERVALS_KEY = 'intervals'
+STREAMS_KEY = 'streams'
+SUM_KEY = 'sum'
+
+# fields of every stream of an interval
+INTERVAL_STREAM_KEYS = ('bits_per_second', 'end', 'start')
+
+# reports at least this large are parsed as a stream of events, so that memory does not depend on
+# the size of the json text. Smaller reports are parsed faster by the json module
+STREAMING_PARSER_MIN_BYTES = 64 * 1024 * 1024
+
+
+# per-interval values of an iperf3 test, stored as one numeric array per stream and field
+class IntervalColumns:
+
+    def __init__(self):
+        self.length = 0
+        self.streams = []
+        self.sum = dict()
+
+    def __len__(self):
+        return self.length
+
+
+# growable typed columns of a single stream (or of the interval sums), kept aligned on the interval index
+class ColumnBuilder:
+
+    def __init__(self):
+        self.columns = dict()
+
+    def add(self, interval_idx: int, field: str, value) -> None:
+
+        if field not in self.columns:
+            # fields first seen after the first interval are padded for the previous intervals
+            self.columns[field] = array('d', [float('nan')] * interval_idx)
+
+        column = self.columns[field]
+
+        # pad intervals in which the field was missing
+        if len(column) < interval_idx:
+            column.extend([float('nan')] * (interval_idx - len(column)))
+
+        column.append(float(value))
+
+    def finalize(self, length: int) -> dict:
+        import numpy as np
+
+        output_columns = dict()
+        for field, column in self.columns.items():
+            if len(column) < length:
+                column.extend([float('nan')] * (length - len(column)))
+            output_columns[field] = np.frombuffer(column, dtype=np.float64)
+
+        return output_columns
+
+
+# ijson is optional, and only imported when parsing large reports
+def is_ijson_available() -> bool:
+    return importlib.util.find_spec('ijson') is not None
+
+
+def is_intervals_prefix(prefix: str) -> bool:
+    return prefix == INTERVALS_KEY or prefix.endswith('.{}'.format(INTERVALS_KEY))
+
+
+def set_nested_value(data, path: list, value) -> None:
+    for key in path[:-1]:
+        data = data[int(key)] if isinstance(data, list) else data[key]
+
+    if isinstance(data, list):
+        data[int(path[-1])] = value
+    else:
+        data[path[-1]] = value
+
+
+# per-interval data has a sum and a non-empty list of streams, each of them with its own time span.
+# Streams of the end summary are nested in sender and receiver objects, and have no such fields
+def is_interval_data(data: dict) -> bool:
+
+    streams = data.get(STREAMS_KEY)
+    if not isinstance(streams, list) or len(streams) <= 0 or not isinstance(data.get(SUM_KEY), dict):
+        return False
+
+    return all(isinstance(x, dict) and all(y in x for y in INTERVAL_STREAM_KEYS) for x in streams)
+
+
+# parse a json report with the json module, collecting intervals[*].streams[*] and intervals[*].sum
+# into numeric columns as soon as each interval is decoded, so that interval objects are discarded right away
+def parse_iperf_report(f) -> dict:
+
+    interval_state = {'interval_idx': 0, 'stream_builders': [], 'sum_builder': ColumnBuilder()}
+
+    def object_hook(data: dict):
+
+        streams = data.get(STREAMS_KEY)
+
+        if is_interval_data(data):
+            interval_idx = interval_state['interval_idx']
+            stream_builders = interval_state['stream_builders']
+
+            for stream_idx, stream in enumerate(streams):
+                if stream_idx >= len(stream_builders):
+                    stream_builders.append(ColumnBuilder())
+                for field, value in stream.items():
+                    if isinstance(value, (int, float)):
+                        stream_builders[stream_idx].add(interval_idx, field, value)
+
+            for field, value in data.get(SUM_KEY, dict()).items():
+                if isinstance(value, (int, float)):
+                    interval_state['sum_builder'].add(interval_idx, field, value)
+
+            interval_state['interval_idx'] += 1
+            return None
+
+        # iperf3 output of a test, all of its intervals were decoded
+        if isinstance(data.get(INTERVALS_KEY), list):
+            columns = IntervalColumns()
+            columns.length = interval_state['interval_idx']
+            columns.streams = [x.finalize(columns.length) for x in interval_state['stream_builders']]
+            columns.sum = interval_state['sum_builder'].finalize(columns.length)
+            data[INTERVALS_KEY] = columns
+
+            interval_state['interval_idx'] = 0
+            interval_state['stream_builders'] = []
+            interval_state['sum_builder'] = ColumnBuilder()
+
+        return data
+
+    return json.load(f, object_hook=object_hook)
+
+
+# parse a json report as a stream of events, without building its whole tree nor holding its whole text:
+# intervals[*].streams[*] and intervals[*].sum are written into numeric columns, and everything else is built as usual
+def parse_iperf_report_stream(f) -> dict:
+    import ijson
+
+    builder = ijson.ObjectBuilder()
+    interval_columns = dict()
+
+    intervals_prefix = None
+    item_prefix = streams_prefix = sum_prefix = None
+    interval_idx = stream_idx = 0
+    stream_builders = sum_builder = None
+
+    for prefix, event, value in ijson.parse(f, use_float=True):
+
+        if intervals_prefix is not None and prefix.startswith(item_prefix):
+            if prefix == item_prefix:
+                # end of an interval
+                if event == 'end_map':
+                    interval_idx += 1
+            elif prefix == streams_prefix:
+                if event == 'start_map':
+                    if stream_idx >= len(stream_builders):
+                        stream_builders.append(ColumnBuilder())
+                elif event == 'end_map':
+                    stream_idx += 1
+            elif prefix == streams_prefix[:-len('.item')] and event == 'start_array':
+                stream_idx = 0
+            elif event in ('number', 'boolean'):
+                if prefix.startswith(streams_prefix):
+                    stream_builders[stream_idx].add(interval_idx, prefix[len(streams_prefix) + 1:], value)
+                elif prefix.startswith(sum_prefix):
+                    sum_builder.add(interval_idx, prefix[len(sum_prefix) + 1:], value)
+            continue
+
+        builder.event(event, value)
+
+        if event == 'start_array' and is_intervals_prefix(prefix):
+            intervals_prefix = prefix
+            item_prefix = '{}.item'.format(prefix)
+            streams_prefix = '{}.{}.item'.format(item_prefix, STREAMS_KEY)
+            sum_prefix = '{}.{}'.format(item_prefix, SUM_KEY)
+            interval_idx = stream_idx = 0
+            stream_builders = []
+            sum_builder = ColumnBuilder()
+        elif event == 'end_array' and prefix == intervals_prefix:
+            columns = IntervalColumns()
+            columns.length = interval_idx
+            columns.streams = [x.finalize(interval_idx) for x in stream_builders]
+            columns.sum = sum_builder.finalize(interval_idx)
+            interval_columns[intervals_prefix] = columns
+            intervals_prefix = None
+
+    json_data = builder.value
+
+    # replace the empty interval lists with their columns
+    for prefix, columns in interval_columns.items():
+        set_nested_value(json_data, prefix.split('.'), columns)
+
+    return json_data
+
+
+# load an iperf3 json report, in the form of {'tcp': {'5': {iperf3 output}}}, with the intervals
+# of each test stored as numeric columns instead of lists of dictionaries
+def load_iperf_report(json_report: str, streaming_min_bytes: int=STREAMING_PARSER_MIN_BYTES) -> dict:
+
+    if os.path.getsize(json_report) >= streaming_min_bytes and is_ijson_available():
+        logging.info('Parsing JSON report {} as a stream'.format(json_report))
+        with open(json_report, 'rb') as f:
+            return parse_iperf_report_stream(f)
+
+    with open(json_report, 'r') as f:
+        return parse_iperf_report(f)
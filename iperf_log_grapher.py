@@ -1,21 +1,26 @@
-import base64
+from functools import partial
 from io import BytesIO
 import math
-import matplotlib
-import matplotlib.pyplot as plt
-import pandas as pd
-import seaborn as sns
+import multiprocessing
 
-from constants import DataframeColumns, DataframeMetrics, TestKeys, TestResultKeys
-
-# to use matplotlib outside of the main thread
-matplotlib.use('agg')
+from constants import ChartModes, DataframeMetrics, DecimationModes, HistorySummaryKeys, PlotBackends, ProcessingConstants, \
+    StreamModes, TestKeys, TestPassFailThresholds, TestResultKeys
+from figure_renderer import embed_figure, embed_line_chart, render_line_figure
+from interval_stats import IntervalStats, compute_interval_stats
+from iperf_json_reader import IntervalColumns
+from series_decimation import get_decimation_index
 
 metrics = {
     'tcp': ['bytes', 'bits_per_second', 'snd_cwnd', 'rtt'],
     'udp': ['bytes', 'bits_per_second', 'jitter_ms', 'lost_packets', 'packets', 'lost_percent']
 }
 
+# metric whose intervals with no throughput are counted as stalls
+stall_metric = 'bits_per_second'
+
+# metrics added up when aggregating streams, the others are averaged across streams
+summed_metrics = ['bits_per_second', 'bytes', 'lost_packets', 'packets', 'snd_cwnd']
+
 metrics_dfcolumns_map = {
     'bits_per_second': DataframeMetrics.THROUGHPUT.value,
     'bytes': DataframeMetrics.DATA_TRANSFERRED.value,
@@ -28,126 +33,210 @@ metrics_dfcolumns_map = {
 }
 
 
-def create_stream_df(intervals_dict, stream_id):
-    temp_dict = [line['streams'][stream_id] for line in intervals_dict]
-    df = pd.DataFrame(temp_dict)
-    return df
+name_key = 'name'
+correction_key = 'correction'
+metric_adjustments = {'bits_per_second': {name_key: 'Throughput [Mbps]', correction_key: 1e-6},
+                      'bytes': {name_key: 'Data Transferred [Mbit]', correction_key: 8e-6},
+                      'jitter_ms': {name_key: 'Jitter [ms]', correction_key: 1},
+                      'lost_packets': {name_key: 'Number of Lost Packets', correction_key: 1},
+                      'lost_percent': {name_key: 'Percentage of Lost Packets (%)', correction_key: 1},
+                      'packets': {name_key: 'Total Packets', correction_key: 1},
+                      'snd_cwnd': {name_key: 'TCP Congestion Window [MB]', correction_key: 1e-6},
+                      'rtt': {name_key: 'Round-trip Time [ms]', correction_key: 1e-3}
+}
+
+
+def get_stream_count(intervals_dict) -> int:
+    if isinstance(intervals_dict, IntervalColumns):
+        return len(intervals_dict.streams)
+    return len(intervals_dict[0]['streams'])
+
 
+def get_metric_corrections(protocol: str) -> dict:
+    return {x: metric_adjustments[x][correction_key] for x in metrics[protocol] if x in metric_adjustments}
 
-def create_plots(df, date_time, protocol, band, stream_name, dir_path, figure_extension, target_rate: int=None, df_test_history=None) -> list:
+
+# streams are only rendered by their own worker processes in the main process. Reports rendered by
+# worker processes already use all the cores, and further pools would oversubscribe them
+def use_stream_workers(stream_workers: int, n_streams: int, chart_mode: str) -> bool:
+    return stream_workers > 1 and n_streams > 1 and chart_mode == ChartModes.IMAGE.value and \
+        multiprocessing.parent_process() is None
+
+
+def create_plots(interval_stats: IntervalStats, stream_id: int, date_time, protocol, band, dir_path, figure_extension,
+                 target_rate: int=None, test_history=None, plot_backend: str=PlotBackends.SEABORN.value,
+                 chart_mode: str=ChartModes.IMAGE.value, stream_mode: str=StreamModes.PER_STREAM.value,
+                 decimation: str=DecimationModes.LTTB.value, max_plot_points: int=ProcessingConstants.PLOT_MAX_POINTS.value,
+                 figure_dpi: float=None, figure_colors: int=None, figure_assets_dir: str=None, stream_name=None) -> list:
     saved_figure_path = []
     for metric in metrics[protocol]:
-        if metric in df.columns:
+        if interval_stats.has_metric(stream_id, metric):
             # compute history average and generate plot
-            history_avg = compute_history_average(df_test_history, target_rate, metrics_dfcolumns_map[metric])
-            saved_figure_path.append(plot_and_save(df, date_time, protocol, band, stream_name, metric, dir_path, figure_extension, history_avg))
+            history_avg = compute_history_average(test_history, target_rate, metrics_dfcolumns_map[metric])
+            saved_figure_path.append(plot_and_save(interval_stats, stream_id, date_time, protocol, band, metric, dir_path,
+                figure_extension, history_avg, plot_backend, chart_mode, stream_mode, decimation, max_plot_points,
+                figure_dpi, figure_colors, figure_assets_dir, stream_name))
     return saved_figure_path
 
 
-def compute_history_average(df, target_rate: int, metric: str) -> float:
+# render the charts of a stream in a worker process, from the statistics of that stream only.
+# Figures are named after the stream in the whole test
+def create_stream_plots(stream_plots, stream_task: tuple) -> list:
+    stream_id, stream_stats = stream_task
+    return stream_plots(stream_stats, 0, stream_name=stream_id)
 
-    if len(df.index) <= 0:
-        return float('nan')
 
-    # filter df by target rate
-    df_test_target = df.loc[df[DataframeColumns.TX_RATE.value] == int(target_rate)]
+# history average is looked up in the aggregates precomputed when loading the test history
+def compute_history_average(test_history: dict, target_rate: int, metric: str) -> float:
+
+    if not test_history:
+        return float('nan')
 
     try:
-        history_mean = df_test_target.loc[:, metric].mean()
+        history_mean = test_history[HistorySummaryKeys.MEAN.value][int(target_rate)][metric]
     except KeyError:
-        print('Metric {} not in history dataframe. Skipping it'.format(metric))
         return float('nan')
 
     return history_mean
 
 
-def plot_and_save(df, date_time, protocol, band, stream_name, metric, dir_path, figure_extension, history_avg: float) -> dict:
-
-    name_key = 'name'
-    correction_key = 'correction'
-    plot_adjustments = {'bits_per_second': {name_key: 'Throughput [Mbps]', correction_key: 1e-6},
-                        'bytes': {name_key: 'Data Transferred [Mbit]', correction_key: 8e-6},
-                        'jitter_ms': {name_key: 'Jitter [ms]', correction_key: 1},
-                        'lost_packets': {name_key: 'Number of Lost Packets', correction_key: 1},
-                        'lost_percent': {name_key: 'Percentage of Lost Packets (%)', correction_key: 1},
-                        'packets': {name_key: 'Total Packets', correction_key: 1},
-                        'snd_cwnd': {name_key: 'TCP Congestion Window [MB]', correction_key: 1e-6},
-                        'rtt': {name_key: 'Round-trip Time [ms]', correction_key: 1e-3}
-    }
-
-    # check if metric needs to be adjusted
-    if metric in plot_adjustments.keys():
-        y_label = plot_adjustments[metric][name_key]
-        df[metric] *= plot_adjustments[metric][correction_key]
+# draw a metric of a stream. Values are already scaled to the units of the figure,
+# and their statistics already computed, by the stats stage.
+# In overlay mode, the individual streams are drawn together with their aggregate.
+# Long series are decimated to max_plot_points before being drawn, statistics are those of the full series.
+# Png figures are reduced to a palette of figure_colors colors, if passed.
+# If figure_assets_dir is passed, figures are written in it instead of being embedded in the page.
+# Figures are named after stream_name if passed, and after stream_id otherwise
+def plot_and_save(interval_stats: IntervalStats, stream_id: int, date_time, protocol, band, metric, dir_path, figure_extension,
+                  history_avg: float, plot_backend: str=PlotBackends.SEABORN.value, chart_mode: str=ChartModes.IMAGE.value,
+                  stream_mode: str=StreamModes.PER_STREAM.value, decimation: str=DecimationModes.LTTB.value,
+                  max_plot_points: int=ProcessingConstants.PLOT_MAX_POINTS.value, figure_dpi: float=None,
+                  figure_colors: int=None, figure_assets_dir: str=None, stream_name=None) -> dict:
+
+    if metric in metric_adjustments.keys():
+        y_label = metric_adjustments[metric][name_key]
     else:
         y_label = metric
 
-    sns.set_theme()
-    sns.set_context("paper")
+    x, y = interval_stats.get_series(stream_id, metric)
+    metric_mean = interval_stats.get_mean(stream_id, metric)
+    metric_max = interval_stats.get_max(stream_id, metric)
 
-    plt.subplot(1, 1, 1)
-    sns.lineplot(data=df, x='end', y=metric)
-    plt.axhline(y=df[metric].mean(), color='b', linestyle='--')
-    sns.despine(top=True, right=True, left=True, bottom=True)
-    legend_entries = ['Test', '_Hidden', 'Test Average']
-
-    # plot test history average, if passed
-    if history_avg is not None and not math.isnan(history_avg):
-        plt.axhline(y=history_avg, color='r', linestyle='--')
-        legend_entries.append('Test History Average')
+    # single streams are only drawn if there is more than one
+    if stream_mode == StreamModes.OVERLAY.value and interval_stats.stream_values is not None and \
+            interval_stats.stream_values.shape[0] > 1:
+        import numpy as np
 
-        top_margin = max(df[metric].max(), history_avg) * 1.05 + 0.001
+        stream_series = interval_stats.get_stream_series(metric)
+        # averaged metrics of single streams can be above their aggregate
+        if stream_series[1].size and not math.isnan(metric_max):
+            metric_max = max(metric_max, float(np.nanmax(stream_series[1])))
     else:
-        top_margin = df[metric].max() * 1.05 + 0.001
+        stream_series = None
 
-    plt.xlabel('Time [s]')
-    plt.ylabel(y_label)
-    plt.legend(legend_entries)
-    plt.ylim(top=top_margin, bottom=-0.01)
-
-    plot_name = '{}_{}_band{}Mbps_stream{}_{}'.format(
-        date_time, protocol, band, stream_name, metric)
-    
-    if dir_path:
-        save_path = '{}/{}.{}'.format(dir_path, plot_name, figure_extension)
-        plt.title(plot_name)
+    # leave room above the test history average, if passed
+    if history_avg is not None and not math.isnan(history_avg):
+        top_margin = max(metric_max, history_avg) * 1.05 + 0.001
     else:
-        save_path = BytesIO()
-
-    plt.savefig(save_path, format=figure_extension)
-    plt.clf()
-
-    # encode figure and embed it within html tags
-    encoded_figure = base64.b64encode(save_path.getvalue()).decode('utf-8')
-    html_figure = '<img src=\'data:image/png;base64,{}\'>'.format(encoded_figure)
-
-    metric_mean = df.loc[:, metric].mean()
-    metric_max = df.loc[:, metric].max()
+        top_margin = metric_max * 1.05 + 0.001
+
+    # single streams keep the points of their aggregate, so that they are drawn against the same x values
+    decimation_idx = get_decimation_index(x, y, decimation, max_plot_points)
+    if decimation_idx is not None:
+        x, y = x[decimation_idx], y[decimation_idx]
+        if stream_series is not None:
+            stream_series = (stream_series[0][:, decimation_idx], stream_series[1][:, decimation_idx])
+
+    if chart_mode == ChartModes.INTERACTIVE.value:
+        # only embed the data series, the chart is drawn by the browser
+        html_figure = embed_line_chart(x, y, y_label, metric_mean, history_avg, top_margin, stream_series)
+    else:
+        if interval_stats.stream_values is not None:
+            stream_name = TestResultKeys.ALL_STREAMS.value
+        elif stream_name is None:
+            stream_name = stream_id
+
+        plot_name = '{}_{}_band{}Mbps_stream{}_{}'.format(
+            date_time, protocol, band, stream_name, metric)
+
+        if dir_path:
+            save_path = '{}/{}.{}'.format(dir_path, plot_name, figure_extension)
+            plot_title = plot_name
+        else:
+            save_path = BytesIO()
+            plot_title = None
+
+        render_line_figure(save_path, figure_extension, x, y, y_label, metric_mean,
+            history_avg, top_margin, plot_title, plot_backend, stream_series, figure_dpi)
+
+        # encode figure and embed it within html tags
+        html_figure = embed_figure(save_path.getvalue(), figure_extension, figure_colors, figure_assets_dir)
+
+    # stalls are only reported for the throughput
+    if metric == stall_metric:
+        stalled_intervals = interval_stats.get_stalled_intervals(stream_id)
+    else:
+        stalled_intervals = ''
 
-    output_dict = {TestKeys.METRIC.value: plot_adjustments[metric][name_key],
+    output_dict = {TestKeys.METRIC.value: y_label,
                    TestKeys.METRIC_MEAN.value: metric_mean,
-                   TestKeys.METRIC_MAX.value: metric_max,
+                   TestKeys.METRIC_MAX.value: interval_stats.get_max(stream_id, metric),
+                   TestKeys.METRIC_P5.value: interval_stats.get_percentile(stream_id, metric, 5),
+                   TestKeys.METRIC_P50.value: interval_stats.get_percentile(stream_id, metric, 50),
+                   TestKeys.METRIC_P95.value: interval_stats.get_percentile(stream_id, metric, 95),
+                   TestKeys.METRIC_STD.value: interval_stats.get_std(stream_id, metric),
+                   TestKeys.STALLED_INTERVALS.value: stalled_intervals,
                    TestKeys.FIGURE.value: html_figure
     }
 
     return output_dict
 
 
-def grapher(json_dict, date_time, dir_path, figure_extension='pdf', test_type='', target_rate: int=None, df_test_history=None) -> dict:
+# with stream_mode sum or overlay, all the streams of a test are aggregated and drawn on a single chart per metric.
+# Otherwise, the charts of each stream are rendered in parallel if more than one stream worker is requested,
+# by a pool scoped to the test that only receives the statistics of the stream each worker draws
+def grapher(json_dict, date_time, dir_path, figure_extension='pdf', test_type='', target_rate: int=None, test_history=None,
+            plot_backend: str=PlotBackends.SEABORN.value, chart_mode: str=ChartModes.IMAGE.value,
+            stream_mode: str=StreamModes.PER_STREAM.value, stream_workers: int=1, decimation: str=DecimationModes.LTTB.value,
+            max_plot_points: int=ProcessingConstants.PLOT_MAX_POINTS.value, figure_dpi: float=None,
+            figure_colors: int=None, figure_assets_dir: str=None) -> dict:
     protocol_dict = dict()
     for protocol in json_dict:
         band_dict = dict()
         for band in json_dict[protocol]:
             stream_dict = dict()
             try:
-                n_streams = len(json_dict[protocol][band]
-                                ['intervals'][0]['streams'])
-
-                for stream_id in range(n_streams):
-                    df = create_stream_df(json_dict[protocol][band]['intervals'], stream_id)
-
-                    stream_key = '{}{}'.format(TestResultKeys.STREAM.value, stream_id)
-                    stream_dict[stream_key] = create_plots(df, date_time, protocol, band, stream_id, dir_path, figure_extension, target_rate, df_test_history)
+                intervals = json_dict[protocol][band]['intervals']
+                n_streams = get_stream_count(intervals)
+
+                # statistics of all the streams and metrics of the test, computed at once
+                if stream_mode == StreamModes.PER_STREAM.value:
+                    interval_stats = compute_interval_stats(intervals, n_streams, metrics[protocol],
+                        get_metric_corrections(protocol), stall_metric, TestPassFailThresholds.STALL_THROUGHPUT.value)
+                    stream_keys = ['{}{}'.format(TestResultKeys.STREAM.value, x) for x in range(n_streams)]
+                else:
+                    interval_stats = compute_interval_stats(intervals, n_streams, metrics[protocol],
+                        get_metric_corrections(protocol), stall_metric, TestPassFailThresholds.STALL_THROUGHPUT.value,
+                        summed_metrics)
+                    stream_keys = ['{}{}'.format(TestResultKeys.STREAM.value, TestResultKeys.ALL_STREAMS.value)]
+
+                stream_plots = partial(create_plots, date_time=date_time, protocol=protocol, band=band,
+                    dir_path=dir_path, figure_extension=figure_extension, target_rate=target_rate, test_history=test_history,
+                    plot_backend=plot_backend, chart_mode=chart_mode, stream_mode=stream_mode, decimation=decimation,
+                    max_plot_points=max_plot_points, figure_dpi=figure_dpi, figure_colors=figure_colors,
+                    figure_assets_dir=figure_assets_dir)
+
+                if use_stream_workers(stream_workers, len(stream_keys), chart_mode):
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    stream_tasks = [(x, interval_stats.get_stream_stats(x)) for x in range(len(stream_keys))]
+                    with ProcessPoolExecutor(max_workers=min(stream_workers, len(stream_keys))) as stream_executor:
+                        stream_results = list(stream_executor.map(partial(create_stream_plots, stream_plots), stream_tasks))
+                else:
+                    stream_results = [stream_plots(interval_stats, x) for x in range(len(stream_keys))]
+
+                for stream_key, stream_result in zip(stream_keys, stream_results):
+                    stream_dict[stream_key] = stream_result
             except KeyError:
                 # this is to handle iperf error and to mark the test as failed
                 stream_key = '{}{}'.format(TestResultKeys.STREAM.value, TestResultKeys.RESULT_ERROR.value)
@@ -0,0 +1,85 @@
+from functools import lru_cache
+import os
+import re
+
+from constants import HtmlTemplateKeywords
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+HISTORY_TEMPLATE_FILE = os.path.join(TEMPLATE_DIR, 'template_history_page.html')
+PAGE_TEMPLATE_FILE = os.path.join(TEMPLATE_DIR, 'template_test_page.html')
+
+# placeholders of the report page, with the text of the template each of them replaces.
+# The final outcome also replaces the end of the tag it is in, so that it can set the attributes of the tag
+PAGE_TEMPLATE_SLOTS = {x.value: x.value for x in [HtmlTemplateKeywords.ANSIBLE_BUILD_START_TIME,
+                                                  HtmlTemplateKeywords.ANSIBLE_JOB_ID,
+                                                  HtmlTemplateKeywords.GNB_COMMIT,
+                                                  HtmlTemplateKeywords.GNB_SRN_NUMBER,
+                                                  HtmlTemplateKeywords.JENKINS_BUILD_URL,
+                                                  HtmlTemplateKeywords.JENKINS_JOB_ID,
+                                                  HtmlTemplateKeywords.OAI_REPO_URL,
+                                                  HtmlTemplateKeywords.RESULTS_TABLE,
+                                                  HtmlTemplateKeywords.TEST_PASS_CRITERION]}
+PAGE_TEMPLATE_SLOTS[HtmlTemplateKeywords.FINAL_TEST_OUTCOME.value] = '>{}'.format(HtmlTemplateKeywords.FINAL_TEST_OUTCOME.value)
+
+# placeholders of the history trend page
+HISTORY_TEMPLATE_SLOTS = {x.value: x.value for x in [HtmlTemplateKeywords.HISTORY_DIR,
+                                                     HtmlTemplateKeywords.HISTORY_REPORT_TIME,
+                                                     HtmlTemplateKeywords.HISTORY_TRENDS,
+                                                     HtmlTemplateKeywords.HISTORY_WINDOW]}
+
+
+# split the template into its literal segments and the placeholders in between them, in a single pass.
+# Segments are at even positions and placeholders at odd positions of the returned tuple.
+# Longer placeholders are matched first, in case one of them is the prefix of another one
+def compile_template(template: str, template_slots: dict) -> tuple:
+
+    slot_patterns = sorted(template_slots.items(), key=lambda x: len(x[1]), reverse=True)
+    slot_regex = re.compile('|'.join([re.escape(x[1]) for x in slot_patterns]))
+    slot_names = {x[1]: x[0] for x in slot_patterns}
+
+    compiled_template = []
+    segment_start = 0
+    for el in slot_regex.finditer(template):
+        compiled_template.append(template[segment_start:el.start()])
+        compiled_template.append(slot_names[el.group()])
+        segment_start = el.end()
+    compiled_template.append(template[segment_start:])
+
+    return tuple(compiled_template)
+
+
+# the template is compiled once per process, and shared by all the reports generated by it, e.g., in batch mode
+# or by the report service. It is compiled again if the template file is modified
+@lru_cache(maxsize=4)
+def load_compiled_template(template_file: str, template_mtime: int, template_slots: tuple) -> tuple:
+    with open(template_file, 'r') as f:
+        template = f.read()
+    return compile_template(template, dict(template_slots))
+
+
+def get_page_template(template_file: str=PAGE_TEMPLATE_FILE, template_slots: dict=None) -> tuple:
+
+    if template_slots is None:
+        template_slots = PAGE_TEMPLATE_SLOTS
+
+    return load_compiled_template(template_file, os.stat(template_file).st_mtime_ns,
+        tuple(sorted(template_slots.items())))
+
+
+# fill the placeholders of the compiled template with their values, in a single join over the segments.
+# Values can also be lists of strings, which are inserted one after the other
+def render_template(compiled_template: tuple, slot_values: dict) -> str:
+
+    page_parts = []
+    for el_idx, el in enumerate(compiled_template):
+        if el_idx % 2 == 0:
+            page_parts.append(el)
+            continue
+
+        slot_value = slot_values[el]
+        if isinstance(slot_value, str):
+            page_parts.append(slot_value)
+        else:
+            page_parts.extend(slot_value)
+
+    return ''.join(page_parts)
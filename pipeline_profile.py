@@ -0,0 +1,211 @@
+from contextlib import contextmanager
+import csv
+import json
+import logging
+import os
+import threading
+import time
+
+from constants import ProfileHooks
+
+# profile files written next to the report page
+PROFILE_FILE = 'test_summary_profile'
+CPROFILE_FILE = 'test_summary_cprofile.pstats'
+TRACEMALLOC_FILE = 'test_summary_tracemalloc.txt'
+
+# number of allocation sites written by the tracemalloc hook
+TRACEMALLOC_TOP_LINES = 50
+
+PROFILE_RECORD_FIELDS = ['stage', 'ue', 'report', 'pid', 'wall_ms', 'cpu_ms', 'rss_delta_mb', 'process_peak_rss_mb', 'bytes_in',
+                         'bytes_out']
+
+# resident memory of this process, as number of pages in the second field
+STATM_FILE = '/proc/self/statm'
+
+# records of the stages run by the report generated in this thread, None if profiling is disabled.
+# Records are kept per thread, so that the reports generated at the same time by the report service
+# are profiled separately. Worker processes collect the records of their tasks and return them with the task results
+profile_state = threading.local()
+
+
+def get_stage_records():
+    return getattr(profile_state, 'stage_records', None)
+
+
+def is_stage_profile_active() -> bool:
+    return get_stage_records() is not None
+
+
+# peak resident memory of this process since it started, not only during a stage. Linux reports it in kB
+def get_peak_rss_mb() -> float:
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# current resident memory of this process, None where /proc is not available
+def get_rss_mb():
+
+    try:
+        with open(STATM_FILE, 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+# size of the input file of a stage, only read if profiling is enabled
+def get_file_size(dir_path: str, file_name: str=None) -> int:
+
+    if get_stage_records() is None:
+        return 0
+
+    try:
+        return os.path.getsize(os.path.join(dir_path, file_name) if file_name else dir_path)
+    except OSError:
+        return 0
+
+
+def start_stage_profile() -> None:
+    profile_state.stage_records = []
+
+
+# stop profiling and return the records collected since the profile was started
+def stop_stage_profile() -> list:
+    records, profile_state.stage_records = get_stage_records(), None
+    return records or []
+
+
+def add_stage_records(records: list) -> None:
+    stage_records = get_stage_records()
+    if stage_records is not None:
+        stage_records.extend(records)
+
+
+# time the stage run within the context, if profiling is enabled. The record is yielded so that
+# bytes written by the stage can be set once they are known, and it is None if profiling is disabled.
+# Memory is recorded as the change of resident memory over the stage, which is negative if the stage frees memory,
+# and as the peak resident memory of the process so far
+@contextmanager
+def profile_stage(stage: str, ue: int=None, report: str=None, bytes_in: int=0):
+
+    stage_records = get_stage_records()
+    if stage_records is None:
+        yield None
+        return
+
+    record = {'stage': stage, 'ue': ue, 'report': report, 'pid': os.getpid(), 'bytes_in': bytes_in, 'bytes_out': 0}
+    start_rss = get_rss_mb()
+    start_wall_time = time.perf_counter()
+    start_cpu_time = time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall_ms'] = round((time.perf_counter() - start_wall_time) * 1000, 3)
+        record['cpu_ms'] = round((time.process_time() - start_cpu_time) * 1000, 3)
+        end_rss = get_rss_mb()
+        record['rss_delta_mb'] = round(end_rss - start_rss, 1) if start_rss is not None and end_rss is not None else None
+        record['process_peak_rss_mb'] = round(get_peak_rss_mb(), 1)
+        stage_records.append(record)
+
+
+# run function on item collecting its own stage records, so that they can be returned by worker processes.
+# Returns the result of the function and its records
+def run_profiled_task(function, item) -> tuple:
+
+    parent_records, profile_state.stage_records = get_stage_records(), []
+    try:
+        result = function(item)
+    finally:
+        task_records, profile_state.stage_records = profile_state.stage_records, parent_records
+
+    return result, task_records
+
+
+# totals of the records grouped by key. Changes of resident memory are added up, and the peak memory
+# of the process is the largest across records
+def summarize_stage_records(records: list, key: str) -> dict:
+
+    summary = dict()
+    for el in records:
+        if el[key] is None:
+            continue
+
+        el_summary = summary.setdefault(str(el[key]), {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0, 'rss_delta_mb': 0.0,
+                                                       'process_peak_rss_mb': 0.0, 'bytes_in': 0, 'bytes_out': 0})
+        el_summary['calls'] += 1
+        for field in ['wall_ms', 'cpu_ms', 'bytes_in', 'bytes_out']:
+            el_summary[field] += el[field]
+        el_summary['rss_delta_mb'] += el['rss_delta_mb'] or 0
+        el_summary['process_peak_rss_mb'] = max(el_summary['process_peak_rss_mb'], el['process_peak_rss_mb'])
+
+    for el in summary.values():
+        el['wall_ms'] = round(el['wall_ms'], 3)
+        el['cpu_ms'] = round(el['cpu_ms'], 3)
+        el['rss_delta_mb'] = round(el['rss_delta_mb'], 1)
+
+    return summary
+
+
+# write records as csv, one row per stage run, and as json together with their totals per stage and per ue.
+# Stages run within other stages are also part of their totals, e.g., json_load within render
+def write_stage_profile(records: list, results_dir: str) -> None:
+
+    profile_file = os.path.join(results_dir, PROFILE_FILE)
+    profile = {'stages': summarize_stage_records(records, 'stage'),
+               'ues': summarize_stage_records(records, 'ue'),
+               'records': records}
+
+    with open('{}.json'.format(profile_file), 'w') as f:
+        json.dump(profile, f, indent=2)
+
+    with open('{}.csv'.format(profile_file), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=PROFILE_RECORD_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+    logging.info('Report profile written to {}.json'.format(profile_file))
+
+
+# start the optional profiler of the whole report generation in this process.
+# Returns the profiler, to be passed to stop_profile_hook
+def start_profile_hook(profile_hook: str):
+
+    if profile_hook == ProfileHooks.CPROFILE.value:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    if profile_hook == ProfileHooks.TRACEMALLOC.value:
+        import tracemalloc
+
+        tracemalloc.start()
+        return tracemalloc
+
+    return None
+
+
+def stop_profile_hook(profile_hook: str, profiler, results_dir: str) -> None:
+
+    if profiler is None:
+        return
+
+    if profile_hook == ProfileHooks.CPROFILE.value:
+        profiler.disable()
+        profile_file = os.path.join(results_dir, CPROFILE_FILE)
+        profiler.dump_stats(profile_file)
+    else:
+        snapshot = profiler.take_snapshot()
+        _, peak_memory = profiler.get_traced_memory()
+        profiler.stop()
+
+        profile_file = os.path.join(results_dir, TRACEMALLOC_FILE)
+        with open(profile_file, 'w') as f:
+            f.write('Peak traced memory: {:.1f} MB\n'.format(peak_memory / 1024 / 1024))
+            for el in snapshot.statistics('lineno')[:TRACEMALLOC_TOP_LINES]:
+                f.write('{}\n'.format(el))
+
+    logging.info('{} profile written to {}'.format(profile_hook, profile_file))
@@ -1,23 +1,51 @@
 from datetime import datetime
 import logging
+import mmap
 import os.path
 import re
-from trace_dkey import trace
 
 from constants import ProcessingConstants
-from iperf_log_grapher import grapher
+
+# commit hash in the version banner of OAI logs, matched on the raw bytes of the log file within a single line
+OAI_COMMIT_BYTES_REGEX = re.compile(rb'Hash:[ \t]+\w+')
+OAI_COMMIT_REGEX = re.compile(ProcessingConstants.OAI_COMMIT_REGEX.value)
+OAI_LOG_LAYER_INFO_REGEX = re.compile(ProcessingConstants.OAI_LOG_LAYER_INFO.value)
+
+# size of the windows in which the rest of the log is searched, and their overlap
+OAI_COMMIT_SCAN_CHUNK_BYTES = 16 * 1024 * 1024
+OAI_COMMIT_SCAN_OVERLAP_BYTES = 4096
+
+
+# depth-first search of the first path to key through nested dictionaries and lists of dictionaries.
+# Unlike trace_dkey, this does not serialize and parse the whole data, and stops at the first match
+def find_key_path(data: dict, key: str) -> list:
+
+    for data_key, data_value in data.items():
+        if data_key == key:
+            return [data_key]
+
+        if isinstance(data_value, dict):
+            branch_path = find_key_path(data_value, key)
+            if branch_path:
+                return [data_key] + branch_path
+        elif isinstance(data_value, list):
+            for el_idx, el in enumerate(data_value):
+                if isinstance(el, dict):
+                    branch_path = find_key_path(el, key)
+                    if branch_path:
+                        return [data_key, el_idx] + branch_path
+
+    return []
 
 
 def get_date(data: dict) -> tuple:
 
     # get timestamp
-    paths = trace(data, 'time')
-    if paths:
-        for path in paths:
-            timestamp_dict = data
-            for key in path:
-                timestamp_dict = timestamp_dict[key]
-            break
+    path = find_key_path(data, 'time')
+    if path:
+        timestamp_dict = data
+        for key in path:
+            timestamp_dict = timestamp_dict[key]
 
         logging.info(timestamp_dict)
         timestamp = datetime.strptime(timestamp_dict, '%a, %d %b %Y %H:%M:%S %Z')
@@ -34,34 +62,61 @@ def get_date(data: dict) -> tuple:
     return date_now, time_hms, time_now
 
 
-# get git commit data and hash by inspecting OAI gNB or UE log file
-def get_oai_git_commit(dir_path: str, log_file: str) -> tuple:
+# search the commit hash in the mapped log file, first in its head and then, if requested, in the rest of it.
+# Returns the whole line of the first match, or None
+def find_oai_commit_line(log_map, head_bytes: int, full_scan: bool):
+
+    log_size = len(log_map)
+    git_commit = OAI_COMMIT_BYTES_REGEX.search(log_map, 0, min(head_bytes, log_size))
+
+    # each window also covers the end of the previous one, so that a match across two windows is still found
+    chunk_start = head_bytes
+    while git_commit is None and full_scan and chunk_start < log_size:
+        git_commit = OAI_COMMIT_BYTES_REGEX.search(log_map, max(chunk_start - OAI_COMMIT_SCAN_OVERLAP_BYTES, 0),
+            min(chunk_start + OAI_COMMIT_SCAN_CHUNK_BYTES, log_size))
+        chunk_start += OAI_COMMIT_SCAN_CHUNK_BYTES
+
+    if git_commit is None:
+        return None
+
+    # extend match to the whole line, which might go past the end of the searched window
+    line_start = log_map.rfind(b'\n', 0, git_commit.start()) + 1
+    line_end = log_map.find(b'\n', git_commit.start())
+    if line_end < 0:
+        line_end = log_size
+
+    return log_map[line_start:line_end].decode('utf-8', errors='replace')
+
+
+# get git commit data and hash by inspecting OAI gNB or UE log file.
+# The version banner is at the beginning of the log, so only its first head_bytes are searched,
+# unless a full scan of the log is requested
+def get_oai_git_commit(dir_path: str, log_file: str, head_bytes: int=ProcessingConstants.OAI_COMMIT_HEAD_BYTES.value,
+                       full_scan: bool=False) -> tuple:
 
     abs_log_filename = '{}/{}'.format(dir_path, log_file)
 
-    if os.path.exists(abs_log_filename):
-        with open(abs_log_filename, 'r') as f:
-            for line in f:
-                git_commit = re.search(ProcessingConstants.OAI_COMMIT_REGEX.value, line)
-                if git_commit is not None:
-
-                    # get commit data, in the form of
-                    # Version: Branch: HEAD Abrev. Hash: bd721c3bd Date: Tue Jul 30 16:24:27 2024 +0000
-                    git_commit_data = re.sub(ProcessingConstants.OAI_LOG_LAYER_INFO.value, '', line).strip()
-                    
-                    # getcommit hash
-                    git_commit_hash = git_commit.group()
-                    git_commit_hash = git_commit_hash.split(' ')[-1]
-
-                    break
-        if git_commit_data is None:
-            git_commit_data = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
-
-        if git_commit_hash is None:
-            git_commit_hash = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
+    git_commit_data = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
+    git_commit_hash = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
+
+    # empty files cannot be mapped
+    if not os.path.exists(abs_log_filename) or os.path.getsize(abs_log_filename) <= 0:
+        return git_commit_data, git_commit_hash
+
+    with open(abs_log_filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+            line = find_oai_commit_line(log_map, head_bytes, full_scan)
+
+    if line is not None:
+        # get commit data, in the form of
+        # Version: Branch: HEAD Abrev. Hash: bd721c3bd Date: Tue Jul 30 16:24:27 2024 +0000
+        git_commit_data = OAI_LOG_LAYER_INFO_REGEX.sub('', line).strip()
+
+        # get commit hash
+        git_commit_hash = OAI_COMMIT_REGEX.search(line).group()
+        git_commit_hash = git_commit_hash.split(' ')[-1]
     else:
-        git_commit_data = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
-        git_commit_hash = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
+        logging.warning('Git commit not found in {}'.format(abs_log_filename))
 
     return git_commit_data, git_commit_hash
 
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+
+from constants import HistorySummaryKeys
+
+# bump when the content of the cached entries changes, so that old entries are not used anymore
+REPORT_CACHE_VERSION = 3
+REPORT_CACHE_EXTENSION = '.pkl'
+
+FILE_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(FILE_HASH_CHUNK_BYTES), b''):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+# digest of the history aggregates used to render a report, so that reports are rendered again
+# when the history they are compared against changes. Only the averages of the target rate of the test are read
+# when rendering it, so history rows of other target rates do not change the digest
+def get_history_summary_digest(test_history: dict, target_rate: float) -> str:
+    history_mean = test_history[HistorySummaryKeys.MEAN.value].get(int(target_rate))
+    history_json = json.dumps(history_mean, sort_keys=True, default=str)
+    return hashlib.sha256(history_json.encode()).hexdigest()
+
+
+# key of the rendered report, based on the content and name of the json report,
+# and on the options used to render it
+def get_report_cache_key(json_report: str, history_dir: str, results_dir: str, render_options: dict) -> str:
+
+    key_data = {'version': REPORT_CACHE_VERSION,
+                'content': hash_file(json_report),
+                'name': os.path.basename(json_report),
+                'history_dir': os.path.abspath(history_dir),
+                'results_dir': os.path.abspath(results_dir),
+                'options': render_options}
+
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+
+def get_report_cache_file(cache_dir: str, cache_key: str) -> str:
+    return os.path.join(cache_dir, '{}{}'.format(cache_key, REPORT_CACHE_EXTENSION))
+
+
+def load_cached_report(cache_dir: str, cache_key: str):
+
+    cache_file = get_report_cache_file(cache_dir, cache_key)
+
+    try:
+        with open(cache_file, 'rb') as f:
+            rendered_report = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logging.warning('Invalid report cache entry {}. Ignoring it'.format(cache_file))
+        return None
+
+    # mark entry as recently used, entries are evicted from the least recently used
+    try:
+        os.utime(cache_file)
+    except OSError:
+        pass
+
+    return rendered_report
+
+
+def store_cached_report(cache_dir: str, cache_key: str, rendered_report) -> None:
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    cache_file = get_report_cache_file(cache_dir, cache_key)
+    cache_file_tmp = '{}.{}.tmp'.format(cache_file, os.getpid())
+    try:
+        with open(cache_file_tmp, 'wb') as f:
+            pickle.dump(rendered_report, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cache_file_tmp, cache_file)
+    except OSError as e:
+        logging.warning('Could not store report cache entry {}: {}'.format(cache_file, e))
+        if os.path.exists(cache_file_tmp):
+            os.remove(cache_file_tmp)
+
+
+# remove least recently used entries until the cache is not larger than max_bytes
+def evict_report_cache(cache_dir: str, max_bytes: int) -> int:
+
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    cache_entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(REPORT_CACHE_EXTENSION):
+                entry_stat = entry.stat()
+                cache_entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry.path))
+
+    cache_size = sum([x[1] for x in cache_entries])
+    removed_entries = 0
+    for _, entry_size, entry_path in sorted(cache_entries):
+        if cache_size <= max_bytes:
+            break
+
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass
+        cache_size -= entry_size
+        removed_entries += 1
+
+    if removed_entries:
+        logging.info('Removed {} entries from report cache {}'.format(removed_entries, cache_dir))
+
+    return removed_entries
@@ -0,0 +1,342 @@
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+
+from generate_oai_report import generate_report, get_args, set_logger
+
+JOB_FILE_EXTENSION = '.json'
+JOB_QUEUED_SUFFIX = '.queued'
+JOB_DONE_SUFFIX = '.done'
+JOB_FAILED_SUFFIX = '.failed'
+
+# number of finished jobs whose status is kept
+JOB_STATUS_HISTORY = 1000
+
+# seconds after which clients should retry when the queue is full
+RETRY_AFTER_SECONDS = 30
+
+# times a job is run if a worker of the pool dies while rendering its reports, e.g., killed by the oom killer.
+# The history is only updated once all the reports are rendered, so a job can be run again
+JOB_POOL_ATTEMPTS = 2
+
+
+class JobStatus:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+def set_worker_logger() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)-15s %(levelname)-8s %(message)s')
+
+
+def get_service_args():
+    parser = argparse.ArgumentParser(description='Generate reports of jobs submitted over HTTP or through a drop directory')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address the HTTP endpoint listens on')
+    parser.add_argument('--port', type=int, default=8080, help='Port of the HTTP endpoint')
+    parser.add_argument('--drop_dir', type=str, help='Directory polled for job files')
+    parser.add_argument('--poll_interval', type=float, default=2.0, help='Seconds between polls of the drop directory')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of reports generated at the same time')
+    parser.add_argument('--max_queue', type=int, default=16, help='Maximum number of jobs waiting to be processed')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes rendering the test reports')
+    return parser.parse_args()
+
+
+# jobs are either the list of command line arguments of generate_oai_report.py,
+# or a dictionary of argument names and values, e.g., {"results_dir": "path", "commit_full_scan": true}
+def get_job_argv(job_spec) -> list:
+
+    if isinstance(job_spec, list):
+        return [str(x) for x in job_spec]
+
+    if not isinstance(job_spec, dict):
+        raise ValueError('Job must be a list of arguments or a dictionary')
+
+    argv = []
+    for arg_name, arg_value in job_spec.items():
+        if isinstance(arg_value, bool):
+            if arg_value:
+                argv.append('--{}'.format(arg_name))
+        elif arg_value is not None:
+            argv += ['--{}'.format(arg_name), str(arg_value)]
+
+    return argv
+
+
+# profile hooks trace the whole process, i.e., all the jobs running at the same time, so they are not allowed in jobs
+def parse_job(job_spec):
+    try:
+        args = get_args(get_job_argv(job_spec))
+    except SystemExit:
+        # argparse exits on invalid arguments
+        raise ValueError('Invalid job arguments {}'.format(job_spec))
+
+    if args.profile_hook:
+        raise ValueError('Profile hooks cannot be used in service jobs, use generate_oai_report.py instead')
+
+    return args
+
+
+# queue of report jobs, processed by a fixed number of threads. Reports are rendered by a process pool
+# shared by all jobs, so that imports and caches of the workers are kept across jobs
+class ReportService:
+
+    def __init__(self, concurrency: int, max_queue: int, workers: int):
+        self.job_queue = queue.Queue(maxsize=max_queue)
+        self.job_status = OrderedDict()
+        self.job_status_lock = threading.Lock()
+
+        # reports are always rendered in the pool, as figures cannot be drawn by multiple threads at once.
+        # Workers are started from a clean process, since forking the threads of the service could deadlock them
+        self.workers = max(workers, 1)
+        self.executor_lock = threading.Lock()
+        self.executor = self.start_executor()
+
+        self.job_threads = [threading.Thread(target=self.process_jobs, daemon=True) for _ in range(max(concurrency, 1))]
+        for el in self.job_threads:
+            el.start()
+
+    def start_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('forkserver'),
+            initializer=set_worker_logger)
+
+    def get_executor(self):
+        with self.executor_lock:
+            return self.executor
+
+    # replace a pool in which a worker died. All the jobs using it fail at the same time,
+    # so the pool is only replaced by the first of them
+    def restart_executor(self, broken_executor) -> None:
+        with self.executor_lock:
+            if self.executor is not broken_executor:
+                return
+
+            logging.warning('Worker pool is broken. Starting a new one')
+            broken_executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self.start_executor()
+
+    def set_job_status(self, job_id: str, status: str, results_dir: str=None) -> None:
+        with self.job_status_lock:
+            job_status = self.job_status.setdefault(job_id, dict())
+            job_status['status'] = status
+            if results_dir is not None:
+                job_status['results_dir'] = results_dir
+
+            self.job_status.move_to_end(job_id)
+            while len(self.job_status) > JOB_STATUS_HISTORY:
+                self.job_status.popitem(last=False)
+
+    def get_job_status(self, job_id: str):
+        with self.job_status_lock:
+            return self.job_status.get(job_id)
+
+    # add job to the queue, raises queue.Full if too many jobs are waiting
+    def submit(self, args, on_done=None) -> str:
+
+        job_id = uuid.uuid4().hex
+        self.set_job_status(job_id, JobStatus.QUEUED, args.results_dir)
+        try:
+            self.job_queue.put_nowait((job_id, args, on_done))
+        except queue.Full:
+            with self.job_status_lock:
+                self.job_status.pop(job_id, None)
+            raise
+
+        logging.info('Queued job {} for {}'.format(job_id, args.results_dir))
+        return job_id
+
+    # generate the report of a job and call its callback. Errors are logged and mark the job as failed,
+    # so that they do not stop the thread processing the jobs. Jobs whose pool broke are run again in a new pool
+    def run_job(self, job_id: str, args, on_done) -> None:
+
+        self.set_job_status(job_id, JobStatus.RUNNING)
+
+        job_passed = False
+        for attempt in range(JOB_POOL_ATTEMPTS):
+            executor = self.get_executor()
+            try:
+                job_passed = generate_report(args, executor, executor_workers=self.workers)
+                break
+            except BrokenProcessPool:
+                logging.exception('Worker pool of job {} broke (attempt {} of {})'.format(job_id, attempt + 1, JOB_POOL_ATTEMPTS))
+                self.restart_executor(executor)
+            except Exception:
+                logging.exception('Job {} failed'.format(job_id))
+                break
+
+        self.set_job_status(job_id, JobStatus.DONE if job_passed else JobStatus.FAILED)
+        logging.info('Job {} {}'.format(job_id, JobStatus.DONE if job_passed else JobStatus.FAILED))
+
+        if on_done is None:
+            return
+
+        try:
+            on_done(job_passed)
+        except Exception:
+            logging.exception('Completion callback of job {} failed'.format(job_id))
+            self.set_job_status(job_id, JobStatus.FAILED)
+
+    def process_jobs(self) -> None:
+
+        while True:
+            job_id, args, on_done = self.job_queue.get()
+            try:
+                self.run_job(job_id, args, on_done)
+            except Exception:
+                logging.exception('Job {} failed'.format(job_id))
+            finally:
+                self.job_queue.task_done()
+
+    def shutdown(self) -> None:
+        self.get_executor().shutdown(wait=False, cancel_futures=True)
+
+
+def get_request_handler(report_service: ReportService):
+
+    class ReportRequestHandler(BaseHTTPRequestHandler):
+
+        def send_json(self, code: int, data: dict, headers: dict=None) -> None:
+            body = json.dumps(data).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for h_key, h_val in (headers or dict()).items():
+                self.send_header(h_key, h_val)
+            self.end_headers()
+            self.wfile.write(body)
+
+        # submit a job, e.g., curl -X POST -d '{"results_dir": "path/to/reservation"}' localhost:8080/jobs
+        def do_POST(self) -> None:
+
+            if self.path.rstrip('/') != '/jobs':
+                self.send_json(404, {'error': 'not found'})
+                return
+
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+                args = parse_job(json.loads(self.rfile.read(content_length)))
+            except ValueError as e:
+                self.send_json(400, {'error': str(e)})
+                return
+
+            try:
+                job_id = report_service.submit(args)
+            except queue.Full:
+                self.send_json(503, {'error': 'job queue is full'}, {'Retry-After': str(RETRY_AFTER_SECONDS)})
+                return
+
+            self.send_json(202, {'job_id': job_id, 'status': JobStatus.QUEUED})
+
+        def do_GET(self) -> None:
+
+            path = self.path.rstrip('/').split('/')
+            if len(path) != 3 or path[1] != 'jobs':
+                self.send_json(404, {'error': 'not found'})
+                return
+
+            job_status = report_service.get_job_status(path[2])
+            if job_status is None:
+                self.send_json(404, {'error': 'unknown job'})
+            else:
+                self.send_json(200, dict(job_status, job_id=path[2]))
+
+        def log_message(self, format, *args) -> None:
+            logging.info('HTTP {} {}'.format(self.address_string(), format % args))
+
+    return ReportRequestHandler
+
+
+def get_job_file_callback(job_file: str, queued_file: str):
+    def on_done(job_passed: bool):
+        os.replace(queued_file, '{}{}'.format(job_file, JOB_DONE_SUFFIX if job_passed else JOB_FAILED_SUFFIX))
+    return on_done
+
+
+# queue the job of a job file. Returns False if the queue is full, and the file is left in the drop directory
+def queue_job_file(report_service: ReportService, job_file: str) -> bool:
+
+    try:
+        with open(job_file, 'r') as f:
+            args = parse_job(json.load(f))
+    except (OSError, ValueError) as e:
+        logging.error('Invalid job file {}: {}'.format(job_file, e))
+        os.replace(job_file, '{}{}'.format(job_file, JOB_FAILED_SUFFIX))
+        return True
+
+    queued_file = '{}{}'.format(job_file, JOB_QUEUED_SUFFIX)
+    os.replace(job_file, queued_file)
+    try:
+        report_service.submit(args, get_job_file_callback(job_file, queued_file))
+    except queue.Full:
+        os.replace(queued_file, job_file)
+        return False
+
+    return True
+
+
+# poll the drop directory for job files. Files are renamed while queued, and once processed, so that
+# they are picked up only once. When the queue is full, files are left in the directory until the next poll.
+# Errors on the directory or on a job file are logged, and the directory is polled again
+def watch_drop_dir(report_service: ReportService, drop_dir: str, poll_interval: float) -> None:
+
+    while True:
+        try:
+            with os.scandir(drop_dir) as it:
+                job_files = sorted([x.path for x in it if x.is_file() and x.name.endswith(JOB_FILE_EXTENSION)])
+        except OSError as e:
+            logging.error('Cannot read drop directory {}: {}'.format(drop_dir, e))
+            job_files = []
+
+        for el in job_files:
+            if report_service.job_queue.full():
+                break
+
+            try:
+                if not queue_job_file(report_service, el):
+                    break
+            except Exception:
+                logging.exception('Cannot queue job file {}'.format(el))
+
+        time.sleep(poll_interval)
+
+
+def main() -> None:
+
+    # set logger
+    log_filename = os.path.basename(__file__).replace('.py', '.log')
+    set_logger(log_filename)
+
+    service_args = get_service_args()
+    report_service = ReportService(service_args.concurrency, service_args.max_queue, service_args.workers)
+
+    if service_args.drop_dir:
+        os.makedirs(service_args.drop_dir, exist_ok=True)
+        threading.Thread(target=watch_drop_dir, args=(report_service, service_args.drop_dir, service_args.poll_interval),
+            daemon=True).start()
+        logging.info('Watching drop directory {}'.format(service_args.drop_dir))
+
+    server = ThreadingHTTPServer((service_args.host, service_args.port), get_request_handler(report_service))
+    logging.info('Listening on {}:{}'.format(service_args.host, service_args.port))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info('Shutting down')
+    finally:
+        server.server_close()
+        report_service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import fnmatch
+import json
+import logging
+import os
+
+from constants import ProcessingConstants
+
+MANIFEST_VERSION = 2
+
+MANIFEST_DIRECTORIES_KEY = 'directories'
+MANIFEST_FILES_KEY = 'files'
+MANIFEST_MTIME_KEY = 'mtime_ns'
+MANIFEST_SUBDIRS_KEY = 'subdirs'
+MANIFEST_VERSION_KEY = 'version'
+
+
+def is_results_file(name: str) -> bool:
+    return name in [ProcessingConstants.OAI_GNB_LOG_FILE.value, ProcessingConstants.OAI_UE_LOG_FILE.value] or \
+        fnmatch.fnmatch(name, ProcessingConstants.UE_JSON_PATTERN.value)
+
+
+def load_scan_manifest(manifest_file: str) -> dict:
+
+    if not manifest_file or not os.path.exists(manifest_file):
+        return dict()
+
+    try:
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        logging.warning('Invalid scan manifest {}. Scanning the whole results directory'.format(manifest_file))
+        return dict()
+
+    if manifest.get(MANIFEST_VERSION_KEY) != MANIFEST_VERSION:
+        return dict()
+
+    return manifest.get(MANIFEST_DIRECTORIES_KEY, dict())
+
+
+def write_scan_manifest(manifest_file: str, directories: dict) -> None:
+
+    manifest_file_tmp = '{}.{}.tmp'.format(manifest_file, os.getpid())
+    with open(manifest_file_tmp, 'w') as f:
+        json.dump({MANIFEST_VERSION_KEY: MANIFEST_VERSION, MANIFEST_DIRECTORIES_KEY: directories}, f)
+    os.replace(manifest_file_tmp, manifest_file)
+
+
+# list results files and subdirectories of a directory. Only names are kept, as the content of the files is
+# read when processing them, and files rewritten in place are listed the same
+def scan_directory(dir_path: str, dir_mtime: int) -> dict:
+
+    files = []
+    subdirs = []
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            try:
+                # do not follow symbolic links to directories, as os.walk
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry.name)
+                elif is_results_file(entry.name):
+                    files.append(entry.name)
+            except OSError:
+                continue
+
+    return {MANIFEST_MTIME_KEY: dir_mtime, MANIFEST_FILES_KEY: files, MANIFEST_SUBDIRS_KEY: subdirs}
+
+
+# walk the results directory once, and find gnb and ue directories, and the iperf3 reports of each ue.
+# If a manifest file is passed, the content of directories that were not modified since the previous scan
+# is taken from it instead of being listed again
+def scan_results_directory(results_dir: str, manifest_file: str=None) -> tuple:
+
+    manifest_directories = load_scan_manifest(manifest_file)
+    scanned_directories = dict()
+
+    gnb_dir = []
+    ue_dir = []
+    json_reports = []
+
+    pending_dirs = [results_dir]
+    while pending_dirs:
+        dir_path = pending_dirs.pop()
+
+        try:
+            dir_mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            continue
+
+        dir_entry = manifest_directories.get(dir_path)
+        if dir_entry is None or dir_entry[MANIFEST_MTIME_KEY] != dir_mtime:
+            try:
+                dir_entry = scan_directory(dir_path, dir_mtime)
+            except OSError:
+                continue
+        scanned_directories[dir_path] = dir_entry
+
+        for name in dir_entry[MANIFEST_FILES_KEY]:
+            if name == ProcessingConstants.OAI_GNB_LOG_FILE.value:
+                gnb_dir.append(dir_path)
+            elif name == ProcessingConstants.OAI_UE_LOG_FILE.value:
+                ue_dir.append(dir_path)
+            else:
+                json_reports.append(os.path.join(dir_path, name))
+
+        pending_dirs += [os.path.join(dir_path, x) for x in dir_entry[MANIFEST_SUBDIRS_KEY]]
+
+    if manifest_file:
+        write_scan_manifest(manifest_file, scanned_directories)
+
+    # sort directories and reports, so that the order of the ue tables and of their tests is the same across runs
+    gnb_dir = sorted(gnb_dir)
+    ue_dir = sorted(ue_dir)
+    json_reports = sorted(json_reports)
+
+    # reports of a ue are all the reports in its directory tree
+    ue_reports = dict()
+    for d_val in ue_dir:
+        ue_reports[d_val] = [x for x in json_reports if x.startswith(os.path.join(d_val, ''))]
+
+    return gnb_dir, ue_dir, ue_reports
@@ -0,0 +1,80 @@
+import warnings
+
+from constants import DecimationModes
+
+
+# keep the first, smallest, largest and last point of each bucket of consecutive points, in their original order,
+# so that peaks and drops of the series are still drawn. Buckets without values keep a nan point, so that
+# gaps of the line are preserved
+def decimate_minmax(x, y, max_points: int):
+    import numpy as np
+
+    n_buckets = max(max_points // 4, 1)
+    bucket_size = int(np.ceil(len(y) / n_buckets))
+    n_buckets = int(np.ceil(len(y) / bucket_size))
+
+    # pad the last bucket with nans to reshape the series as (buckets, bucket_size)
+    padded_y = np.full(n_buckets * bucket_size, np.nan)
+    padded_y[:len(y)] = y
+    bucket_y = padded_y.reshape(n_buckets, bucket_size)
+
+    bucket_start = np.arange(n_buckets) * bucket_size
+    bucket_end = np.minimum(bucket_start + bucket_size, len(y)) - 1
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        empty_bucket = np.isnan(bucket_y).all(axis=1)
+        min_idx = bucket_start + np.nanargmin(np.where(empty_bucket[:, np.newaxis], 0, bucket_y), axis=1)
+        max_idx = bucket_start + np.nanargmax(np.where(empty_bucket[:, np.newaxis], 0, bucket_y), axis=1)
+
+    return np.unique(np.concatenate([bucket_start, min_idx, max_idx, bucket_end]))
+
+
+# largest-triangle-three-buckets: keep the first and last point, and from each bucket in between the point forming
+# the largest triangle with the point kept from the previous bucket and the average of the next bucket
+def decimate_lttb(x, y, max_points: int):
+    import numpy as np
+
+    n_points = len(y)
+    n_buckets = max(max_points - 2, 1)
+    bucket_edges = (np.arange(n_buckets + 1) * (n_points - 2) / n_buckets).astype(np.int64) + 1
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        # averages of all the buckets, the one following the last bucket is the last point
+        bucket_sums_x = np.add.reduceat(np.nan_to_num(x[1:-1]), bucket_edges[:-1] - 1)
+        bucket_sums_y = np.add.reduceat(np.nan_to_num(y[1:-1]), bucket_edges[:-1] - 1)
+        bucket_counts = np.diff(bucket_edges)
+        avg_x = np.append(bucket_sums_x / bucket_counts, x[-1])[1:]
+        avg_y = np.append(bucket_sums_y / bucket_counts, y[-1])[1:]
+
+    keep_idx = np.empty(n_buckets + 2, dtype=np.int64)
+    keep_idx[0] = 0
+    keep_idx[-1] = n_points - 1
+
+    prev_idx = 0
+    for b_idx in range(n_buckets):
+        start, end = bucket_edges[b_idx], bucket_edges[b_idx + 1]
+        area = np.abs((x[prev_idx] - avg_x[b_idx]) * (y[start:end] - y[prev_idx]) -
+                      (x[prev_idx] - x[start:end]) * (avg_y[b_idx] - y[prev_idx]))
+
+        # points without values are only kept if the whole bucket has no values
+        area = np.where(np.isnan(area), -1, area)
+        prev_idx = start + int(np.argmax(area))
+        keep_idx[b_idx + 1] = prev_idx
+
+    return keep_idx
+
+
+decimation_functions = {DecimationModes.LTTB.value: decimate_lttb,
+                        DecimationModes.MINMAX.value: decimate_minmax}
+
+
+# indices of the points kept when reducing a series to at most max_points points before drawing it.
+# None if the series is already short enough, or if decimation mode is none
+def get_decimation_index(x, y, decimation: str, max_points: int):
+
+    if decimation not in decimation_functions or not max_points or len(y) <= max(max_points, 3):
+        return None
+
+    return decimation_functions[decimation](x, y, max_points)
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import REPO_DIR
+from batch_report import get_batch_args
+
+SYNTHETIC_RESERVATION = os.path.join(REPO_DIR, 'benchmarks', 'synthetic_reservation.py')
+
+
+# reservation written by the synthetic generator in its own process, as in the benchmarks
+def generate_reservation(output_dir: str, seed: int) -> tuple:
+    output = subprocess.run([sys.executable, SYNTHETIC_RESERVATION, '--output_dir', output_dir, '--ues', '1',
+        '--protocols', 'udp', '--directions', 'UL', '--bands', '20', '--intervals', '10', '--seed', str(seed)],
+        check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+    reservation_dirs = json.loads(output)
+    return reservation_dirs['results_dir'], reservation_dirs['history_dir']
+
+
+def run_batch_report(results_dirs: list, history_dir: str) -> int:
+    return subprocess.run([sys.executable, os.path.join(REPO_DIR, 'batch_report.py'), '--results_dirs'] + results_dirs +
+        ['--history_dir', history_dir, '--plot_backend', 'matplotlib'], cwd=REPO_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+
+
+def test_report_arguments_are_not_abbreviations():
+    batch_args, report_argv = get_batch_args(['--results_dirs', 'a', 'b', '--results_dir', 'c', '--workers', '2'])
+
+    assert batch_args.results_dirs == ['a', 'b']
+    assert report_argv == ['--results_dir', 'c', '--workers', '2']
+
+
+def test_batch_fails_if_any_report_fails(tmp_path):
+    reservations = [generate_reservation(str(tmp_path / 'res{}'.format(x)), x) for x in range(2)]
+    results_dirs = [x[0] for x in reservations]
+    history_dir = reservations[0][1]
+
+    assert run_batch_report(results_dirs, history_dir) == 0
+    for el in results_dirs:
+        assert os.path.isfile(os.path.join(el, 'test_summary.html'))
+
+    # a results directory without gnb log
+    os.makedirs(str(tmp_path / 'empty'))
+    assert run_batch_report(results_dirs + [str(tmp_path / 'empty')], history_dir) == 1
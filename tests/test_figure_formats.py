@@ -0,0 +1,81 @@
+import base64
+from io import BytesIO
+import os
+import re
+
+import numpy as np
+from PIL import Image
+import pytest
+
+from constants import FigureFormats, PlotBackends
+from figure_renderer import embed_figure, render_line_figure
+from generate_oai_report import get_args
+import history_report
+
+FIGURE_SIGNATURES = {FigureFormats.PNG.value: lambda x: x.startswith(b'\x89PNG'),
+                     FigureFormats.SVG.value: lambda x: b'<svg' in x[:1024],
+                     FigureFormats.WEBP.value: lambda x: x[:4] == b'RIFF' and x[8:12] == b'WEBP'}
+
+
+def render_figure(figure_format: str) -> bytes:
+    x = np.arange(1, 61, dtype=np.float64)
+    y = 20 + np.cos(x / 5)
+
+    save_path = BytesIO()
+    render_line_figure(save_path, figure_format, x, y, 'Throughput [Mbps]', float(y.mean()), 19.5, 22.0,
+        backend=PlotBackends.MATPLOTLIB.value)
+    return save_path.getvalue()
+
+
+def get_embedded_bytes(html_figure: str) -> tuple:
+    mime_type, encoded_figure = re.match(r"^<img src='data:([^;]+);base64,([^']+)'>$", html_figure).groups()
+    return mime_type, base64.b64decode(encoded_figure)
+
+
+@pytest.mark.parametrize('figure_format, mime_type', [(FigureFormats.PNG.value, 'image/png'),
+                                                      (FigureFormats.SVG.value, 'image/svg+xml'),
+                                                      (FigureFormats.WEBP.value, 'image/webp')])
+def test_figures_are_embedded_in_their_format(figure_format, mime_type):
+    figure_bytes = render_figure(figure_format)
+    assert FIGURE_SIGNATURES[figure_format](figure_bytes)
+
+    # colors only apply to png figures
+    assert get_embedded_bytes(embed_figure(figure_bytes, figure_format)) == (mime_type, figure_bytes)
+    if figure_format != FigureFormats.PNG.value:
+        assert embed_figure(figure_bytes, figure_format, 16) == embed_figure(figure_bytes, figure_format)
+
+
+def test_svg_figures_are_reproducible():
+    assert render_figure(FigureFormats.SVG.value) == render_figure(FigureFormats.SVG.value)
+
+
+@pytest.mark.parametrize('colors', [2, 16, 256])
+def test_png_figures_are_quantized(colors):
+    figure_bytes = render_figure(FigureFormats.PNG.value)
+    _, quantized_bytes = get_embedded_bytes(embed_figure(figure_bytes, FigureFormats.PNG.value, colors))
+
+    with Image.open(BytesIO(quantized_bytes)) as image, Image.open(BytesIO(figure_bytes)) as original_image:
+        assert image.mode == 'P' and image.size == original_image.size
+        assert len(image.getcolors(256)) <= colors
+    assert len(quantized_bytes) < len(figure_bytes)
+
+
+def test_quantized_figures_are_written_as_assets(tmp_path):
+    assets_dir = str(tmp_path / 'figures')
+    html_figure = embed_figure(render_figure(FigureFormats.PNG.value), FigureFormats.PNG.value, 64, assets_dir)
+
+    asset_name = re.match(r"^<img src='figures/([0-9a-f]+\.png)' loading='lazy'>$", html_figure).group(1)
+    with Image.open(os.path.join(assets_dir, asset_name)) as image:
+        assert image.mode == 'P'
+
+
+@pytest.mark.parametrize('get_script_args, required_args', [(get_args, ['--results_dir', 'results']),
+                                                           (history_report.get_args, ['--history_dir', 'history'])])
+def test_figure_colors_range(get_script_args, required_args):
+    assert get_script_args(required_args + ['--figure_colors', '2']).figure_colors == 2
+    assert get_script_args(required_args + ['--figure_colors', '256']).figure_colors == 256
+    assert get_script_args(required_args).figure_colors is None
+
+    for el in ['1', '257', '0', 'many']:
+        with pytest.raises(SystemExit):
+            get_script_args(required_args + ['--figure_colors', el])
@@ -0,0 +1,86 @@
+import math
+import os
+
+import pandas as pd
+import pytest
+
+from constants import DataframeColumns, DataframeMetrics, HistoryBackends
+from history_store import append_history, get_history_database
+from html_report_utils import get_test_history_headers, load_test_history_data, load_test_history_summary, \
+    test_history_cache
+from iperf_log_grapher import compute_history_average
+
+HEADER = get_test_history_headers('udp', 'Uplink')
+
+
+def get_history_file(history_dir) -> str:
+    return os.path.join(str(history_dir), 'test_mean_history_udp_uplink.pkl')
+
+
+def get_history_row(target_rate: int, value: float) -> list:
+    return ['UDP', target_rate] + [value + x for x in range(len(HEADER) - 2)]
+
+
+@pytest.fixture(autouse=True)
+def clear_history_cache():
+    test_history_cache.clear()
+    yield
+    test_history_cache.clear()
+
+
+def get_throughput_average(test_history: dict, target_rate: int) -> float:
+    return compute_history_average(test_history, target_rate, DataframeMetrics.THROUGHPUT.value)
+
+
+def test_aggregates_match_history(tmp_path):
+    for target_rate, value in [(10, 8.0), (10, 9.5), (20, 17.0), (0, 40.0), (20, 19.0), (10, 7.0)]:
+        append_history(get_history_file(tmp_path), HEADER, get_history_row(target_rate, value))
+
+    test_history = load_test_history_summary(get_history_file(tmp_path), 'udp', 'Uplink')
+    df_history = load_test_history_data(get_history_file(tmp_path), 'udp', 'Uplink')
+
+    for target_rate, df_rate in df_history.groupby(DataframeColumns.TX_RATE.value):
+        for el in HEADER[2:]:
+            assert compute_history_average(test_history, target_rate, el) == pytest.approx(df_rate[el].mean())
+
+    # target rates without history have no average
+    assert math.isnan(compute_history_average(test_history, 5, HEADER[2]))
+
+
+def test_summary_is_cached_until_history_changes(tmp_path):
+    append_history(get_history_file(tmp_path), HEADER, get_history_row(10, 8.0))
+
+    test_history = load_test_history_summary(get_history_file(tmp_path), 'udp', 'Uplink')
+    assert load_test_history_summary(get_history_file(tmp_path), 'udp', 'Uplink') is test_history
+
+    append_history(get_history_file(tmp_path), HEADER, get_history_row(10, 10.0))
+    assert get_throughput_average(load_test_history_summary(get_history_file(tmp_path), 'udp', 'Uplink'), 10) == \
+        pytest.approx(get_throughput_average(test_history, 10) + 1)
+
+
+# writes within the timestamp resolution of the file system, which do not change the size of the database,
+# are only detected by the change counter of the database
+def test_database_change_counter_invalidates_summary(tmp_path):
+    append_history(get_history_file(tmp_path), HEADER, get_history_row(10, 8.0))
+    database_stat = os.stat(get_history_database(get_history_file(tmp_path)))
+    test_history = load_test_history_summary(get_history_file(tmp_path), 'udp', 'Uplink')
+
+    append_history(get_history_file(tmp_path), HEADER, get_history_row(10, 10.0))
+    os.utime(get_history_database(get_history_file(tmp_path)), ns=(database_stat.st_atime_ns, database_stat.st_mtime_ns))
+    assert os.path.getsize(get_history_database(get_history_file(tmp_path))) == database_stat.st_size
+
+    assert load_test_history_summary(get_history_file(tmp_path), 'udp', 'Uplink') is not test_history
+
+
+@pytest.mark.parametrize('same_mtime', [False, True])
+def test_pickle_changes_invalidate_summary(tmp_path, same_mtime):
+    pd.DataFrame([get_history_row(10, 8.0)], columns=HEADER).to_pickle(get_history_file(tmp_path))
+    pickle_stat = os.stat(get_history_file(tmp_path))
+    test_history = load_test_history_summary(get_history_file(tmp_path), 'udp', 'Uplink', HistoryBackends.PICKLE.value)
+
+    pd.DataFrame([get_history_row(10, 8.0), get_history_row(10, 10.0)], columns=HEADER).to_pickle(get_history_file(tmp_path))
+    if same_mtime:
+        os.utime(get_history_file(tmp_path), ns=(pickle_stat.st_atime_ns, pickle_stat.st_mtime_ns))
+
+    assert get_throughput_average(load_test_history_summary(get_history_file(tmp_path), 'udp', 'Uplink',
+        HistoryBackends.PICKLE.value), 10) == pytest.approx(get_throughput_average(test_history, 10) + 1)
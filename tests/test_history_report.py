@@ -0,0 +1,97 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from constants import DataframeColumns, HistoryBackends
+from history_store import append_history
+import history_report
+from history_report import compute_history_trends, get_history_test_types, get_trend_change
+from html_report_utils import get_test_history_headers
+
+THROUGHPUT = 'Throughput [Mbps]'
+WINDOW = 3
+
+
+# history of runs alternating between two target rates, with increasing throughput
+def get_df_history() -> pd.DataFrame:
+    target_rates = [0, 20] * 5
+    throughput = [40.0 + x if r else 60.0 - x for x, r in enumerate(target_rates)]
+    return pd.DataFrame({DataframeColumns.PROTOCOL.value: 'TCP', DataframeColumns.TX_RATE.value: target_rates,
+                         THROUGHPUT: [str(x) for x in throughput]})
+
+
+def test_trends_are_rolled_per_target_rate():
+    df_history = get_df_history()
+    history_trends = compute_history_trends(df_history, [THROUGHPUT], WINDOW)
+
+    assert sorted(history_trends) == [0, 20]
+    for target_rate, rate_trends in history_trends.items():
+        runs = rate_trends['runs'][THROUGHPUT].to_numpy()
+        # runs keep their position in the whole history
+        assert rate_trends['runs'].index.tolist() == [x + 1 for x in range(len(df_history.index))
+                                                      if df_history[DataframeColumns.TX_RATE.value][x] == target_rate]
+
+        for r_idx in range(len(runs)):
+            window_runs = runs[max(r_idx - WINDOW + 1, 0):r_idx + 1]
+            assert rate_trends['mean'][THROUGHPUT].iloc[r_idx] == pytest.approx(window_runs.mean())
+            assert rate_trends['low'][THROUGHPUT].iloc[r_idx] == pytest.approx(np.percentile(window_runs, 5))
+            assert rate_trends['high'][THROUGHPUT].iloc[r_idx] == pytest.approx(np.percentile(window_runs, 95))
+
+
+# the reference is the rolling mean of the first full window of valid runs
+@pytest.mark.parametrize('rolling_mean, window, change', [([np.nan, 10.0, 11.0, 12.0], 1, 20.0),
+                                                          ([np.nan, 10.0, 11.0, 13.2], 2, 20.0),
+                                                          ([10.0, 9.0, 8.0, 5.0], 1, -50.0),
+                                                          # fewer runs than the window, so no full window yet
+                                                          ([8.0, 10.0], 5, 0.0)])
+def test_trend_change(rolling_mean, window, change):
+    assert get_trend_change(np.array(rolling_mean), window) == pytest.approx(change)
+
+
+@pytest.mark.parametrize('rolling_mean', [[np.nan, np.nan], [4.0], [0.0, 1.0]])
+def test_trend_change_without_reference(rolling_mean):
+    assert math.isnan(get_trend_change(np.array(rolling_mean), 1))
+
+
+def write_pickle_history(history_dir, protocol: str, direction: str) -> None:
+    header = get_test_history_headers(protocol, direction)
+    pd.DataFrame([[protocol.upper(), 20] + [1.0] * (len(header) - 2)], columns=header).to_pickle(
+        os.path.join(str(history_dir), 'test_mean_history_{}_{}.pkl'.format(protocol, direction.lower())))
+
+
+def write_database_history(history_dir, protocol: str, direction: str) -> None:
+    header = get_test_history_headers(protocol, direction)
+    for el in [18.0, 19.0]:
+        append_history(os.path.join(str(history_dir), 'test_mean_history_{}_{}.pkl'.format(protocol, direction.lower())),
+            header, [protocol.upper(), 20] + [el] * (len(header) - 2))
+
+
+# legacy pickle files are listed together with the histories in the database, and test types are listed once
+def test_test_types_of_pickle_and_database_histories(tmp_path):
+    write_pickle_history(tmp_path, 'udp', 'Uplink')
+    write_pickle_history(tmp_path, 'tcp', 'Downlink')
+    write_database_history(tmp_path, 'tcp', 'Downlink')
+    write_database_history(tmp_path, 'tcp', 'Uplink')
+    (tmp_path / 'test_mean_history_unknown.pkl').write_bytes(b'')
+
+    test_types = get_history_test_types(str(tmp_path), HistoryBackends.SQLITE.value)
+    assert [x[:2] for x in test_types] == [('tcp', 'Downlink'), ('tcp', 'Uplink'), ('udp', 'Uplink')]
+    assert test_types[0][2] == str(tmp_path / 'test_mean_history_tcp_downlink.pkl')
+
+    assert [x[:2] for x in get_history_test_types(str(tmp_path), HistoryBackends.PICKLE.value)] == \
+        [('tcp', 'Downlink'), ('udp', 'Uplink')]
+
+
+def test_history_page_has_all_test_types(tmp_path):
+    write_pickle_history(tmp_path, 'udp', 'Uplink')
+    write_database_history(tmp_path, 'tcp', 'Downlink')
+
+    args = history_report.get_args(['--history_dir', str(tmp_path), '--window', str(WINDOW)])
+    with open(history_report.generate_history_report(args), 'r') as f:
+        html_page = f.read()
+
+    assert '<h3>TCP Downlink</h3>' in html_page and '<h3>UDP Uplink</h3>' in html_page
+    assert '{} runs'.format(WINDOW) in html_page
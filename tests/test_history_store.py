@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+import pytest
+
+import constants
+from history_store import append_history, get_history_keys, load_history, migrate_history_dir
+from html_report_utils import get_test_history_headers, load_test_history_data
+
+HEADER = get_test_history_headers('tcp', 'Downlink')
+
+# constants are accessed through their module, as pytest would collect classes named Test*
+HISTORY_FILE_PREFIX = constants.TestResultKeys.TEST_HISTORY.value
+
+
+def get_history_file(history_dir: str, test_protocol: str='tcp', test_direction: str='downlink') -> str:
+    return os.path.join(str(history_dir), '{}_{}_{}.pkl'.format(HISTORY_FILE_PREFIX, test_protocol, test_direction))
+
+
+def get_history_database(history_dir: str) -> str:
+    return os.path.join(str(history_dir), constants.ProcessingConstants.HISTORY_DATABASE_FILE.value)
+
+
+def get_history_row(row_idx: int) -> list:
+    return ['TCP', 20] + [float(row_idx + x) for x in range(len(HEADER) - 2)]
+
+
+def test_missing_history_is_empty_and_not_created(tmp_path):
+    df_history = load_history(get_history_file(tmp_path), HEADER)
+
+    assert len(df_history.index) == 0 and list(df_history.columns) == HEADER
+    assert not os.path.exists(get_history_database(tmp_path))
+
+
+def test_history_round_trip(tmp_path):
+    rows = [get_history_row(x) for x in range(5)]
+    for el in rows:
+        append_history(get_history_file(tmp_path), HEADER, el)
+
+    df_history = load_history(get_history_file(tmp_path), HEADER)
+    assert df_history.values.tolist() == rows
+
+    # other test types are stored separately
+    assert len(load_history(get_history_file(tmp_path, 'udp'), HEADER).index) == 0
+
+
+def test_new_columns_are_empty_for_older_rows(tmp_path):
+    append_history(get_history_file(tmp_path), HEADER[:-1], get_history_row(0)[:-1])
+    append_history(get_history_file(tmp_path), HEADER, get_history_row(1))
+
+    df_history = load_history(get_history_file(tmp_path), HEADER)
+    assert pd.isna(df_history[HEADER[-1]].iloc[0])
+    assert df_history[HEADER[-1]].iloc[1] == get_history_row(1)[-1]
+
+
+def test_legacy_pickle_is_read_until_migrated_on_append(tmp_path):
+    legacy_rows = [get_history_row(x) for x in range(3)]
+    pd.DataFrame(legacy_rows, columns=HEADER).to_pickle(get_history_file(tmp_path))
+
+    assert load_history(get_history_file(tmp_path), HEADER).values.tolist() == legacy_rows
+    assert not os.path.exists(get_history_database(tmp_path))
+
+    append_history(get_history_file(tmp_path), HEADER, get_history_row(3))
+    assert load_history(get_history_file(tmp_path), HEADER).values.tolist() == legacy_rows + [get_history_row(3)]
+
+    # the pickle file is only imported once
+    append_history(get_history_file(tmp_path), HEADER, get_history_row(4))
+    assert len(load_history(get_history_file(tmp_path), HEADER).index) == 5
+
+
+def test_history_dir_migration(tmp_path):
+    for el in ['downlink', 'uplink']:
+        pd.DataFrame([get_history_row(x) for x in range(3)], columns=HEADER).to_pickle(get_history_file(tmp_path, 'tcp', el))
+
+    assert migrate_history_dir(str(tmp_path)) == 6
+    assert migrate_history_dir(str(tmp_path)) == 0
+    assert get_history_keys(get_history_database(tmp_path)) == ['{}_tcp_downlink'.format(HISTORY_FILE_PREFIX),
+                                                                '{}_tcp_uplink'.format(HISTORY_FILE_PREFIX)]
+
+    # migrated history is read from the database, even once the pickle files are removed
+    for el in ['downlink', 'uplink']:
+        os.remove(get_history_file(tmp_path, 'tcp', el))
+        assert len(load_history(get_history_file(tmp_path, 'tcp', el), HEADER).index) == 3
+
+
+# pickle files written with text values, as by older versions of the tool
+@pytest.mark.parametrize('history_backend', [x.value for x in constants.HistoryBackends])
+def test_metric_columns_are_numeric(tmp_path, history_backend):
+    rows = [[str(x) for x in get_history_row(x)] for x in range(3)]
+    pd.DataFrame(rows, columns=HEADER).to_pickle(get_history_file(tmp_path))
+
+    df_history = load_test_history_data(get_history_file(tmp_path), 'tcp', 'Downlink', history_backend)
+    assert df_history[HEADER[0]].tolist() == ['TCP'] * 3
+    assert all([pd.api.types.is_numeric_dtype(df_history[x]) for x in HEADER[1:]])
+    assert df_history[HEADER[-1]].tolist() == [x[-1] for x in map(get_history_row, range(3))]
@@ -0,0 +1,116 @@
+from io import StringIO
+import json
+
+import numpy as np
+import pytest
+
+from interval_stats import STATS_PERCENTILES, compute_interval_stats
+from iperf_json_reader import parse_iperf_report
+
+METRICS = ['bits_per_second', 'rtt', 'snd_cwnd', 'retransmits']
+CORRECTIONS = {'bits_per_second': 1e-6, 'rtt': 1e-3}
+SUMMED_METRICS = ['bits_per_second', 'retransmits', 'snd_cwnd']
+
+N_STREAMS = 3
+N_INTERVALS = 200
+
+# intervals in which the first stream sends nothing
+STALLED_INTERVALS = [3, 4, 50]
+
+
+# random tcp intervals, as in the iperf3 output. Round-trip times are missing from some intervals,
+# as when iperf3 does not report them, and iperf3 only sums throughput and retransmissions
+def get_intervals(seed: int=0) -> list:
+    rng = np.random.default_rng(seed)
+
+    intervals = []
+    for i_idx in range(N_INTERVALS):
+        streams = []
+        for s_idx in range(N_STREAMS):
+            stream = {'socket': 5 + s_idx, 'start': float(i_idx), 'end': i_idx + 1.0,
+                      'bits_per_second': float(rng.normal(20e6, 2e6)), 'snd_cwnd': int(rng.integers(1e5, 1e6)),
+                      'retransmits': int(rng.poisson(2))}
+            if i_idx % 7 != 0:
+                stream['rtt'] = int(rng.integers(5000, 50000))
+            streams.append(stream)
+
+        if i_idx in STALLED_INTERVALS:
+            streams[0]['bits_per_second'] = 0.0
+
+        intervals.append({'streams': streams, 'sum': {'start': float(i_idx), 'end': i_idx + 1.0,
+            'bits_per_second': sum([x['bits_per_second'] for x in streams]),
+            'retransmits': sum([x['retransmits'] for x in streams])}})
+
+    return intervals
+
+
+# the same intervals as dictionaries and as the columns of the parser
+def get_test_intervals() -> tuple:
+    json_text = json.dumps({'tcp': {'20': {'intervals': get_intervals()}}})
+    return json.loads(json_text)['tcp']['20']['intervals'], parse_iperf_report(StringIO(json_text))['tcp']['20']['intervals']
+
+
+def get_stats(intervals, summed_metrics: list=None):
+    return compute_interval_stats(intervals, N_STREAMS, METRICS, CORRECTIONS, 'bits_per_second', 1, summed_metrics)
+
+
+@pytest.mark.parametrize('summed_metrics', [None, SUMMED_METRICS])
+def test_dict_and_column_intervals_have_same_stats(summed_metrics):
+    dict_intervals, column_intervals = get_test_intervals()
+    dict_stats = get_stats(dict_intervals, summed_metrics)
+    column_stats = get_stats(column_intervals, summed_metrics)
+
+    for el in ['x', 'values', 'present', 'mean', 'max', 'percentiles', 'std', 'stalled_intervals']:
+        np.testing.assert_array_equal(getattr(dict_stats, el), getattr(column_stats, el))
+
+
+@pytest.mark.parametrize('summed_metrics', [None, SUMMED_METRICS])
+def test_stats_match_numpy(summed_metrics):
+    interval_stats = get_stats(get_test_intervals()[1], summed_metrics)
+
+    for stream_id in range(interval_stats.get_stream_count()):
+        for metric in METRICS:
+            _, y = interval_stats.get_series(stream_id, metric)
+            assert interval_stats.get_mean(stream_id, metric) == pytest.approx(np.nanmean(y))
+            assert interval_stats.get_max(stream_id, metric) == pytest.approx(np.nanmax(y))
+            assert interval_stats.get_std(stream_id, metric) == pytest.approx(np.nanstd(y, ddof=1))
+            for percentile in STATS_PERCENTILES:
+                assert interval_stats.get_percentile(stream_id, metric, percentile) == \
+                    pytest.approx(np.nanpercentile(y, percentile))
+
+
+def test_stalled_intervals_are_counted_per_stream():
+    interval_stats = get_stats(get_test_intervals()[1])
+
+    assert [interval_stats.get_stalled_intervals(x) for x in range(N_STREAMS)] == [len(STALLED_INTERVALS), 0, 0]
+    assert get_stats(get_test_intervals()[1], SUMMED_METRICS).get_stalled_intervals(0) == 0
+
+
+# the aggregate uses the sums of iperf3 when it reports them, sums the other summed metrics,
+# and averages the round-trip times of the streams that report them
+def test_aggregate_of_streams():
+    dict_intervals, column_intervals = get_test_intervals()
+    interval_stats = get_stats(column_intervals, SUMMED_METRICS)
+
+    assert interval_stats.get_stream_count() == 1
+    assert interval_stats.stream_values.shape == (N_STREAMS, len(METRICS), N_INTERVALS)
+
+    np.testing.assert_allclose(interval_stats.get_series(0, 'bits_per_second')[1],
+                               [x['sum']['bits_per_second'] * 1e-6 for x in dict_intervals])
+    np.testing.assert_allclose(interval_stats.get_series(0, 'snd_cwnd')[1],
+                               [sum([s['snd_cwnd'] for s in x['streams']]) for x in dict_intervals])
+
+    rtt = interval_stats.get_series(0, 'rtt')[1]
+    assert np.isnan(rtt[::7]).all()
+    np.testing.assert_allclose(rtt[1], np.mean([x['rtt'] for x in dict_intervals[1]['streams']]) * 1e-3)
+
+
+def test_stream_stats_are_those_of_the_stream():
+    interval_stats = get_stats(get_test_intervals()[1])
+
+    stream_stats = interval_stats.get_stream_stats(2)
+    assert stream_stats.get_stream_count() == 1
+    for metric in METRICS:
+        np.testing.assert_array_equal(stream_stats.get_series(0, metric)[1], interval_stats.get_series(2, metric)[1])
+        for percentile in STATS_PERCENTILES:
+            assert stream_stats.get_percentile(0, metric, percentile) == interval_stats.get_percentile(2, metric, percentile)
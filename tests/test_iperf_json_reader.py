@@ -0,0 +1,85 @@
+from io import BytesIO, StringIO
+import json
+
+import numpy as np
+import pytest
+
+from iperf_json_reader import IntervalColumns, load_iperf_report, parse_iperf_report, parse_iperf_report_stream
+
+
+# iperf3 output of a tcp test with two streams, in which round-trip times are only reported from the second interval
+def get_iperf_output(n_intervals: int) -> dict:
+
+    intervals = []
+    for i_idx in range(n_intervals):
+        streams = [{'socket': 5 + s_idx, 'start': i_idx, 'end': i_idx + 1.0, 'bytes': 1000 * (i_idx + s_idx),
+                    'bits_per_second': 8000.5 * (i_idx + s_idx), 'omitted': False} for s_idx in range(2)]
+        if i_idx > 0:
+            for el in streams:
+                el['rtt'] = 20000 + i_idx
+
+        intervals.append({'streams': streams, 'sum': {'start': i_idx, 'end': i_idx + 1.0, 'bytes': 1000 * (2 * i_idx + 1),
+                                                      'bits_per_second': 8000.5 * (2 * i_idx + 1)}})
+
+    return {'start': {'test_start': {'protocol': 'TCP', 'num_streams': 2}},
+            'intervals': intervals,
+            'end': {'streams': [{'sender': {'bits_per_second': 1.5}, 'receiver': {'bits_per_second': 1.0}}]}}
+
+
+def get_json_report() -> dict:
+    return {'tcp': {'0': get_iperf_output(5), '20': get_iperf_output(3)}}
+
+
+def assert_same_report(parsed_report: dict, json_report: dict) -> None:
+    for protocol, bands in json_report.items():
+        for band, iperf_output in bands.items():
+            intervals = parsed_report[protocol][band]['intervals']
+            assert isinstance(intervals, IntervalColumns)
+            assert len(intervals) == len(iperf_output['intervals'])
+            assert len(intervals.streams) == 2
+
+            for s_idx, stream in enumerate(intervals.streams):
+                assert sorted(stream) == sorted(iperf_output['intervals'][-1]['streams'][s_idx])
+                for field, column in stream.items():
+                    np.testing.assert_array_equal(column, [x['streams'][s_idx].get(field, np.nan)
+                                                           for x in iperf_output['intervals']])
+            for field, column in intervals.sum.items():
+                np.testing.assert_array_equal(column, [x['sum'][field] for x in iperf_output['intervals']])
+
+            for el in ['start', 'end']:
+                assert parsed_report[protocol][band][el] == iperf_output[el]
+
+
+def test_parser_matches_json_module():
+    json_report = get_json_report()
+    assert_same_report(parse_iperf_report(StringIO(json.dumps(json_report))), json_report)
+
+
+def test_streaming_parser_matches_json_module(tmp_path):
+    pytest.importorskip('ijson')
+
+    json_report = get_json_report()
+    assert_same_report(parse_iperf_report_stream(BytesIO(json.dumps(json_report).encode())), json_report)
+
+    json_file = tmp_path / 'iperf3_result.json'
+    json_file.write_text(json.dumps(json_report))
+    assert_same_report(load_iperf_report(str(json_file), streaming_min_bytes=0), json_report)
+    assert_same_report(load_iperf_report(str(json_file)), json_report)
+
+
+def test_objects_with_empty_streams_are_not_intervals():
+    iperf_output = get_iperf_output(1)
+    iperf_output['extra'] = {'streams': []}
+
+    parsed_report = parse_iperf_report(StringIO(json.dumps({'tcp': {'20': iperf_output}})))['tcp']['20']
+    assert len(parsed_report['intervals']) == 1
+    assert parsed_report['extra'] == {'streams': []}
+    assert parsed_report['end'] == iperf_output['end']
+
+
+def test_iperf_errors_are_kept():
+    json_report = {'tcp': {'20': {'start': {}, 'intervals': [], 'end': {}, 'error': 'unable to connect to server'}}}
+
+    parsed_report = parse_iperf_report(StringIO(json.dumps(json_report)))['tcp']['20']
+    assert parsed_report['error'] == json_report['tcp']['20']['error']
+    assert len(parsed_report['intervals']) == 0
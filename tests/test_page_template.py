@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from page_template import HISTORY_TEMPLATE_FILE, HISTORY_TEMPLATE_SLOTS, PAGE_TEMPLATE_FILE, PAGE_TEMPLATE_SLOTS, \
+    compile_template, get_page_template, render_template
+
+
+# placeholders that are prefixes of other ones are not matched within them
+def test_compiled_template_alternates_segments_and_slots():
+    compiled_template = compile_template('<p>NAME</p><b>NAME_LONG</b>NAME', {'name': 'NAME', 'name_long': 'NAME_LONG'})
+
+    assert compiled_template == ('<p>', 'name', '</p><b>', 'name_long', '</b>', 'name', '')
+
+
+def test_render_template_inserts_strings_and_lists():
+    compiled_template = compile_template('<div>TABLES</div>TITLE', {'tables': 'TABLES', 'title': 'TITLE'})
+
+    assert render_template(compiled_template, {'tables': ['<a>', '<b>'], 'title': 'T'}) == '<div><a><b></div>T'
+    assert render_template(compiled_template, {'tables': iter([]), 'title': ''}) == '<div></div>'
+
+
+# rendering the compiled template is the same as replacing each placeholder of the template file
+@pytest.mark.parametrize('template_file, template_slots', [(PAGE_TEMPLATE_FILE, PAGE_TEMPLATE_SLOTS),
+                                                           (HISTORY_TEMPLATE_FILE, HISTORY_TEMPLATE_SLOTS)],
+                         ids=['page', 'history'])
+def test_templates_render_as_replaced_placeholders(template_file, template_slots):
+    with open(template_file, 'r') as f:
+        template = f.read()
+
+    slot_values = {x: '<{}>'.format(x.lower()) for x in template_slots}
+    expected_page = template
+    for slot_name, slot_pattern in template_slots.items():
+        assert slot_pattern in template
+        expected_page = expected_page.replace(slot_pattern, slot_values[slot_name])
+
+    assert render_template(get_page_template(template_file, template_slots), slot_values) == expected_page
+
+
+def test_template_is_compiled_again_once_modified(tmp_path):
+    template_file = str(tmp_path / 'template.html')
+    template_slots = {'title': 'TITLE'}
+    with open(template_file, 'w') as f:
+        f.write('<h1>TITLE</h1>')
+
+    compiled_template = get_page_template(template_file, template_slots)
+    assert get_page_template(template_file, template_slots) is compiled_template
+
+    with open(template_file, 'w') as f:
+        f.write('<h2>TITLE</h2>')
+    template_stat = os.stat(template_file)
+    os.utime(template_file, ns=(template_stat.st_atime_ns, template_stat.st_mtime_ns + 10 ** 9))
+
+    assert render_template(get_page_template(template_file, template_slots), {'title': 'T'}) == '<h2>T</h2>'
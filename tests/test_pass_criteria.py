@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from constants import DataframeColumns, DataframeMetrics, HistorySummaryKeys, ReportOptions
+from html_report_utils import determine_ue_test_pass_fail, get_history_stat_column
+
+THROUGHPUT = DataframeMetrics.THROUGHPUT.value
+RTT = DataframeMetrics.RTT.value
+
+THROUGHPUT_P5 = get_history_stat_column(THROUGHPUT, DataframeColumns.P5.value)
+RTT_P95 = get_history_stat_column(RTT, DataframeColumns.P95.value)
+
+
+# table of a tcp test as built for the report, with throughput and round-trip time rows
+def get_test_table(target_rate: str, throughput_mean: float, throughput_p5: float, stalled_intervals: int,
+                   rtt_p95: float) -> pd.DataFrame:
+    rows = [[THROUGHPUT, throughput_mean, throughput_p5, float('nan'), stalled_intervals],
+            [RTT, 20.0, 15.0, rtt_p95, 0],
+            [DataframeMetrics.TCP_CWND.value, 1.0, 0.5, 1.5, 0]]
+    df = pd.DataFrame(rows, columns=[DataframeColumns.METRIC.value, DataframeColumns.MEAN.value, DataframeColumns.P5.value,
+                                     DataframeColumns.P95.value, DataframeColumns.STALLED_INTERVALS.value])
+    df[DataframeColumns.TX_RATE.value] = target_rate
+    return df
+
+
+# averages of past tests, at 20 Mbps and with unlimited rate
+TEST_HISTORY = {HistorySummaryKeys.MEAN.value: {0: {THROUGHPUT: 50.0, THROUGHPUT_P5: 40.0, RTT_P95: 30.0},
+                                                20: {THROUGHPUT: 19.0, THROUGHPUT_P5: 16.0, RTT_P95: 25.0}},
+                HistorySummaryKeys.COUNT.value: {0: {THROUGHPUT: 3}, 20: {THROUGHPUT: 3}}}
+
+
+def is_test_passed(df, **options) -> bool:
+    report_options = {ReportOptions[k.upper()].value: v for k, v in options.items()}
+    return determine_ue_test_pass_fail(df, TEST_HISTORY, report_options)
+
+
+@pytest.mark.parametrize('target_rate', ['20', 'Unlimited'])
+def test_optional_criteria_are_off_by_default(target_rate):
+    df = get_test_table(target_rate, 49.0, 1.0, 30, 100.0)
+    assert is_test_passed(df)
+
+
+@pytest.mark.parametrize('target_rate, throughput_p5, passed', [
+    ('20', 10.0, True), ('20', 9.0, False),
+    # unlimited rate, compared against the throughput p5 of the history
+    ('Unlimited', 20.0, True), ('Unlimited', 19.0, False)])
+def test_throughput_p5_threshold(target_rate, throughput_p5, passed):
+    df = get_test_table(target_rate, 49.0, throughput_p5, 0, 20.0)
+    assert is_test_passed(df, throughput_p5_threshold=0.5) is passed
+
+
+@pytest.mark.parametrize('stalled_intervals, passed', [(2, True), (3, False)])
+def test_max_stalled_intervals(stalled_intervals, passed):
+    df = get_test_table('20', 19.0, 15.0, stalled_intervals, 20.0)
+    assert is_test_passed(df, max_stalled_intervals=2) is passed
+
+
+@pytest.mark.parametrize('target_rate, rtt_p95, passed', [
+    ('20', 37.5, True), ('20', 38.0, False),
+    ('Unlimited', 45.0, True), ('Unlimited', 46.0, False)])
+def test_rtt_p95_threshold(target_rate, rtt_p95, passed):
+    df = get_test_table(target_rate, 49.0, 45.0, 0, rtt_p95)
+    assert is_test_passed(df, rtt_p95_threshold=1.5) is passed
+
+
+# tests without history pass the criteria that compare against it
+def test_missing_history_passes():
+    df = get_test_table('Unlimited', 49.0, 1.0, 0, 100.0)
+    assert determine_ue_test_pass_fail(df, dict(), {ReportOptions.THROUGHPUT_P5_THRESHOLD.value: 0.5,
+                                                   ReportOptions.RTT_P95_THRESHOLD.value: 1.5})
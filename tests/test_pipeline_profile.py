@@ -0,0 +1,109 @@
+import csv
+import json
+import os
+import threading
+
+import pytest
+
+from constants import ProfileHooks
+from pipeline_profile import CPROFILE_FILE, PROFILE_FILE, PROFILE_RECORD_FIELDS, get_rss_mb, profile_stage, \
+    run_profiled_task, start_profile_hook, start_stage_profile, stop_profile_hook, stop_stage_profile, \
+    summarize_stage_records, write_stage_profile
+
+ALLOCATED_MB = 64
+
+
+@pytest.fixture
+def stage_profile():
+    start_stage_profile()
+    yield
+    stop_stage_profile()
+
+
+def test_stages_are_not_recorded_without_profile():
+    with profile_stage('discovery') as record:
+        assert record is None
+    assert stop_stage_profile() == []
+
+
+# memory allocated in a stage is counted in its own record, and not in the following stages once freed
+@pytest.mark.skipif(get_rss_mb() is None, reason='/proc/self/statm is not available')
+def test_rss_delta_is_that_of_the_stage(stage_profile):
+    with profile_stage('json_load'):
+        # written, so that its pages are resident
+        buffer = bytearray(b'x' * ALLOCATED_MB * 1024 * 1024)
+    with profile_stage('table_build'):
+        del buffer
+
+    records = stop_stage_profile()
+    assert records[0]['rss_delta_mb'] >= 0.9 * ALLOCATED_MB
+    assert records[1]['rss_delta_mb'] <= -0.9 * ALLOCATED_MB
+    assert records[1]['process_peak_rss_mb'] >= records[0]['process_peak_rss_mb']
+
+
+def test_records_of_tasks_and_threads_are_kept_apart(stage_profile):
+
+    def render(report: str) -> str:
+        with profile_stage('plot_render', report=report):
+            return report.upper()
+
+    other_thread_records = []
+
+    def run_other_report() -> None:
+        start_stage_profile()
+        render('other')
+        other_thread_records.extend(stop_stage_profile())
+
+    thread = threading.Thread(target=run_other_report)
+    thread.start()
+    thread.join()
+
+    result, task_records = run_profiled_task(render, 'first')
+    assert result == 'FIRST'
+    assert [x['report'] for x in task_records] == ['first']
+    assert [x['report'] for x in other_thread_records] == ['other']
+    assert stop_stage_profile() == []
+
+
+def test_summary_adds_up_records():
+    records = [{'stage': 'plot_render', 'ue': 1, 'wall_ms': 10.0, 'cpu_ms': 8.0, 'rss_delta_mb': 5.0,
+                'process_peak_rss_mb': 100.0, 'bytes_in': 10, 'bytes_out': 1},
+               {'stage': 'plot_render', 'ue': 2, 'wall_ms': 20.0, 'cpu_ms': 16.0, 'rss_delta_mb': -2.0,
+                'process_peak_rss_mb': 120.0, 'bytes_in': 20, 'bytes_out': 2},
+               {'stage': 'page_write', 'ue': None, 'wall_ms': 5.0, 'cpu_ms': 1.0, 'rss_delta_mb': None,
+                'process_peak_rss_mb': 90.0, 'bytes_in': 0, 'bytes_out': 3}]
+
+    assert summarize_stage_records(records, 'stage') == {
+        'plot_render': {'calls': 2, 'wall_ms': 30.0, 'cpu_ms': 24.0, 'rss_delta_mb': 3.0, 'process_peak_rss_mb': 120.0,
+                        'bytes_in': 30, 'bytes_out': 3},
+        'page_write': {'calls': 1, 'wall_ms': 5.0, 'cpu_ms': 1.0, 'rss_delta_mb': 0.0, 'process_peak_rss_mb': 90.0,
+                       'bytes_in': 0, 'bytes_out': 3}}
+    assert sorted(summarize_stage_records(records, 'ue')) == ['1', '2']
+
+
+def test_profile_is_written_as_csv_and_json(tmp_path, stage_profile):
+    with profile_stage('report'):
+        with profile_stage('json_load', ue=1, report='iperf3_result.json', bytes_in=100) as record:
+            record['bytes_out'] = 10
+
+    write_stage_profile(stop_stage_profile(), str(tmp_path))
+
+    with open(str(tmp_path / '{}.csv'.format(PROFILE_FILE)), newline='') as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == PROFILE_RECORD_FIELDS
+        assert [x['stage'] for x in reader] == ['json_load', 'report']
+
+    with open(str(tmp_path / '{}.json'.format(PROFILE_FILE))) as f:
+        profile = json.load(f)
+    assert profile['stages']['json_load']['bytes_in'] == 100
+    assert profile['ues'] == {'1': profile['stages']['json_load']}
+
+
+def test_cprofile_hook_writes_statistics(tmp_path):
+    import pstats
+
+    profiler = start_profile_hook(ProfileHooks.CPROFILE.value)
+    sorted(range(1000), key=lambda x: -x)
+    stop_profile_hook(ProfileHooks.CPROFILE.value, profiler, str(tmp_path))
+
+    assert pstats.Stats(os.path.join(str(tmp_path), CPROFILE_FILE)).total_calls > 0
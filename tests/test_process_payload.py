@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from constants import ProcessingConstants
+import process_payload
+from process_payload import get_oai_git_commit
+
+LOG_FILE = ProcessingConstants.OAI_GNB_LOG_FILE.value
+NOT_FOUND = ProcessingConstants.OAI_COMMIT_NOT_FOUND_DEFAULT.value
+
+COMMIT_DATA = 'Version: Branch: develop Abrev. Hash: bd721c3bd Date: Tue Jul 30 16:24:27 2024 +0000'
+BANNER_LINE = '[HW]   I {}\n'.format(COMMIT_DATA)
+FILLER_LINE = '[NR_MAC]   I Frame.Slot 128.0\n'
+
+HEAD_BYTES = 256
+
+
+# small scan windows, so that banners can be placed across their boundaries
+@pytest.fixture(autouse=True)
+def small_scan_windows(monkeypatch):
+    monkeypatch.setattr(process_payload, 'OAI_COMMIT_SCAN_CHUNK_BYTES', 128)
+    monkeypatch.setattr(process_payload, 'OAI_COMMIT_SCAN_OVERLAP_BYTES', 2 * len(BANNER_LINE))
+
+
+# log in which the banner starts banner_offset bytes from the beginning, if passed, in between filler text
+def write_log(log_dir, banner_offset: int=None, log_bytes: int=2048) -> str:
+    filler = (FILLER_LINE * (log_bytes // len(FILLER_LINE) + 1))[:log_bytes]
+    if banner_offset is None:
+        log = filler
+    else:
+        log = filler[:banner_offset] + '\n' + BANNER_LINE + filler[banner_offset:]
+
+    with open(os.path.join(str(log_dir), LOG_FILE), 'w') as f:
+        f.write(log)
+    return str(log_dir)
+
+
+def test_banner_in_head(tmp_path):
+    log_dir = write_log(tmp_path, 10)
+    assert get_oai_git_commit(log_dir, LOG_FILE, HEAD_BYTES) == (COMMIT_DATA, 'bd721c3bd')
+
+
+def test_banner_after_head_needs_full_scan(tmp_path):
+    log_dir = write_log(tmp_path, 1500)
+
+    assert get_oai_git_commit(log_dir, LOG_FILE, HEAD_BYTES) == (NOT_FOUND, NOT_FOUND)
+    assert get_oai_git_commit(log_dir, LOG_FILE, HEAD_BYTES, True) == (COMMIT_DATA, 'bd721c3bd')
+
+
+# banners across the end of the head and the boundaries of the scan windows, at every offset around them
+@pytest.mark.parametrize('boundary', [HEAD_BYTES, HEAD_BYTES + 128, HEAD_BYTES + 3 * 128])
+def test_banner_across_window_boundaries(tmp_path, boundary):
+    for banner_offset in range(boundary - len(BANNER_LINE) - 1, boundary + 1):
+        log_dir = write_log(tmp_path, banner_offset)
+        assert get_oai_git_commit(log_dir, LOG_FILE, HEAD_BYTES, True) == (COMMIT_DATA, 'bd721c3bd'), banner_offset
+
+
+def test_banner_at_end_of_log(tmp_path):
+    log_dir = write_log(tmp_path, 2048)
+    with open(os.path.join(log_dir, LOG_FILE), 'r+') as f:
+        f.truncate(os.path.getsize(os.path.join(log_dir, LOG_FILE)) - 1)
+
+    assert get_oai_git_commit(log_dir, LOG_FILE, HEAD_BYTES, True) == (COMMIT_DATA, 'bd721c3bd')
+
+
+@pytest.mark.parametrize('full_scan', [False, True])
+def test_missing_banner(tmp_path, full_scan):
+    assert get_oai_git_commit(write_log(tmp_path), LOG_FILE, HEAD_BYTES, full_scan) == (NOT_FOUND, NOT_FOUND)
+
+
+def test_missing_or_empty_log(tmp_path):
+    assert get_oai_git_commit(str(tmp_path), LOG_FILE) == (NOT_FOUND, NOT_FOUND)
+
+    write_log(tmp_path, log_bytes=0)
+    assert get_oai_git_commit(str(tmp_path), LOG_FILE, HEAD_BYTES, True) == (NOT_FOUND, NOT_FOUND)
@@ -0,0 +1,90 @@
+import os
+
+from constants import HistorySummaryKeys
+from report_cache import REPORT_CACHE_EXTENSION, evict_report_cache, get_history_summary_digest, get_report_cache_file, \
+    get_report_cache_key, load_cached_report, store_cached_report
+
+RENDER_OPTIONS = {'plot_backend': 'matplotlib'}
+
+
+def write_json_report(results_dir, name: str, content: str) -> str:
+    json_report = os.path.join(str(results_dir), name)
+    with open(json_report, 'w') as f:
+        f.write(content)
+    return json_report
+
+
+def get_history_summary(mean_by_rate: dict) -> dict:
+    return {HistorySummaryKeys.MEAN.value: {k: {'Throughput': v} for k, v in mean_by_rate.items()},
+            HistorySummaryKeys.COUNT.value: {k: {'Throughput': 1} for k in mean_by_rate}}
+
+
+def test_cache_key_follows_report_content_and_options(tmp_path):
+    json_report = write_json_report(tmp_path, 'iperf3_result_20240730_160000_DL.json', '{"tcp": {}}')
+
+    cache_key = get_report_cache_key(json_report, 'history', str(tmp_path), RENDER_OPTIONS)
+    assert get_report_cache_key(json_report, 'history', str(tmp_path), dict(RENDER_OPTIONS)) == cache_key
+    assert get_report_cache_key(json_report, 'history', str(tmp_path), {'plot_backend': 'seaborn'}) != cache_key
+
+    with open(json_report, 'a') as f:
+        f.write(' ')
+    assert get_report_cache_key(json_report, 'history', str(tmp_path), RENDER_OPTIONS) != cache_key
+
+
+# reports with the same content in different files are different tests
+def test_cache_key_differs_across_reports(tmp_path):
+    json_reports = [write_json_report(tmp_path, 'iperf3_result_20240730_16000{}_DL.json'.format(x), '{}') for x in range(3)]
+
+    cache_keys = [get_report_cache_key(x, 'history', str(tmp_path), RENDER_OPTIONS) for x in json_reports]
+    assert len(set(cache_keys)) == len(cache_keys)
+
+
+def test_cache_key_uses_absolute_directories(tmp_path, monkeypatch):
+    json_report = write_json_report(tmp_path, 'iperf3_result_20240730_160000_UL.json', '{}')
+    os.makedirs(str(tmp_path / 'history'))
+    monkeypatch.chdir(str(tmp_path))
+
+    assert get_report_cache_key(json_report, 'history', '.', RENDER_OPTIONS) == \
+        get_report_cache_key(json_report, str(tmp_path / 'history'), str(tmp_path), RENDER_OPTIONS)
+
+
+def test_history_digest_only_follows_target_rate():
+    history_digest = get_history_summary_digest(get_history_summary({0: 40.0, 20.0: 19.0}), 20)
+
+    assert get_history_summary_digest(get_history_summary({0: 45.0, 10.0: 9.0, 20.0: 19.0}), 20) == history_digest
+    assert get_history_summary_digest(get_history_summary({0: 40.0, 20.0: 18.0}), 20) != history_digest
+
+    # history rows of a target rate that had none yet
+    assert get_history_summary_digest(get_history_summary({0: 40.0}), 20) != history_digest
+    assert get_history_summary_digest(get_history_summary({}), 20) == get_history_summary_digest(get_history_summary({5: 4.0}), 20)
+
+
+def test_cached_report_round_trip(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    rendered_report = {'ue': 1, 'tables': ['<table></table>']}
+
+    assert load_cached_report(cache_dir, 'missing') is None
+
+    store_cached_report(cache_dir, 'key', rendered_report)
+    assert load_cached_report(cache_dir, 'key') == rendered_report
+
+    with open(get_report_cache_file(cache_dir, 'key'), 'wb') as f:
+        f.write(b'not a pickle')
+    assert load_cached_report(cache_dir, 'key') is None
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    for e_idx, el in enumerate(['old', 'used', 'new']):
+        store_cached_report(cache_dir, el, b'x' * 1000)
+        os.utime(get_report_cache_file(cache_dir, el), ns=(e_idx * 10 ** 9, e_idx * 10 ** 9))
+
+    # loading an entry marks it as recently used
+    load_cached_report(cache_dir, 'used')
+    entry_size = os.path.getsize(get_report_cache_file(cache_dir, 'new'))
+
+    assert evict_report_cache(cache_dir, 2 * entry_size) == 1
+    assert sorted(os.listdir(cache_dir)) == ['new{}'.format(REPORT_CACHE_EXTENSION), 'used{}'.format(REPORT_CACHE_EXTENSION)]
+
+    assert evict_report_cache(cache_dir, 0) == 2
+    assert os.listdir(cache_dir) == []
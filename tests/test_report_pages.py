@@ -0,0 +1,46 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from conftest import REPO_DIR
+
+# small reservation with one test per ue and history to compare against, so that pages are generated quickly
+RESERVATION_ARGS = ['--ues', '2', '--protocols', 'tcp', '--directions', 'DL', '--bands', '20', '--intervals', '20',
+                    '--history_rows', '5']
+
+
+# reservation generated once for all the tests, each of them generates its page on its own copy
+@pytest.fixture(scope='module')
+def reservation_dir(tmp_path_factory):
+    output_dir = str(tmp_path_factory.mktemp('reservation'))
+    subprocess.run([sys.executable, os.path.join(REPO_DIR, 'benchmarks', 'synthetic_reservation.py'), '--output_dir',
+        output_dir] + RESERVATION_ARGS, check=True, stdout=subprocess.DEVNULL)
+    return output_dir
+
+
+def generate_page(reservation_dir: str, output_dir: str, argv: list) -> str:
+    shutil.copytree(reservation_dir, output_dir)
+    results_dir = os.path.join(output_dir, 'reservation')
+
+    subprocess.run([sys.executable, os.path.join(REPO_DIR, 'generate_oai_report.py'), '--results_dir', results_dir,
+        '--history_dir', os.path.join(output_dir, 'history'), '--plot_backend', 'matplotlib'] + argv,
+        cwd=results_dir, capture_output=True, check=True)
+
+    with open(os.path.join(results_dir, 'test_summary.html'), 'r') as f:
+        return f.read()
+
+
+@pytest.fixture(scope='module')
+def serial_page(reservation_dir, tmp_path_factory):
+    return generate_page(reservation_dir, str(tmp_path_factory.mktemp('serial') / 'run'), [])
+
+
+@pytest.mark.parametrize('argv', [['--workers', '3'], ['--page_assembly', 'streaming'],
+                                  ['--workers', '2', '--page_assembly', 'streaming']],
+                         ids=['workers', 'streaming', 'workers_streaming'])
+def test_pages_are_identical(reservation_dir, serial_page, tmp_path, argv):
+    assert serial_page.count('<img') >= 2
+    assert generate_page(reservation_dir, str(tmp_path / 'run'), argv) == serial_page
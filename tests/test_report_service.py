@@ -0,0 +1,146 @@
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+import report_service
+from report_service import JobStatus, ReportService, get_request_handler, queue_job_file
+
+JOB_TIMEOUT_SECONDS = 10
+
+
+# service whose reports are generated by generate_report, replaced by the tests
+@pytest.fixture
+def make_service():
+    services = []
+
+    def make(concurrency: int=1, max_queue: int=4) -> ReportService:
+        services.append(ReportService(concurrency, max_queue, 1))
+        return services[-1]
+
+    yield make
+    for el in services:
+        el.shutdown()
+
+
+@pytest.fixture
+def service_url(make_service):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), get_request_handler(make_service(max_queue=1)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def request_json(url: str, data: bytes=None) -> tuple:
+    try:
+        with urlopen(Request(url, data=data, method='POST' if data is not None else 'GET')) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def wait_job_status(url: str, status: str) -> dict:
+    end_time = time.monotonic() + JOB_TIMEOUT_SECONDS
+    while time.monotonic() < end_time:
+        _, job_status = request_json(url)
+        if job_status.get('status') == status:
+            return job_status
+        time.sleep(0.01)
+
+    raise AssertionError('Job did not reach status {}: {}'.format(status, job_status))
+
+
+def test_job_status(service_url, monkeypatch):
+    monkeypatch.setattr(report_service, 'generate_report', lambda *args, **kwargs: True)
+
+    code, job = request_json(service_url + '/jobs', json.dumps({'results_dir': 'reservation'}).encode())
+    assert code == 202 and job['status'] == JobStatus.QUEUED
+
+    job_status = wait_job_status('{}/jobs/{}'.format(service_url, job['job_id']), JobStatus.DONE)
+    assert job_status['results_dir'] == 'reservation'
+
+    assert request_json(service_url + '/jobs/unknown')[0] == 404
+
+
+@pytest.mark.parametrize('job_data', [b'{"results_dir": ', b'{"workers": 2}', b'["--results_dir", "r", "--profile_hook", "cprofile"]'])
+def test_invalid_jobs_are_rejected(service_url, job_data):
+    code, response = request_json(service_url + '/jobs', job_data)
+    assert code == 400 and 'error' in response
+
+
+# one job running and one waiting fill the service, which accepts jobs again once they are done
+def test_full_queue_is_rejected(service_url, monkeypatch):
+    release_jobs = threading.Event()
+    monkeypatch.setattr(report_service, 'generate_report', lambda *args, **kwargs: release_jobs.wait())
+    job_data = json.dumps(['--results_dir', 'reservation']).encode()
+
+    code, running_job = request_json(service_url + '/jobs', job_data)
+    wait_job_status('{}/jobs/{}'.format(service_url, running_job['job_id']), JobStatus.RUNNING)
+    assert request_json(service_url + '/jobs', job_data)[0] == 202
+
+    try:
+        with pytest.raises(HTTPError) as e:
+            urlopen(Request(service_url + '/jobs', data=job_data, method='POST'))
+        assert e.value.code == 503
+        assert e.value.headers['Retry-After'] == str(report_service.RETRY_AFTER_SECONDS)
+    finally:
+        release_jobs.set()
+
+    wait_job_status('{}/jobs/{}'.format(service_url, running_job['job_id']), JobStatus.DONE)
+
+
+def test_job_files_are_renamed_once_processed(tmp_path, make_service, monkeypatch):
+    service = make_service()
+    monkeypatch.setattr(report_service, 'generate_report', lambda args, *_, **kwargs: args.results_dir == 'passed')
+
+    job_files = dict()
+    for el in ['passed', 'failed', 'invalid']:
+        job_files[el] = str(tmp_path / '{}.json'.format(el))
+        with open(job_files[el], 'w') as f:
+            json.dump({'results_dir': el} if el != 'invalid' else {'results_dir': el, 'no_such_argument': 1}, f)
+
+        assert queue_job_file(service, job_files[el])
+
+    service.job_queue.join()
+    assert sorted(os.listdir(str(tmp_path))) == ['failed.json.failed', 'invalid.json.failed', 'passed.json.done']
+
+
+def test_job_is_run_again_in_new_pool(make_service, monkeypatch):
+    service = make_service()
+    broken_executor = service.get_executor()
+    job_executors = []
+
+    def generate_report(args, executor, **kwargs):
+        job_executors.append(executor)
+        if executor is broken_executor:
+            raise BrokenProcessPool('worker killed')
+        return True
+
+    monkeypatch.setattr(report_service, 'generate_report', generate_report)
+    job_id = service.submit(report_service.parse_job({'results_dir': 'reservation'}))
+    service.job_queue.join()
+
+    assert service.get_job_status(job_id)['status'] == JobStatus.DONE
+    assert job_executors == [broken_executor, service.get_executor()]
+    assert service.get_executor() is not broken_executor
+
+
+def test_job_fails_if_new_pool_breaks(make_service, monkeypatch):
+    service = make_service()
+
+    def generate_report(*args, **kwargs):
+        raise BrokenProcessPool('worker killed')
+
+    monkeypatch.setattr(report_service, 'generate_report', generate_report)
+    job_id = service.submit(report_service.parse_job({'results_dir': 'reservation'}))
+    service.job_queue.join()
+
+    assert service.get_job_status(job_id)['status'] == JobStatus.FAILED
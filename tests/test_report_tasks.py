@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from html_report_utils import iterate_report_tasks
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+def test_serial_results_are_in_order():
+    assert list(iterate_report_tasks(square, range(10))) == [x * x for x in range(10)]
+
+
+def test_pool_results_are_in_order():
+    assert list(iterate_report_tasks(square, range(10), workers=2)) == [x * x for x in range(10)]
+
+
+# tasks are only submitted as results are consumed, at most twice as many as the workers of the executor
+def test_pending_tasks_are_bounded_by_executor_workers():
+    submitted_tasks = []
+    release_tasks = threading.Event()
+
+    def run_task(x: int) -> int:
+        release_tasks.wait()
+        return x
+
+    def record_tasks(tasks):
+        for el in tasks:
+            submitted_tasks.append(el)
+            yield el
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = iterate_report_tasks(run_task, record_tasks(range(20)), 3, executor)
+        release_tasks.set()
+
+        assert next(results) == 0
+        assert len(submitted_tasks) == 6
+        assert list(results) == list(range(1, 20))
@@ -0,0 +1,86 @@
+import json
+import os
+
+from constants import ProcessingConstants
+import results_scanner
+from results_scanner import scan_results_directory
+
+GNB_LOG = ProcessingConstants.OAI_GNB_LOG_FILE.value
+UE_LOG = ProcessingConstants.OAI_UE_LOG_FILE.value
+
+
+def write_file(path: str, content: str='') -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+    return path
+
+
+# reservation with a gnb, two ues with reports in nested directories, and files that are not results
+def make_results_dir(results_dir: str) -> None:
+    write_file(os.path.join(results_dir, 'srn001-RES', GNB_LOG))
+    write_file(os.path.join(results_dir, 'srn001-RES', 'notes.txt'))
+    for ue_idx in [2, 3]:
+        ue_dir = os.path.join(results_dir, 'srn00{}-RES'.format(ue_idx))
+        write_file(os.path.join(ue_dir, UE_LOG))
+        write_file(os.path.join(ue_dir, 'iperf3_result_20240730_160000_DL.json'))
+        write_file(os.path.join(ue_dir, 'run2', 'iperf3_result_20240730_170000_UL.json'))
+        write_file(os.path.join(ue_dir, 'result.json'))
+
+
+def test_scan_finds_gnb_ues_and_their_reports(tmp_path):
+    results_dir = str(tmp_path / 'results')
+    make_results_dir(results_dir)
+
+    gnb_dir, ue_dir, ue_reports = scan_results_directory(results_dir)
+
+    assert gnb_dir == [os.path.join(results_dir, 'srn001-RES')]
+    assert ue_dir == [os.path.join(results_dir, 'srn002-RES'), os.path.join(results_dir, 'srn003-RES')]
+    for el in ue_dir:
+        assert ue_reports[el] == [os.path.join(el, 'iperf3_result_20240730_160000_DL.json'),
+                                  os.path.join(el, 'run2', 'iperf3_result_20240730_170000_UL.json')]
+
+
+def test_symlinked_directories_are_not_followed(tmp_path):
+    results_dir = str(tmp_path / 'results')
+    make_results_dir(results_dir)
+    make_results_dir(str(tmp_path / 'other'))
+    os.symlink(str(tmp_path / 'other' / 'srn002-RES'), os.path.join(results_dir, 'srn009-RES'))
+
+    _, ue_dir, _ = scan_results_directory(results_dir)
+    assert len(ue_dir) == 2
+
+
+def test_manifest_only_lists_modified_directories(tmp_path, monkeypatch):
+    results_dir = str(tmp_path / 'results')
+    manifest_file = str(tmp_path / 'manifest.json')
+    make_results_dir(results_dir)
+
+    first_scan = scan_results_directory(results_dir, manifest_file)
+    with open(manifest_file, 'r') as f:
+        assert all([isinstance(x, str) for d in json.load(f)['directories'].values() for x in d['files']])
+
+    listed_dirs = []
+    scan_directory = results_scanner.scan_directory
+
+    def record_scan_directory(dir_path: str, dir_mtime: int) -> dict:
+        listed_dirs.append(dir_path)
+        return scan_directory(dir_path, dir_mtime)
+
+    monkeypatch.setattr(results_scanner, 'scan_directory', record_scan_directory)
+    assert scan_results_directory(results_dir, manifest_file) == first_scan
+    assert listed_dirs == []
+
+    new_report = write_file(os.path.join(results_dir, 'srn003-RES', 'iperf3_result_20240730_180000_DL.json'))
+    _, _, ue_reports = scan_results_directory(results_dir, manifest_file)
+
+    assert listed_dirs == [os.path.join(results_dir, 'srn003-RES')]
+    assert new_report in ue_reports[os.path.join(results_dir, 'srn003-RES')]
+
+
+def test_invalid_manifest_is_ignored(tmp_path):
+    results_dir = str(tmp_path / 'results')
+    manifest_file = write_file(str(tmp_path / 'manifest.json'), '{not json')
+    make_results_dir(results_dir)
+
+    assert scan_results_directory(results_dir, manifest_file) == scan_results_directory(results_dir)
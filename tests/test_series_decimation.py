@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from constants import DecimationModes
+from series_decimation import decimate_lttb, decimate_minmax, get_decimation_index
+
+MAX_POINTS = 200
+
+
+# noisy periodic series with a single spike and a drop, and a gap without values if requested
+def get_test_series(n_points: int=5000, gap: bool=True) -> tuple:
+    rng = np.random.default_rng(1)
+    x = np.arange(1, n_points + 1, dtype=np.float64)
+    y = 20 + 5 * np.sin(x / 50) + rng.normal(0, 0.5, n_points)
+    y[n_points // 3] = 100
+    y[2 * n_points // 3] = -50
+    if gap:
+        y[1000:1100] = np.nan
+    return x, y
+
+
+# point by point implementation of largest-triangle-three-buckets, with the buckets of decimate_lttb
+def reference_lttb(x, y, max_points: int) -> list:
+    n_buckets = max_points - 2
+    bucket_edges = [int(i * (len(y) - 2) / n_buckets) + 1 for i in range(n_buckets + 1)]
+
+    keep_idx = [0]
+    for b_idx in range(n_buckets):
+        if b_idx + 1 < n_buckets:
+            next_bucket = range(bucket_edges[b_idx + 1], bucket_edges[b_idx + 2])
+            avg_x = sum([x[i] for i in next_bucket]) / len(next_bucket)
+            avg_y = sum([y[i] for i in next_bucket]) / len(next_bucket)
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        prev_x, prev_y = x[keep_idx[-1]], y[keep_idx[-1]]
+        areas = [abs((prev_x - avg_x) * (y[i] - prev_y) - (prev_x - x[i]) * (avg_y - prev_y))
+                 for i in range(bucket_edges[b_idx], bucket_edges[b_idx + 1])]
+        keep_idx.append(bucket_edges[b_idx] + areas.index(max(areas)))
+
+    return keep_idx + [len(y) - 1]
+
+
+def test_lttb_matches_reference():
+    x, y = get_test_series(gap=False)
+    assert decimate_lttb(x, y, MAX_POINTS).tolist() == reference_lttb(x, y, MAX_POINTS)
+
+
+def test_lttb_keeps_ends_order_and_spikes():
+    x, y = get_test_series()
+    keep_idx = decimate_lttb(x, y, MAX_POINTS)
+
+    assert len(keep_idx) == MAX_POINTS
+    assert keep_idx[0] == 0 and keep_idx[-1] == len(y) - 1
+    assert np.all(np.diff(keep_idx) > 0)
+    assert np.nanargmax(y) in keep_idx and np.nanargmin(y) in keep_idx
+
+
+def test_minmax_keeps_extremes_and_gaps():
+    x, y = get_test_series()
+    keep_idx = decimate_minmax(x, y, MAX_POINTS)
+
+    assert len(keep_idx) <= MAX_POINTS
+    assert np.all(np.diff(keep_idx) > 0)
+    assert np.nanargmin(y) in keep_idx and np.nanargmax(y) in keep_idx
+    assert np.isnan(y[keep_idx]).any()
+
+
+@pytest.mark.parametrize('decimation', [x.value for x in DecimationModes])
+def test_short_series_are_not_decimated(decimation):
+    x, y = get_test_series(MAX_POINTS, False)
+    assert get_decimation_index(x, y, decimation, MAX_POINTS) is None
+
+
+def test_no_decimation_mode():
+    x, y = get_test_series()
+    assert get_decimation_index(x, y, DecimationModes.NONE.value, MAX_POINTS) is None
@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+import time
+
+from conftest import REPO_DIR
+
+# modules that must only be imported when reports are generated, not when the tool starts
+DEFERRED_MODULES = ['html_report_utils', 'matplotlib', 'pandas']
+
+# modules that printing the help must not import, not even indirectly
+HEAVY_MODULES = ['matplotlib', 'numpy', 'pandas', 'seaborn']
+
+# wall-clock time of printing the help, loose enough for slow ci machines. The fastest of a few runs is kept
+HELP_BUDGET_SECONDS = 1.0
+HELP_RUNS = 3
+
+
+def get_modules_loaded_by(module: str) -> list:
+    code = 'import json, sys; import {}; print(json.dumps(sorted(sys.modules)))'.format(module)
+    output = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+# top-level packages of the modules imported by a run, as listed by python -X importtime
+def get_modules_imported_by_run(argv: list) -> set:
+    output = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=REPO_DIR, capture_output=True, text=True,
+        check=True).stderr
+
+    return set([x.split('|')[-1].strip().split('.')[0] for x in output.splitlines() if x.startswith('import time:')])
+
+
+def test_startup_does_not_import_report_modules():
+    loaded_modules = get_modules_loaded_by('generate_oai_report')
+
+    assert [x for x in DEFERRED_MODULES if x in loaded_modules] == []
+
+
+def test_help_does_not_import_heavy_modules():
+    imported_modules = get_modules_imported_by_run(['generate_oai_report.py', '--help'])
+
+    assert 'argparse' in imported_modules
+    assert [x for x in HEAVY_MODULES if x in imported_modules] == []
+
+
+def test_help_is_within_budget():
+    run_times = []
+    for _ in range(HELP_RUNS):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, 'generate_oai_report.py', '--help'], cwd=REPO_DIR, capture_output=True, check=True)
+        run_times.append(time.perf_counter() - start_time)
+
+    assert min(run_times) < HELP_BUDGET_SECONDS
@@ -0,0 +1,84 @@
+import os
+import sys
+
+import pytest
+
+from conftest import REPO_DIR
+import constants
+from constants import ChartModes, PlotBackends, StreamModes
+from generate_oai_report import generate_report, get_args
+from html_report_utils import load_test_history_data
+from iperf_json_reader import load_iperf_report
+from iperf_log_grapher import grapher
+
+# the synthetic reservations of the benchmarks
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+import synthetic_reservation
+
+N_STREAMS = 3
+
+METRIC = constants.TestKeys.METRIC.value
+METRIC_MEAN = constants.TestKeys.METRIC_MEAN.value
+ALL_STREAMS_KEY = '{}{}'.format(constants.TestResultKeys.STREAM.value, constants.TestResultKeys.ALL_STREAMS.value)
+
+
+def make_reservation(output_dir, streams: int, bands: str) -> tuple:
+    args = synthetic_reservation.get_args(['--output_dir', str(output_dir), '--ues', '1', '--protocols', 'tcp',
+        '--directions', 'DL', '--bands', bands, '--streams', str(streams), '--intervals', '12'])
+    return synthetic_reservation.generate_reservation(args.output_dir, args)
+
+
+def get_json_report(results_dir: str) -> str:
+    ue_dir = os.path.join(results_dir, 'srn002-RES')
+    return os.path.join(ue_dir, [x for x in os.listdir(ue_dir) if x.endswith('.json')][0])
+
+
+def get_band_results(json_report: str, stream_mode: str, chart_mode: str=ChartModes.INTERACTIVE.value,
+                     stream_workers: int=1) -> dict:
+    figure_data = grapher(load_iperf_report(json_report), 'date', '', 'png', 'test', 20, None, PlotBackends.MATPLOTLIB.value,
+        chart_mode, stream_mode, stream_workers)
+    return figure_data[constants.TestKeys.RESULTS.value]['{}tcp'.format(constants.TestResultKeys.PROTOCOL.value)][
+        '{}20'.format(constants.TestResultKeys.BAND.value)]
+
+
+def get_throughput(stream_results: list) -> dict:
+    return [x for x in stream_results if x[METRIC].startswith('Throughput')][0]
+
+
+@pytest.mark.parametrize('stream_mode', [StreamModes.SUM.value, StreamModes.OVERLAY.value])
+def test_streams_are_aggregated(tmp_path, stream_mode):
+    json_report = get_json_report(make_reservation(tmp_path, N_STREAMS, '20')[0])
+    iperf_output = load_iperf_report(json_report)['tcp']['20']
+
+    band_results = get_band_results(json_report, stream_mode)
+    assert list(band_results) == [ALL_STREAMS_KEY]
+
+    throughput = get_throughput(band_results[ALL_STREAMS_KEY])
+    sum_throughput = iperf_output['intervals'].sum['bits_per_second'] * 1e-6
+    assert throughput[METRIC_MEAN] == pytest.approx(sum_throughput.mean())
+
+    # the aggregate is the sum of the streams
+    per_stream_results = get_band_results(json_report, StreamModes.PER_STREAM.value)
+    assert len(per_stream_results) == N_STREAMS
+    assert throughput[METRIC_MEAN] == pytest.approx(sum([get_throughput(x)[METRIC_MEAN] for x in per_stream_results.values()]))
+
+
+def test_stream_workers_draw_same_charts(tmp_path):
+    json_report = get_json_report(make_reservation(tmp_path, N_STREAMS, '20')[0])
+
+    serial_results = get_band_results(json_report, StreamModes.PER_STREAM.value, ChartModes.IMAGE.value)
+    assert get_band_results(json_report, StreamModes.PER_STREAM.value, ChartModes.IMAGE.value, 2) == serial_results
+
+
+# the history only holds results of single streams
+@pytest.mark.parametrize('stream_mode, history_rows', [(StreamModes.PER_STREAM.value, 1), (StreamModes.SUM.value, 0),
+                                                        (StreamModes.OVERLAY.value, 0)])
+def test_history_is_only_updated_per_stream(tmp_path, stream_mode, history_rows):
+    results_dir, history_dir = make_reservation(tmp_path, 1, '0')
+
+    args = get_args(['--results_dir', results_dir, '--history_dir', history_dir, '--plot_backend', PlotBackends.MATPLOTLIB.value,
+        '--chart_mode', ChartModes.INTERACTIVE.value, '--stream_mode', stream_mode])
+    assert generate_report(args)
+
+    df_history = load_test_history_data(os.path.join(history_dir, 'test_mean_history_tcp_downlink.pkl'), 'tcp', 'Downlink')
+    assert len(df_history.index) == history_rows